@@ -0,0 +1,156 @@
+"""
+审批详情并发获取压测
+
+启动一个本地飞书接口替身服务（模拟审批列表和审批详情接口，每个详情请求固定延迟），
+比较串行与不同并发数下 get_leave_users_on_date 的耗时。
+不会访问真实飞书租户。
+
+使用方法：
+    cd backend
+    python playground/service/feishu/bench_approval_fetch.py [实例数] [单次延迟毫秒]
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, backend_dir)
+
+from src.utils.feishu.client import FeishuClient
+from src.utils.feishu.bitable import BitableAPI
+from src.utils.feishu.approval_cache import ApprovalCache
+
+
+CHECK_DATE = "2025-10-24"
+
+
+def build_instance(index: int) -> dict:
+    """构造一个已通过的请假审批详情（每10个实例中有1个覆盖检查日期）"""
+    day = 24 if index % 10 == 0 else 20
+    form = [{
+        "type": "leaveGroupV2",
+        "value": {
+            "name": "年假",
+            "start": f"2025-10-{day:02d}T00:00:00+08:00",
+            "end": f"2025-10-{day:02d}T23:59:59+08:00"
+        }
+    }]
+    return {
+        "approval_code": "BENCH-LEAVE",
+        "status": "APPROVED",
+        "open_id": f"ou_bench_{index:04d}",
+        "form": json.dumps(form)
+    }
+
+
+def make_handler(instance_count: int, latency: float):
+    """创建替身服务的请求处理器"""
+    instance_codes = [f"BENCH-{i:04d}" for i in range(instance_count)]
+
+    class FakeFeishuHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, payload: dict):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            self._send_json({"code": 0, "tenant_access_token": "t-bench", "expire": 7200})
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            path = parsed.path
+            if path == "/approval/v4/instances":
+                # 按 page_size / page_token 分页返回
+                query = parse_qs(parsed.query)
+                page_size = int(query.get("page_size", ["100"])[0])
+                offset = int(query.get("page_token", ["0"])[0])
+                page = instance_codes[offset:offset + page_size]
+                has_more = offset + page_size < len(instance_codes)
+                self._send_json({"code": 0, "data": {
+                    "instance_code_list": page,
+                    "page_token": str(offset + page_size) if has_more else "",
+                    "has_more": has_more
+                }})
+            elif path.startswith("/approval/v4/instances/"):
+                time.sleep(latency)
+                index = int(path.rsplit("-", 1)[-1])
+                self._send_json({"code": 0, "data": build_instance(index)})
+            else:
+                self._send_json({"code": 404, "msg": f"unknown path {path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeFeishuHandler
+
+
+def run_once(base_url: str, cache_dir: str, concurrency: int) -> tuple:
+    """使用全新的缓存运行一次请假检测，返回 (耗时秒数, 请假人数)"""
+    client = FeishuClient("bench_app", "bench_secret", base_url=base_url)
+    cache = ApprovalCache(db_path=os.path.join(cache_dir, f"cache_{concurrency}.db"))
+    bitable = BitableAPI(
+        client,
+        app_token="bench_app_token",
+        table_id="bench_table",
+        leave_approval_code="BENCH-LEAVE",
+        approval_cache=cache,
+        approval_concurrency=concurrency,
+        approval_rate_limit=0
+    )
+
+    start = time.perf_counter()
+    leave_users, _ = bitable.get_leave_users_on_date(CHECK_DATE)
+    elapsed = time.perf_counter() - start
+
+    # 再运行一次，此时全部命中缓存
+    cached_start = time.perf_counter()
+    bitable.get_leave_users_on_date(CHECK_DATE)
+    cached_elapsed = time.perf_counter() - cached_start
+
+    return elapsed, cached_elapsed, len(leave_users)
+
+
+def main():
+    instance_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(instance_count, latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print("=" * 80)
+    print(f"🧪 审批详情获取压测: {instance_count} 个实例, 单次详情延迟 {latency_ms:.0f}ms")
+    print("=" * 80)
+
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for concurrency in (1, 4, 8, 16):
+            elapsed, cached_elapsed, leave_count = run_once(base_url, cache_dir, concurrency)
+            results.append((concurrency, elapsed, cached_elapsed, leave_count))
+
+    server.shutdown()
+
+    serial_time = results[0][1]
+    print(f"\n{'并发数':<8}{'冷启动耗时':<14}{'加速比':<10}{'缓存命中耗时':<14}{'请假人数':<8}")
+    for concurrency, elapsed, cached_elapsed, leave_count in results:
+        speedup = serial_time / elapsed if elapsed else 0
+        print(f"{concurrency:<10}{elapsed:<16.3f}{speedup:<13.1f}{cached_elapsed:<18.3f}{leave_count:<8}")
+
+    print("\n" + "=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+"""
+工时检查流水线离线压测
+
+在子进程中启动本地飞书接口替身服务，回放合成（或录制的）数据：
+- 多维表格记录分页（/bitable/v1/apps/{app_token}/tables/{table_id}/records）
+- 群成员分页（/im/v1/chats/{chat_id}/members）
+- 审批列表与审批详情（/approval/v4/instances、/approval/v4/instances/{code}）
+
+按规模（人数 × 月数）运行 check_users_filled（单日检查）和 summarize_period（月度/年度总结，
+check_month_summary 即一个月的 summarize_period），分别报告耗时、飞书接口调用次数和峰值内存。
+总结运行两次：冷启动（空的日结果存储）和热启动（复用日结果存储）。
+不会访问真实飞书租户。
+
+使用方法：
+    cd backend
+    python playground/service/feishu/bench_labor_pipeline.py
+    python playground/service/feishu/bench_labor_pipeline.py --scenarios 50x1,500x1 --latency 5
+    python playground/service/feishu/bench_labor_pipeline.py --fixtures ./fixtures --json result.json
+
+录制数据（--fixtures 目录，文件都是可选的，缺失的部分使用合成数据）：
+    records.json    多维表格记录列表（接口返回的 items）
+    members.json    群成员列表（接口返回的 items）
+    approvals.json  审批详情列表（详情接口返回的 data，需包含 instance_code）
+"""
+
+import sys
+import os
+import io
+import json
+import time
+import zlib
+import argparse
+import tempfile
+import tracemalloc
+import multiprocessing
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, backend_dir)
+
+from src.utils.workday_calendar import workday_calendar
+
+
+APP_TOKEN = "bascnBench"
+TABLE_ID = "tblBench"
+CHAT_ID = "oc_bench"
+LEAVE_APPROVAL_CODE = "BENCH-LEAVE"
+DEFAULT_SCENARIOS = "50x1,500x1,5000x1,50x12,500x12,5000x12"
+
+# 多维表格记录接口单页条数（客户端固定请求 500）
+RECORD_PAGE_SIZE = 500
+
+
+def bench_period(months: int) -> tuple:
+    """压测的统计周期：截至昨天的 months 个月"""
+    end = datetime.now().date() - timedelta(days=1)
+    start = end - timedelta(days=30 * months - 1)
+    return start, end
+
+
+class BenchDataset:
+    """替身服务回放的数据（合成数据按需生成，不一次性占用内存）"""
+
+    def __init__(self, people: int, months: int, fill_rate: float, leave_rate: float, fixtures: str = None):
+        self.people = people
+        self.fill_percent = int(fill_rate * 100)
+        self.leave_percent = int(leave_rate * 100)
+        self.start, self.end = bench_period(months)
+        self.workdays = list(workday_calendar.workdays(self.start, self.end))
+
+        self.recorded_records = None
+        self.members = [
+            {"member_id": f"ou_bench_{i:05d}", "member_id_type": "open_id", "name": f"成员{i:05d}"}
+            for i in range(people)
+        ]
+        self.approvals = self._synthetic_approvals()
+
+        if fixtures:
+            self._load_fixtures(fixtures)
+
+        # 已序列化的分页响应
+        self._page_cache = {}
+
+    def _load_fixtures(self, fixtures: str):
+        """读取录制的数据，覆盖对应的合成数据"""
+        def load(name):
+            path = os.path.join(fixtures, name)
+            if not os.path.exists(path):
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        records = load("records.json")
+        if records is not None:
+            self.recorded_records = records
+        members = load("members.json")
+        if members is not None:
+            self.members = members
+        approvals = load("approvals.json")
+        if approvals is not None:
+            self.approvals = {item['instance_code']: item for item in approvals}
+
+    def _filled(self, person: int, day_index: int) -> bool:
+        """合成数据：某人某个工作日是否填写（固定哈希，多次运行结果一致）"""
+        return zlib.crc32(f"{person}:{day_index}".encode()) % 100 < self.fill_percent
+
+    def _synthetic_approvals(self) -> dict:
+        """合成数据：部分人员在周期内每月请假 1~2 天"""
+        approvals = {}
+        for person in range(self.people):
+            if zlib.crc32(f"leave:{person}".encode()) % 100 >= self.leave_percent:
+                continue
+            for day_index in range(person % 20, len(self.workdays), 20):
+                day = self.workdays[day_index]
+                length = 1 + person % 2
+                form = [{
+                    "type": "leaveGroupV2",
+                    "value": {
+                        "name": "年假",
+                        "start": f"{day.isoformat()}T00:00:00+08:00",
+                        "end": f"{(day + timedelta(days=length - 1)).isoformat()}T23:59:59+08:00"
+                    }
+                }]
+                code = f"BENCH-{person:05d}-{day_index:03d}"
+                approvals[code] = {
+                    "instance_code": code,
+                    "approval_code": LEAVE_APPROVAL_CODE,
+                    "status": "APPROVED",
+                    "open_id": f"ou_bench_{person:05d}",
+                    "form": json.dumps(form)
+                }
+        return approvals
+
+    def _synthetic_record(self, person: int, day_index: int) -> dict:
+        """合成数据：一条工时记录（记录时间为当天 10:00 的毫秒时间戳）"""
+        day = self.workdays[day_index]
+        record_time = int(datetime(day.year, day.month, day.day, 10).timestamp() * 1000)
+        return {
+            "record_id": f"rec{day_index:03d}{person:05d}",
+            "fields": {
+                "员工": [{"id": f"ou_bench_{person:05d}", "name": f"成员{person:05d}"}],
+                "记录时间": record_time,
+                "工时": 8
+            }
+        }
+
+    def record_page(self, offset: int) -> bytes:
+        """
+        多维表格记录分页（page_token 为偏移量）
+
+        合成数据按 (工作日, 人员) 组合空间分页，每页覆盖 RECORD_PAGE_SIZE 个组合，只返回已填写的记录
+        """
+        body = self._page_cache.get(offset)
+        if body is not None:
+            return body
+
+        if self.recorded_records is not None:
+            total = len(self.recorded_records)
+            items = self.recorded_records[offset:offset + RECORD_PAGE_SIZE]
+        else:
+            total = len(self.workdays) * self.people
+            items = []
+            for combo in range(offset, min(offset + RECORD_PAGE_SIZE, total)):
+                day_index, person = divmod(combo, self.people)
+                if self._filled(person, day_index):
+                    items.append(self._synthetic_record(person, day_index))
+
+        has_more = offset + RECORD_PAGE_SIZE < total
+        body = json.dumps({"code": 0, "data": {
+            "items": items,
+            "has_more": has_more,
+            "page_token": str(offset + RECORD_PAGE_SIZE) if has_more else "",
+            "total": total
+        }}, ensure_ascii=False).encode('utf-8')
+        self._page_cache[offset] = body
+        return body
+
+
+def make_handler(dataset: BenchDataset, latency: float):
+    """创建替身服务的请求处理器"""
+    instance_codes = list(dataset.approvals)
+
+    class FakeFeishuHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_body(self, body: bytes):
+            if latency:
+                time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, payload: dict):
+            self._send_body(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            path = urlparse(self.path).path
+            if path.endswith("/tenant_access_token/internal"):
+                self._send_json({"code": 0, "tenant_access_token": "t-bench", "expire": 7200})
+            else:
+                self._send_json({"code": 0, "data": {}})
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            path = parsed.path
+            query = parse_qs(parsed.query)
+            offset = int(query.get("page_token", ["0"])[0] or 0)
+
+            if path == f"/bitable/v1/apps/{APP_TOKEN}/tables/{TABLE_ID}/records":
+                self._send_body(dataset.record_page(offset))
+            elif path == f"/im/v1/chats/{CHAT_ID}/members":
+                page_size = int(query.get("page_size", ["100"])[0])
+                page = dataset.members[offset:offset + page_size]
+                has_more = offset + page_size < len(dataset.members)
+                self._send_json({"code": 0, "data": {
+                    "items": page,
+                    "page_token": str(offset + page_size) if has_more else "",
+                    "has_more": has_more
+                }})
+            elif path == "/approval/v4/instances":
+                page_size = int(query.get("page_size", ["100"])[0])
+                page = instance_codes[offset:offset + page_size]
+                has_more = offset + page_size < len(instance_codes)
+                self._send_json({"code": 0, "data": {
+                    "instance_code_list": page,
+                    "page_token": str(offset + page_size) if has_more else "",
+                    "has_more": has_more
+                }})
+            elif path.startswith("/approval/v4/instances/"):
+                detail = dataset.approvals.get(path.rsplit("/", 1)[-1])
+                if detail is None:
+                    self._send_json({"code": 404, "msg": "instance not found"})
+                else:
+                    self._send_json({"code": 0, "data": detail})
+            else:
+                self._send_json({"code": 404, "msg": f"unknown path {path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeFeishuHandler
+
+
+def serve(port_queue, people: int, months: int, fill_rate: float, leave_rate: float,
+          latency: float, fixtures: str = None):
+    """替身服务进程入口（与被测流水线分开进程，峰值内存只统计流水线）"""
+    dataset = BenchDataset(people, months, fill_rate, leave_rate, fixtures)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(dataset, latency))
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def measure(label: str, fn) -> dict:
+    """运行一次并统计耗时、接口调用和峰值内存"""
+    from src.utils.feishu.api_metrics import api_metrics
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with api_metrics.track("bench", step=label) as run:
+        result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    summary = run.summary()
+    return {
+        "step": label,
+        "elapsed": round(elapsed, 3),
+        "api_calls": summary['calls'],
+        "api_bytes": summary['bytes'],
+        "peak_memory_mb": round(peak / 1024 / 1024, 1),
+        "endpoints": {item['endpoint']: item['calls'] for item in summary['endpoints']},
+        "result": result
+    }
+
+
+def run_scenario(people: int, months: int, args) -> list:
+    """运行一个规模的压测，返回各步骤的统计"""
+    from src.utils.feishu.client import FeishuClient
+    from src.utils.feishu.approval_cache import ApprovalCache
+    from src.utils.feishu.approval_sync import ApprovalSync
+    from src.utils.feishu.compliance_store import ComplianceStore
+    from src.service.feishu.labor_hour import LaborHourChecker
+
+    ctx = multiprocessing.get_context("spawn")
+    port_queue = ctx.Queue()
+    server = ctx.Process(
+        target=serve,
+        args=(port_queue, people, months, args.fill_rate, args.leave_rate, args.latency / 1000, args.fixtures),
+        daemon=True
+    )
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=600)}"
+
+    start_day, end_day = bench_period(months)
+    check_day = max(workday_calendar.workdays(start_day, end_day))
+    steps = []
+
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            client = FeishuClient("bench_app", "bench_secret", base_url=base_url)
+            approval_sync = ApprovalSync(
+                client,
+                approval_cache=ApprovalCache(db_path=os.path.join(data_dir, "approval_cache.db")),
+                rate_limit=0,
+                lookback_days=30 * months + 30
+            )
+            checker = LaborHourChecker(
+                app_id="bench_app",
+                app_secret="bench_secret",
+                bitable_url=f"https://bench.feishu.cn/base/{APP_TOKEN}?table={TABLE_ID}",
+                leave_approval_code=LEAVE_APPROVAL_CODE,
+                chat_id=CHAT_ID,
+                feishu_client=client,
+                approval_sync=approval_sync,
+                team="bench",
+                compliance_store=ComplianceStore(db_path=os.path.join(data_dir, "labor_compliance.db"))
+            )
+
+            def daily():
+                result = checker.check_users_filled(date_str=check_day.strftime('%Y-%m-%d'))
+                return {"fill_rate": round(result.get('fill_rate', 0), 4), "on_leave": len(result.get('on_leave', []))}
+
+            def summary():
+                result = checker.summarize_period(start_day, end_day) or {}
+                return {
+                    "work_days": result.get('total_work_days'),
+                    "users": result.get('total_users'),
+                    "perfect": result.get('perfect_count')
+                }
+
+            for label, fn in (("daily_check", daily), ("summary_cold", summary), ("summary_warm", summary)):
+                output = io.StringIO()
+                with redirect_stdout(sys.stdout if args.verbose else output):
+                    step = measure(label, fn)
+                step.update({"people": people, "months": months})
+                steps.append(step)
+                print(
+                    f"{people:>6} {months:>4} {label:<14}{step['elapsed']:>10.2f}s"
+                    f"{step['api_calls']:>10}{step['api_bytes'] / 1024 / 1024:>11.1f}MB"
+                    f"{step['peak_memory_mb']:>11.1f}MB   {step['result']}"
+                )
+    finally:
+        server.terminate()
+        server.join()
+
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工时检查流水线离线压测")
+    parser.add_argument("--scenarios", default=DEFAULT_SCENARIOS,
+                        help=f"压测规模，人数x月数，逗号分隔（默认 {DEFAULT_SCENARIOS}）")
+    parser.add_argument("--latency", type=float, default=0, help="替身服务每个请求的固定延迟（毫秒），默认0")
+    parser.add_argument("--fill-rate", type=float, default=0.9, help="合成数据的填写率，默认0.9")
+    parser.add_argument("--leave-rate", type=float, default=0.1, help="合成数据中有请假的人员比例，默认0.1")
+    parser.add_argument("--fixtures", default=None, help="录制数据目录（records.json / members.json / approvals.json）")
+    parser.add_argument("--json", default=None, help="结果输出为 JSON 文件，便于对比回归")
+    parser.add_argument("--verbose", action="store_true", help="显示流水线自身的输出")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # 只保留警告及以上日志，避免大规模时日志输出主导耗时
+        from loguru import logger
+        import src.utils.logging  # noqa: F401  确保日志配置先完成再调整
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    scenarios = []
+    for item in args.scenarios.split(","):
+        people, months = item.lower().split("x")
+        scenarios.append((int(people), int(months)))
+
+    print("=" * 100)
+    print(f"🧪 工时检查流水线离线压测: {args.scenarios}，单次请求延迟 {args.latency:.0f}ms")
+    print("=" * 100)
+    print(f"{'人数':>6} {'月数':>4} {'步骤':<14}{'耗时':>11}{'接口调用':>8}{'响应大小':>9}{'峰值内存':>9}   结果")
+
+    all_steps = []
+    for people, months in scenarios:
+        all_steps.extend(run_scenario(people, months, args))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(all_steps, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+    print("\n" + "=" * 100)
+
+
+if __name__ == '__main__':
+    main()
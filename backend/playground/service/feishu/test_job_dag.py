@@ -0,0 +1,76 @@
+"""
+阶段依赖图（JobDAG）放弃阶段回归测试（不访问飞书）
+
+- 卡死的阶段超过截止时间后被放弃，但线程不返回、一直占用并行名额；
+  任务没有整体截止时间时，run() 必须在 abandon_grace 后返回并跳过等待名额的阶段，而不是永远阻塞
+- 被放弃的阶段收到取消事件，返回前检查取消事件时不执行副作用
+- 被放弃的阶段在宽限期内返回时，等待名额的阶段照常执行
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+backend_dir = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.job_dag import JobDAG
+
+
+def run_with_timeout(dag: JobDAG, limit: float):
+    """在后台线程中执行 dag.run()，超过 limit 秒未返回视为阻塞"""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(result=dag.run()), daemon=True)
+    thread.start()
+    thread.join(limit)
+    return outcome.get("result")
+
+
+def test_hung_stage_does_not_block_forever():
+    """max_parallel=1，卡死的阶段（deadline=0.5）占用唯一名额，独立阶段等待名额；任务没有整体截止时间"""
+    print("\n1️⃣ 卡死的阶段不会让 run() 永远阻塞")
+    hang = threading.Event()
+    dag = JobDAG("hung", max_parallel=1, abandon_grace=1)
+    dag.add("hung", lambda upstream, cancel: hang.wait(), deadline=0.5)
+    dag.add("independent", lambda upstream, cancel: "ok")
+
+    start = time.monotonic()
+    result = run_with_timeout(dag, limit=10)
+    hang.set()
+    assert result is not None, "run() 阻塞超过 10 秒"
+    statuses = {stage["name"]: stage["status"] for stage in result["stages"]}
+    assert statuses == {"hung": "timeout", "independent": "skipped"}, statuses
+    print(f"   ✅ {time.monotonic() - start:.2f}s 后返回: {statuses}")
+
+
+def test_abandoned_stage_skips_side_effect():
+    """被放弃的阶段返回前检查取消事件，不再执行副作用；名额释放后等待的阶段照常执行"""
+    print("\n2️⃣ 被放弃的阶段不执行副作用，宽限期内返回后释放名额")
+    sent = []
+
+    def publish(upstream, cancel):
+        time.sleep(1)
+        if cancel.is_set():
+            return "cancelled"
+        sent.append("card")
+        return "sent"
+
+    dag = JobDAG("publish", max_parallel=1, abandon_grace=5)
+    dag.add("publish", publish, deadline=0.3)
+    dag.add("independent", lambda upstream, cancel: "ok")
+
+    result = run_with_timeout(dag, limit=10)
+    assert result is not None, "run() 阻塞超过 10 秒"
+    time.sleep(0.2)
+    statuses = {stage["name"]: stage["status"] for stage in result["stages"]}
+    assert statuses == {"publish": "timeout", "independent": "success"}, statuses
+    assert not sent, "被放弃的阶段仍然发送了卡片"
+    print(f"   ✅ {statuses}，未发送卡片")
+
+
+if __name__ == "__main__":
+    test_hung_stage_does_not_block_forever()
+    test_abandoned_stage_skips_side_effect()
+    print("\n✅ 全部通过")
@@ -0,0 +1,221 @@
+"""
+调度器选主测试（不需要真实的 Redis / Postgres）
+
+- file: 启动多个子进程竞争同一个锁文件，结束主副本进程后观察接管耗时
+- redis / postgres: 使用进程内替身模拟多个副本，主副本失联后观察接管耗时
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import get_context
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+backend_dir = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.schedule.leader import LeaderElector, FileLease, RedisLease, PostgresLease
+
+
+TTL = 3
+
+
+# ========== 替身 ==========
+
+class FakeRedis:
+    """Redis 替身：支持 SET NX PX、GET 和选主使用的两个 Lua 脚本"""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+        self.down = set()  # 模拟网络断开的副本
+
+    def client(self, name):
+        fake = self
+
+        class Client:
+            def _check(self):
+                if name in fake.down:
+                    raise ConnectionError(f"{name} 无法连接 Redis")
+
+            def set(self, key, value, nx=False, px=None):
+                self._check()
+                with fake.lock:
+                    fake._expire(key)
+                    if nx and key in fake.data:
+                        return None
+                    fake.data[key] = (value, time.time() + px / 1000)
+                    return True
+
+            def get(self, key):
+                with fake.lock:
+                    fake._expire(key)
+                    return fake.data.get(key, (None,))[0]
+
+            def eval(self, script, numkeys, key, holder, *args):
+                self._check()
+                with fake.lock:
+                    fake._expire(key)
+                    if fake.data.get(key, (None,))[0] != holder:
+                        return 0
+                    if script == RedisLease.RENEW_SCRIPT:
+                        fake.data[key] = (holder, time.time() + int(args[0]) / 1000)
+                    else:
+                        del fake.data[key]
+                    return 1
+
+        return Client()
+
+    def _expire(self, key):
+        if key in self.data and self.data[key][1] <= time.time():
+            del self.data[key]
+
+
+class FakePostgres:
+    """Postgres 替身：advisory lock 绑定在连接上，连接关闭或断开时释放"""
+
+    def __init__(self):
+        self.locks = {}
+        self.lock = threading.Lock()
+        self.down = set()
+
+    def connect_for(self, name):
+        fake = self
+
+        class Cursor:
+            def __init__(self, conn):
+                self.conn = conn
+                self.row = None
+
+            def execute(self, sql, params=()):
+                if name in fake.down:
+                    # 连接断开，数据库释放该会话的锁
+                    self.conn.close()
+                    raise ConnectionError(f"{name} 与 Postgres 的连接已断开")
+                with fake.lock:
+                    if "pg_try_advisory_lock" in sql:
+                        owner = fake.locks.setdefault(params[0], self.conn)
+                        self.row = (owner is self.conn,)
+                    elif "pg_advisory_unlock" in sql:
+                        self.row = (fake.locks.get(params[0]) is self.conn,)
+                        if self.row[0]:
+                            del fake.locks[params[0]]
+                    else:
+                        self.row = (1,)
+
+            def fetchone(self):
+                return self.row
+
+            def close(self):
+                pass
+
+        class Connection:
+            autocommit = False
+
+            def cursor(self):
+                return Cursor(self)
+
+            def close(self):
+                with fake.lock:
+                    for key in [k for k, v in fake.locks.items() if v is self]:
+                        del fake.locks[key]
+
+        return lambda dsn: Connection()
+
+
+# ========== 测试 ==========
+
+def run_stand_in(backend_name):
+    """进程内3个副本，断开主副本的连接后等待接管"""
+    if backend_name == "redis":
+        fake = FakeRedis()
+        make_backend = lambda name: RedisLease(client=fake.client(name))
+    else:
+        fake = FakePostgres()
+        make_backend = lambda name: PostgresLease(connect=fake.connect_for(name))
+
+    electors = {
+        name: LeaderElector(make_backend(name), ttl=TTL, holder=name)
+        for name in ("replica-1", "replica-2", "replica-3")
+    }
+    for elector in electors.values():
+        elector.start()
+
+    leaders = [name for name, e in electors.items() if e.is_leader]
+    print(f"   初始主副本: {leaders}")
+    assert len(leaders) == 1
+
+    old = leaders[0]
+    fake.down.add(old)
+    lost_at = time.time()
+    new = None
+    while time.time() - lost_at < TTL * 3:
+        current = [name for name, e in electors.items() if e.is_leader]
+        if len(current) > 1:
+            raise AssertionError(f"同时存在多个主副本: {current}")
+        if current and current[0] != old:
+            new = current[0]
+            break
+        time.sleep(0.05)
+
+    print(f"   {old} 失联 → {new} 接管，耗时 {time.time() - lost_at:.2f}s（租约 {TTL}s）")
+    for elector in electors.values():
+        elector.stop()
+    return new is not None
+
+
+def _file_replica(lock_path, name):
+    """file 后端的副本进程：成为主副本后一直持有租约"""
+    elector = LeaderElector(FileLease(lock_path), ttl=TTL, holder=name)
+    elector.start()
+    while True:
+        time.sleep(1)
+
+
+def run_file():
+    """3个子进程竞争锁文件，结束主副本进程后等待接管"""
+    ctx = get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = os.path.join(tmp, "scheduler.lock")
+        procs = {
+            f"replica-{i}": ctx.Process(target=_file_replica, args=(lock_path, f"replica-{i}"), daemon=True)
+            for i in (1, 2, 3)
+        }
+        for proc in procs.values():
+            proc.start()
+        lease = FileLease(lock_path)
+        deadline = time.time() + 30
+        while lease.current_holder() is None and time.time() < deadline:
+            time.sleep(0.1)
+        old = lease.current_holder()
+        print(f"   初始主副本: {old}")
+
+        procs[old].kill()
+        killed_at = time.time()
+        new = None
+        while time.time() - killed_at < TTL * 3:
+            holder = lease.current_holder()
+            if holder and holder != old:
+                new = holder
+                break
+            time.sleep(0.05)
+
+        print(f"   {old} 退出 → {new} 接管，耗时 {time.time() - killed_at:.2f}s（租约 {TTL}s）")
+        for proc in procs.values():
+            proc.kill()
+        return new is not None
+
+
+if __name__ == "__main__":
+    results = {}
+    for name, func in (("file", run_file), ("redis", lambda: run_stand_in("redis")),
+                       ("postgres", lambda: run_stand_in("postgres"))):
+        print(f"\n🧪 {name}")
+        results[name] = func()
+
+    print("\n" + "=" * 40)
+    for name, ok in results.items():
+        print(f"{'✅' if ok else '❌'} {name}")
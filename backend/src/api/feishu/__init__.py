@@ -4,7 +4,7 @@
 包含飞书平台的所有 API 端点
 """
 
-from . import chat, approval, schedule
+from . import chat, approval, schedule, labor
 
-__all__ = ['chat', 'approval', 'schedule']
+__all__ = ['chat', 'approval', 'schedule', 'labor']
 
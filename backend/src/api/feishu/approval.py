@@ -11,6 +11,7 @@ from fastapi.responses import JSONResponse
 import pytz
 
 from src.utils import event_manager
+from src.utils.feishu.api_metrics import api_metrics
 from src.service.feishu.approval import create_approval_service_from_config
 
 router = APIRouter(prefix="/feishu/approval", tags=["feishu-approval"])
@@ -73,8 +74,9 @@ async def handle_approval_callback(request: Request):
             # 创建审批服务实例
             approval_service = create_approval_service_from_config()
             
-            # 处理审批事件
-            result = approval_service.handle_approval_event(data)
+            # 处理审批事件（接口调用计入该事件）
+            with api_metrics.track('approval_event', event_id=event_id):
+                result = approval_service.handle_approval_event(data)
             
             print(f"📊 处理结果: {result}")
             print("=" * 80)
@@ -0,0 +1,65 @@
+"""
+飞书工时统计相关 API
+
+提供任意日期范围（月度、季度、年度）的工时填写汇总，数据来自工时日结果存储
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+from src.service.feishu.labor_hour import LaborHourManager
+
+router = APIRouter(prefix="/feishu/labor", tags=["feishu-labor"])
+
+
+@router.get("/report")
+def get_labor_report(
+    start: str = Query(..., description="开始日期，格式 YYYY-MM-DD"),
+    end: str = Query(..., description="结束日期，格式 YYYY-MM-DD"),
+    team: Optional[str] = Query(None, description="团队名称（可选，默认所有团队）"),
+    daily: bool = Query(False, description="是否返回每天的明细")
+):
+    """
+    获取日期范围内的工时填写汇总
+    
+    已存储的日结果直接复用，只重新计算缺失或请假变化后被标记的日期
+    
+    返回：
+    - status: success / partial / error
+    - teams: 每个团队的汇总（工作日数、全勤/部分填写/未填写人员、每人请假天数、analytics 统计）和耗时
+    - comparison: 团队横向对比（整体填写率、全勤比例、最长连续未填写、按星期填写率）
+    """
+    try:
+        start_day = datetime.strptime(start, '%Y-%m-%d')
+        end_day = datetime.strptime(end, '%Y-%m-%d')
+    except ValueError:
+        return {
+            "status": "error",
+            "message": "日期格式错误，应为 YYYY-MM-DD"
+        }
+    
+    if end_day < start_day:
+        return {
+            "status": "error",
+            "message": "结束日期不能早于开始日期"
+        }
+    
+    result = LaborHourManager.report(start, end, team=team)
+    
+    # 默认不返回每天的明细和用户ID映射，避免响应过大
+    for team_result in result.get('teams', []):
+        summary = team_result.get('summary')
+        if summary:
+            summary.pop('user_info_map', None)
+            if not daily:
+                summary.pop('daily_results', None)
+    
+    if team and not result.get('teams') and result.get('status') != 'error':
+        return {
+            "status": "error",
+            "message": f"未找到团队: {team}"
+        }
+    
+    return result
@@ -1,12 +1,14 @@
 """
 飞书调度器相关 API
 
-提供调度器状态查询和任务列表查询接口
+提供调度器状态查询、任务列表查询、运行记录查询和飞书接口调用统计查询接口
 """
 
 from fastapi import APIRouter
 from typing import Optional
 
+from src.utils.feishu.api_metrics import api_metrics
+
 router = APIRouter(prefix="/feishu/schedule", tags=["feishu-schedule"])
 
 # 调度器实例（由 main.py 注入）
@@ -25,28 +27,62 @@ def get_scheduler_status():
     获取定时任务调度器状态
     
     返回：
-    - status: 运行状态（running/stopped/not_initialized）
+    - status: 运行状态（running/standby/stopped/not_initialized），standby 表示其他副本是主副本
     - type: 调度器类型（unified/reminder/none）
     - job_count: 任务数量
     - timezone: 时区
+    - leader: 选主状态（后端、当前副本标识、是否主副本、当前主副本、租约时长），未启用选主时为 null
+    - config_reloads: 最近的配置热加载事件（applied / unchanged / rejected，新增、删除、变更的任务，拒绝原因），最新的在前
     """
     if _unified_scheduler:
         is_running = _unified_scheduler.scheduler.running
+        is_leader = _unified_scheduler.is_leader
         job_count = len(_unified_scheduler.scheduler.get_jobs())
         scheduler_type = "unified"
         timezone = _unified_scheduler.timezone
+        elector = _unified_scheduler.elector
     else:
         return {
             "status": "not_initialized",
             "message": "定时任务调度器未初始化"
         }
     
+    if not is_leader:
+        status, message = "standby", "其他副本正在调度，当前副本待命"
+    elif is_running:
+        status, message = "running", "定时任务调度器运行正常"
+    else:
+        status, message = "stopped", "定时任务调度器已停止"
+    
     return {
-        "status": "running" if is_running else "stopped",
+        "status": status,
         "type": scheduler_type,
         "job_count": job_count,
         "timezone": timezone,
-        "message": "定时任务调度器运行正常" if is_running else "定时任务调度器已停止"
+        "leader": elector.status() if elector else None,
+        "config_reloads": list(reversed(_unified_scheduler.reload_events)),
+        "message": message
+    }
+
+
+@router.post("/reload")
+def reload_config():
+    """
+    立即重新加载定时任务配置（不等待配置文件检查间隔）
+    
+    返回：
+    - reload: 热加载事件；配置无效时 status 为 rejected，继续使用上一次有效的配置
+    """
+    if not _unified_scheduler:
+        return {
+            "status": "error",
+            "message": "定时任务调度器未初始化"
+        }
+    
+    event = _unified_scheduler.reload_config(force=True)
+    return {
+        "status": "error" if event["status"] == "rejected" else "ok",
+        "reload": event
     }
 
 
@@ -59,10 +95,12 @@ def get_scheduler_jobs():
     - status: 状态
     - type: 调度器类型
     - job_count: 任务数量
-    - jobs: 任务列表（包含 id, name, next_run_time, trigger）
+    - jobs: 任务列表（包含 id, name, next_run_time, trigger, last_run）
+      last_run 为最近一次运行的开始/结束时间、耗时、状态、错误和触发方式（scheduled / catch_up / manual）
     """
     if _unified_scheduler:
         jobs = _unified_scheduler.scheduler.get_jobs()
+        last_runs = _unified_scheduler.history.last_runs()
         scheduler_type = "unified"
     else:
         return {
@@ -77,7 +115,8 @@ def get_scheduler_jobs():
             "id": job.id,
             "name": job.name,
             "next_run_time": str(job.next_run_time),
-            "trigger": str(job.trigger)
+            "trigger": str(job.trigger),
+            "last_run": last_runs.get(job.args[0] if job.args else job.id)
         })
     
     return {
@@ -91,14 +130,14 @@ def get_scheduler_jobs():
 @router.post("/trigger/{job_id}")
 def trigger_job(job_id: str):
     """
-    手动触发指定的定时任务
+    手动触发指定的定时任务（后台执行，立即返回 run_id）
     
     参数：
     - job_id: 任务ID（如 labor_monday_friday_check）
     
     返回：
-    - status: 执行状态
-    - message: 执行消息
+    - status: accepted（已提交）/ running（该任务正在运行，返回正在进行的 run_id，不重复执行）/ error
+    - run_id: 运行ID，通过 /feishu/schedule/runs/{run_id} 查询进度和结果
     """
     if not _unified_scheduler:
         return {
@@ -106,29 +145,112 @@ def trigger_job(job_id: str):
             "message": "定时任务调度器未初始化"
         }
     
-    try:
-        # 查找任务
-        job = _unified_scheduler.scheduler.get_job(job_id)
-        if not job:
-            return {
-                "status": "error",
-                "message": f"未找到任务: {job_id}",
-                "available_jobs": [j.id for j in _unified_scheduler.scheduler.get_jobs()]
-            }
-        
-        # 手动执行任务
-        job.func(*job.args, **job.kwargs)
-        
+    spec = _unified_scheduler.task_specs.get(job_id)
+    if spec is None:
         return {
-            "status": "success",
-            "message": f"任务 {job.name} 已手动触发执行",
-            "job_id": job_id,
-            "job_name": job.name
+            "status": "error",
+            "message": f"未找到任务: {job_id}",
+            "available_jobs": list(_unified_scheduler.task_specs)
         }
-        
+    
+    try:
+        # 提交到后台执行（按任务声明的执行方式，记录为 manual）
+        run_id, created = _unified_scheduler.submit_task(job_id, trigger="manual")
     except Exception as e:
         return {
             "status": "error",
-            "message": f"执行任务失败: {str(e)}"
+            "message": f"提交任务失败: {str(e)}"
         }
+    
+    return {
+        "status": "accepted" if created else "running",
+        "message": f"任务 {spec['name']} 已提交执行" if created else f"任务 {spec['name']} 正在运行，未重复触发",
+        "job_id": job_id,
+        "job_name": spec["name"],
+        "run_id": run_id,
+        "status_url": f"/feishu/schedule/runs/{run_id}"
+    }
 
+
+@router.get("/runs/{run_id}")
+def get_job_run(run_id: str):
+    """
+    查询一次任务运行的进度和结果
+    
+    返回：
+    - run: 运行记录（状态、开始/结束时间、耗时、错误、触发方式）
+      - finished: 是否已结束
+      - progress: 运行中时的进度（执行方式、已运行时长、飞书接口调用次数；调用次数仅 thread 方式可统计）
+      - outcome: 结束后的执行结果
+    """
+    if not _unified_scheduler:
+        return {
+            "status": "error",
+            "message": "定时任务调度器未初始化"
+        }
+    
+    run = _unified_scheduler.get_run(run_id)
+    if run is None:
+        return {
+            "status": "error",
+            "message": f"未找到运行记录: {run_id}"
+        }
+    return {"status": "ok", "run": run}
+
+
+@router.get("/history")
+def get_job_history(job_id: Optional[str] = None, limit: int = 50):
+    """
+    查询定时任务运行记录
+    
+    参数：
+    - job_id: 只返回指定任务的记录（可选）
+    - limit: 返回数量，默认50
+    
+    返回：
+    - runs: 运行记录（开始/结束时间、耗时、状态、错误、参数、触发方式），按开始时间倒序
+    """
+    if not _unified_scheduler:
+        return {
+            "status": "error",
+            "message": "定时任务调度器未初始化",
+            "runs": []
+        }
+    
+    return {
+        "status": "ok",
+        "runs": _unified_scheduler.history.list_runs(job_id=job_id, limit=limit)
+    }
+
+
+@router.get("/api-calls")
+def get_api_call_runs(limit: int = 20, tag: Optional[str] = None):
+    """
+    查询最近任务运行的飞书接口调用统计
+    
+    参数：
+    - limit: 返回的运行数量，默认20
+    - tag: 只返回指定类型的运行（labor_check / month_summary / labor_report / chat_event / approval_event）
+    
+    返回：
+    - runs: 每次运行的调用次数、错误数、响应字节数、接口耗时，以及按接口的明细
+    """
+    return {
+        "status": "ok",
+        "runs": api_metrics.recent_runs(limit=limit, tag=tag),
+        "untracked": api_metrics.untracked.summary()
+    }
+
+
+@router.get("/api-calls/{run_id}")
+def get_api_call_run(run_id: str):
+    """
+    查询单次运行的飞书接口调用统计（包含各团队等子运行）
+    """
+    run = api_metrics.get_run(run_id)
+    if run is None:
+        return {
+            "status": "error",
+            "message": f"未找到运行记录: {run_id}"
+        }
+    return {"status": "ok", "run": run}
@@ -19,7 +19,7 @@ src_dir = current_dir.parent
 sys.path.insert(0, str(src_dir))
 
 from src.utils.schedule.unified_scheduler import UnifiedScheduler
-from src.api.feishu import chat, approval, schedule
+from src.api.feishu import chat, approval, schedule, labor
 
 
 # 自定义日志过滤器 - 过滤掉 /health 端点的访问日志
@@ -116,6 +116,7 @@ app = FastAPI(
 app.include_router(chat.router)
 app.include_router(approval.router)
 app.include_router(schedule.router)
+app.include_router(labor.router)
 
 
 @app.get("/")
@@ -129,7 +130,10 @@ def read_root():
     unified_scheduler = app_state["unified_scheduler"]
     
     if unified_scheduler:
-        scheduler_status = "running" if unified_scheduler.scheduler.running else "stopped"
+        if not unified_scheduler.is_leader:
+            scheduler_status = "standby"
+        else:
+            scheduler_status = "running" if unified_scheduler.scheduler.running else "stopped"
         job_count = len(unified_scheduler.scheduler.get_jobs())
         scheduler_type = "unified"
     else:
@@ -154,7 +158,10 @@ def read_root():
             "chat_webhook": "/feishu/chat/{agent_id}-{auth_key}-{auth_secret}/{app_id}-{app_secret}",
             "approval_callback": "/feishu/approval",
             "scheduler_status": "/feishu/schedule/status",
-            "scheduler_jobs": "/feishu/schedule/jobs"
+            "scheduler_jobs": "/feishu/schedule/jobs",
+            "scheduler_history": "/feishu/schedule/history",
+            "api_calls": "/feishu/schedule/api-calls",
+            "labor_report": "/feishu/labor/report?start=YYYY-MM-DD&end=YYYY-MM-DD"
         },
         "features": [
             "完全动态配置，无需配置文件",
@@ -9,6 +9,9 @@ from .labor_hour import (
     LaborHourPublisher,
     LaborHourService,
     LaborHourManager,
+    LaborHourTeamRunner,
+    LaborHourRegistry,
+    labor_hour_registry,
     run_labor_hour_check_from_config
 )
 
@@ -29,6 +32,9 @@ __all__ = [
     'LaborHourPublisher', 
     'LaborHourService',
     'LaborHourManager',
+    'LaborHourTeamRunner',
+    'LaborHourRegistry',
+    'labor_hour_registry',
     'run_labor_hour_check_from_config',
     
     # 审批服务
@@ -1,23 +1,27 @@
 """
 审批事件处理服务
 
-监听飞书审批事件，当审批通过时自动创建请假日历
+监听飞书审批事件：
+- 当审批通过时自动创建请假日历
+- 同步写入本地请假数据（请假索引的数据源），撤销/拒绝等状态变化时从索引中移除
 """
 
 import json
 import yaml
-import requests
 from datetime import datetime
 from typing import Dict, Any, Optional
 import pytz
 
 from src.utils.feishu.client import FeishuClient
+from src.utils.feishu.approval_cache import approval_cache as default_approval_cache, parse_approval_detail
+from src.utils.feishu.compliance_store import compliance_store as default_compliance_store
 
 
 class ApprovalService:
     """审批服务 - 处理审批事件并创建请假日历"""
     
-    def __init__(self, app_id: str, app_secret: str, leave_approval_codes: list = None):
+    def __init__(self, app_id: str, app_secret: str, leave_approval_codes: list = None, approval_cache=None,
+                 compliance_store=None):
         """
         初始化审批服务
         
@@ -25,10 +29,14 @@ class ApprovalService:
             app_id: 飞书应用ID
             app_secret: 飞书应用密钥
             leave_approval_codes: 请假审批定义编码白名单
+            approval_cache: 本地请假数据（可选），默认使用全局 ApprovalCache
+            compliance_store: 工时日结果存储（可选），请假变化时标记相关日期需要重新计算
         """
         self.app_id = app_id
         self.app_secret = app_secret
         self.client = FeishuClient(app_id=app_id, app_secret=app_secret)
+        self.approval_cache = approval_cache or default_approval_cache
+        self.compliance_store = compliance_store or default_compliance_store
         
         # 请假审批白名单
         self.leave_approval_codes = leave_approval_codes or [
@@ -145,6 +153,9 @@ class ApprovalService:
                 print(f"⚠️ 请假信息不完整")
                 return {"status": "error", "message": "请假信息不完整"}
             
+            # 写入本地请假数据
+            self._record_leave(approval_code, instance_code, open_id, leave_start_time, leave_end_time, leave_type)
+            
             # 创建请假日历
             calendar_result = self._create_timeoff_event(
                 user_id=target_user_id,
@@ -233,6 +244,9 @@ class ApprovalService:
                 print(f"⚠️ 请假信息不完整")
                 return {"status": "error", "message": "请假信息不完整"}
             
+            # 写入本地请假数据
+            self._record_leave(approval_code, instance_code, open_id, leave_start_time, leave_end_time, leave_type)
+            
             # 创建请假日历
             calendar_result = self._create_timeoff_event(
                 user_id=target_user_id,
@@ -297,6 +311,11 @@ class ApprovalService:
                 print(f"⚠️ 实例编码为空")
                 return {"status": "error", "message": "实例编码为空"}
             
+            # 从本地请假数据中移除
+            self._mark_leave_days_dirty(self.approval_cache.get(instance_code))
+            self.approval_cache.update_status(instance_code, 'REVERTED', approval_code, self.app_id)
+            print(f"   已从请假索引中移除: {instance_code}")
+            
             # 删除请假日历（根据 instance_code 查找并删除）
             delete_result = self._delete_timeoff_event_by_instance(instance_code)
             
@@ -331,6 +350,13 @@ class ApprovalService:
             # 获取审批状态
             status = event.get('status')
             
+            # 请假审批的其他状态变化（撤回、拒绝、删除等）同步到本地请假数据
+            leave_code = event.get('approval_code', '')
+            leave_instance = event.get('instance_code', '')
+            if status != 'APPROVED' and leave_instance and leave_code in self.leave_approval_codes:
+                self._mark_leave_days_dirty(self.approval_cache.get(leave_instance))
+                self.approval_cache.update_status(leave_instance, status, leave_code, self.app_id)
+            
             # 只处理审批通过的情况
             if status != 'APPROVED':
                 print(f"⏭️ 审批状态为 {status}，跳过处理")
@@ -364,6 +390,14 @@ class ApprovalService:
             if not approval_detail:
                 return {"status": "error", "message": "无法获取审批详情"}
             
+            # 写入本地请假数据（只包含请假控件的审批会产生请假区间）
+            leave_detail = parse_approval_detail(instance_code, approval_detail)
+            if leave_detail['intervals']:
+                leave_detail['approval_code'] = leave_detail['approval_code'] or approval_code
+                leave_detail['app_id'] = self.app_id
+                self.approval_cache.put(leave_detail)
+                self._mark_leave_days_dirty(leave_detail)
+            
             # 提取请假信息
             leave_info = self._extract_leave_info(approval_detail)
             
@@ -411,14 +445,14 @@ class ApprovalService:
         try:
             token = self.client.get_access_token()
             
-            url = f"https://open.feishu.cn/open-apis/approval/v4/instances/{instance_code}"
+            url = f"{self.client.base_url}/approval/v4/instances/{instance_code}"
             
             headers = {
                 "Authorization": f"Bearer {token}",
                 "Content-Type": "application/json"
             }
             
-            response = requests.get(url, headers=headers)
+            response = self.client.session.get(url, headers=headers)
             result = response.json()
             
             if result.get('code') == 0:
@@ -500,6 +534,84 @@ class ApprovalService:
             print(f"❌ 提取请假信息失败: {e}")
             return None
     
+    def _record_leave(self, approval_code: str, instance_code: str, open_id: str,
+                      start_time: str, end_time: str, leave_type: str):
+        """
+        将已通过的请假写入本地请假数据（请假索引的数据源）
+        
+        Args:
+            approval_code: 审批定义编码
+            instance_code: 审批实例编码
+            open_id: 申请人 open_id（属于本审批应用）
+            start_time: 请假开始时间 (YYYY-MM-DD HH:MM:SS 或时间戳)
+            end_time: 请假结束时间
+            leave_type: 请假类型
+        """
+        if not instance_code:
+            return
+        
+        try:
+            start = self._to_local_iso(start_time)
+            end = self._to_local_iso(end_time)
+            
+            detail = {
+                'instance_code': instance_code,
+                'approval_code': approval_code,
+                'status': 'APPROVED',
+                'open_id': open_id,
+                'intervals': [{'start': start, 'end': end, 'name': leave_type}],
+                'app_id': self.app_id
+            }
+            self.approval_cache.put(detail)
+            self._mark_leave_days_dirty(detail)
+            print(f"   已写入请假索引: {instance_code}")
+        except Exception as e:
+            # 写入失败不影响日历创建，轮询同步会补齐
+            print(f"⚠️ 写入请假索引失败: {e}")
+    
+    def _mark_leave_days_dirty(self, detail: Optional[Dict[str, Any]]):
+        """
+        请假变化后，将请假日期的工时日结果标记为需要重新计算
+        
+        Args:
+            detail: 审批详情（parse_approval_detail 格式），为 None 时忽略
+        """
+        if not detail:
+            return
+        
+        try:
+            for interval in detail.get('intervals', []):
+                count = self.compliance_store.mark_dirty(interval['start'][:10], interval['end'][:10])
+                if count:
+                    print(f"   已标记 {count} 条工时日结果需要重新计算: {interval['start'][:10]} ~ {interval['end'][:10]}")
+        except Exception as e:
+            print(f"⚠️ 标记工时日结果失败: {e}")
+    
+    def _to_local_iso(self, time_str: str) -> str:
+        """
+        转换事件中的时间为本地时间字符串 YYYY-MM-DDTHH:MM:SS（与审批详情解析结果格式一致）
+        
+        Args:
+            time_str: 时间字符串 (YYYY-MM-DD HH:MM:SS、ISO 格式或秒/毫秒时间戳)
+        
+        Returns:
+            本地时间字符串
+        
+        Raises:
+            ValueError: 无法解析的时间格式
+        """
+        time_str = str(time_str)
+        if time_str.isdigit():
+            timestamp = int(time_str)
+            if timestamp > 10 ** 12:
+                timestamp //= 1000
+            dt = datetime.fromtimestamp(timestamp, pytz.timezone('Asia/Shanghai'))
+            return dt.strftime('%Y-%m-%dT%H:%M:%S')
+        
+        value = time_str[:19].replace(' ', 'T')
+        datetime.strptime(value[:10], '%Y-%m-%d')
+        return value
+    
     def _parse_leave_type(self, leave_name: str, i18n_resources) -> str:
         """
         解析请假类型（从国际化资源中获取）
@@ -573,7 +685,7 @@ class ApprovalService:
         try:
             token = self.client.get_access_token()
             
-            url = "https://open.feishu.cn/open-apis/calendar/v4/timeoff_events"
+            url = f"{self.client.base_url}/calendar/v4/timeoff_events"
             
             headers = {
                 "Authorization": f"Bearer {token}",
@@ -605,7 +717,7 @@ class ApprovalService:
             if instance_code:
                 print(f"   实例: {instance_code}")
             
-            response = requests.post(
+            response = self.client.session.post(
                 f"{url}?user_id_type={user_id_type}",
                 headers=headers,
                 json=data
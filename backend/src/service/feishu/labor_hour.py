@@ -5,20 +5,33 @@
 1. LaborHourChecker - 工时检查器（检查工时填写情况）
 2. LaborHourPublisher - 工时发布器（发送卡片消息）
 3. LaborHourService - 工时服务（协调检查和发布）
-4. run_labor_hour_check_from_config - 从配置文件运行检查
+4. LaborHourTeamRunner - 多团队运行器（团队间共享缓存，并发检查）
+5. LaborHourRegistry - 运行器注册表（按配置文件缓存，修改后自动重建）
+6. run_labor_hour_check_from_config - 从配置文件运行检查
 """
 
 import os
 import yaml
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 import pytz
-from collections import defaultdict
 
 from src.utils.feishu.client import FeishuClient
 from src.utils.feishu.bitable import BitableAPI
 from src.utils.feishu.message import MessageAPI
+from src.utils.feishu.approval_sync import ApprovalSync
+from src.utils.feishu.attendance_leave import AttendanceLeave
+from src.utils.feishu.api_metrics import api_metrics
+from src.utils.feishu.attendance_matrix import AttendanceMatrix, compare_teams
+from src.utils.feishu.compliance_store import ComplianceStore, compliance_store as default_compliance_store
+from src.utils.feishu.leave_index import LeaveIndex
+from src.utils.job_dag import JobDAG
 from src.utils.logging import set_stage
+from src.utils.workday_calendar import workday_calendar
 from src.models import Stage
 
 
@@ -26,7 +39,10 @@ class LaborHourChecker:
     """工时填写检查器"""
     
     def __init__(self, app_id: str, app_secret: str, bitable_url: str, leave_approval_code: str = None, 
-                 chat_id: str = None, exclude_members: list = None, exceptions: dict = None):
+                 chat_id: str = None, exclude_members: list = None, exceptions: dict = None, leave_config: dict = None,
+                 feishu_client: FeishuClient = None, approval_sync: ApprovalSync = None,
+                 attendance_leave: AttendanceLeave = None, team: str = "默认团队", compliance_store: ComplianceStore = None,
+                 cache_config: dict = None):
         """
         初始化工时检查器
         
@@ -38,10 +54,19 @@ class LaborHourChecker:
             chat_id: 群聊ID（可选，用于获取群成员列表）
             exclude_members: 排除成员列表（可选，这些成员完全不参与工时检查）
             exceptions: 例外日期配置，格式: {"姓名": ["星期一", "星期二"]}
+            leave_config: 请假检测配置（可选），对应 labor_hour.yaml 的 leave 配置段
+            feishu_client: 共享的飞书客户端（可选），多个团队共用访问令牌和连接池
+            approval_sync: 共享的审批同步器（可选）
+            attendance_leave: 共享的考勤请假查询（可选）
+            team: 团队名称，日结果按团队存储
+            compliance_store: 日结果存储（可选），默认使用全局 ComplianceStore
+            cache_config: 缓存配置（可选），对应 labor_hour.yaml 的 cache 配置段（roster_ttl、records_ttl）
         """
         # 初始化日志
         self.log = set_stage(Stage.LABOR_CHECK)
         
+        self.team = team
+        self.compliance_store = compliance_store or default_compliance_store
         self.app_id = app_id
         self.app_secret = app_secret
         self.bitable_url = bitable_url
@@ -49,15 +74,31 @@ class LaborHourChecker:
         self.chat_id = chat_id
         self.exclude_members = set(exclude_members or [])
         self.exceptions = exceptions or {}
+        self.leave_config = leave_config or {}
+        self.cache_config = cache_config or {}
+        
+        # 群成员缓存（预热时刷新，有效期内检查直接使用）
+        self.roster_ttl = self.cache_config.get('roster_ttl', 900)
+        self._roster: Optional[List[Dict[str, Any]]] = None
+        self._roster_at = 0.0
         
         # 初始化飞书客户端
-        self.feishu_client = FeishuClient(app_id=app_id, app_secret=app_secret)
+        self.feishu_client = feishu_client or FeishuClient(app_id=app_id, app_secret=app_secret)
         
         # 初始化Bitable API
         self.bitable = BitableAPI(
             client=self.feishu_client, 
             url=bitable_url,
-            leave_approval_code=leave_approval_code
+            leave_approval_code=leave_approval_code,
+            approval_concurrency=self.leave_config.get('concurrency', 8),
+            approval_rate_limit=self.leave_config.get('rate_limit', 20),
+            approval_lookback_days=self.leave_config.get('lookback_days', 30),
+            approval_sync_interval=self.leave_config.get('sync_interval', 3600),
+            leave_provider=self.leave_config.get('provider', 'approval'),
+            approval_sync=approval_sync,
+            attendance_leave=attendance_leave,
+            records_ttl=self.cache_config.get('records_ttl', 1800),
+            on_records_changed=self._on_records_changed
         )
         
         # 初始化Message API（用于获取群成员）
@@ -65,14 +106,23 @@ class LaborHourChecker:
         
         self.log.success("工时检查器初始化成功")
     
+    def _on_records_changed(self, dates: Set[str]):
+        """多维表格记录变化（补填、修改、删除）时将对应日期的已存储结果标记为 dirty"""
+        for date_str in dates:
+            self.compliance_store.mark_dirty(date_str, team=self.team)
+        self.log.debug(f"  记录变化，标记 {len(dates)} 天的日结果待重算")
+    
     def get_bitable_url(self) -> str:
         """获取多维表格URL"""
         return self.bitable_url
     
-    def get_chat_members_info(self) -> List[Dict[str, str]]:
+    def get_chat_members_info(self, refresh: bool = False) -> List[Dict[str, str]]:
         """
         从群聊获取成员信息列表（包含姓名和open_id）
         
+        Args:
+            refresh: 忽略缓存重新拉取群成员（预热时使用）
+        
         Returns:
             成员信息列表，格式: [{"name": "张三", "open_id": "ou_xxx"}, ...]
         """
@@ -81,8 +131,13 @@ class LaborHourChecker:
             return []
         
         try:
-            # 使用 MessageAPI 获取所有群成员
-            members = self.message_api.get_all_chat_members(self.chat_id)
+            # 使用 MessageAPI 获取所有群成员（roster_ttl 内复用上次拉取的结果）
+            if refresh or self._roster is None or time.time() - self._roster_at >= self.roster_ttl:
+                members = self.message_api.get_all_chat_members(self.chat_id)
+                if self.roster_ttl > 0 and members:
+                    self._roster, self._roster_at = members, time.time()
+            else:
+                members = self._roster
             member_info = []
             excluded_count = 0
             
@@ -106,8 +161,43 @@ class LaborHourChecker:
             self.log.error(f"获取群成员列表失败: {e}")
             return []
     
+    def warm_up(self, date_str: str = None) -> Dict[str, Any]:
+        """
+        预热检查使用的缓存（在定时检查前执行，检查时基本只读缓存）
+        
+        1. 刷新即将过期的访问令牌
+        2. 重新拉取群成员
+        3. 全量同步多维表格记录快照
+        4. 增量同步请假数据并构建请假索引
+        
+        Args:
+            date_str: 即将检查的日期，格式 YYYY-MM-DD，默认为今天
+        
+        Returns:
+            {"status": "success", "date": str, "members": int, "records": int, "leave_users": int}
+        """
+        if not date_str:
+            date_str = datetime.now(pytz.timezone('Asia/Shanghai')).strftime('%Y-%m-%d')
+        
+        # 检查在预热后几分钟内执行，提前刷新剩余有效期不足30分钟的令牌
+        self.feishu_client.get_access_token(min_ttl=1800)
+        member_info = self.get_chat_members_info(refresh=True)
+        records = self.bitable.sync_records(full=True)
+        leave_index = self.bitable.get_leave_index(date_str, date_str,
+                                                   open_ids=[m['open_id'] for m in member_info], refresh=True)
+        
+        self.log.success(f"缓存预热完成：{len(member_info)} 名成员，{len(records)} 条记录")
+        return {
+            "status": "success",
+            "date": date_str,
+            "members": len(member_info),
+            "records": len(records),
+            "leave_users": len(leave_index)
+        }
+    
     def check_users_filled(self, date_str: str = None, user_names: List[str] = None, 
-                          user_id_map: Dict[str, str] = None) -> Dict[str, Any]:
+                          user_id_map: Dict[str, str] = None, leave_index: LeaveIndex = None,
+                          all_records: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         检查用户填写情况
         
@@ -115,6 +205,8 @@ class LaborHourChecker:
             date_str: 检查日期，格式 YYYY-MM-DD，默认为今天
             user_names: 人员名单列表（可选），如果不提供则从群成员列表获取
             user_id_map: 姓名到open_id的映射（可选），用于@功能和请假检测
+            leave_index: 预先构建的请假区间索引（可选），不提供则按日期查询
+            all_records: 已同步的多维表格记录（可选，sync_records 的返回值），不提供则同步记录快照
         
         Returns:
             检查结果字典
@@ -154,9 +246,14 @@ class LaborHourChecker:
             user_names=user_names,
             date_str=date_str,
             exceptions=self.exceptions,
-            external_user_id_map=user_id_map  # 传递外部的user_id映射
+            external_user_id_map=user_id_map,  # 传递外部的user_id映射
+            leave_index=leave_index,
+            all_records=all_records
         )
         
+        # 保存日结果，供月度/季度总结复用
+        self.compliance_store.put_day(self.team, date_str, result)
+        
         return result
     
     def check_month_summary(self, month: int = None, user_names: List[str] = None) -> Dict[str, Any]:
@@ -205,7 +302,31 @@ class LaborHourChecker:
         
         # 固定为上个月的28日
         start_date = datetime(start_year, start_month, 28, tzinfo=tz)
-        start_date_str = start_date.strftime('%Y-%m-%d')
+        
+        return self.summarize_period(start_date, end_date, user_names)
+    
+    def summarize_period(self, start_date, end_date, user_names: List[str] = None) -> Dict[str, Any]:
+        """
+        汇总日期范围内的工时填写情况（月度、季度、年度总结共用）
+        
+        已定型的日期（检查时间晚于补填窗口，见 _settled_at）直接读取日结果存储，
+        缺失、未定型、被标记为 dirty 或请假状态与当前请假索引不一致的日期重新计算，结果写回存储
+        
+        Args:
+            start_date: 开始日期（date / datetime）
+            end_date: 结束日期（date / datetime），晚于今天时截止到今天
+            user_names: 人员名单列表（可选），如果不提供则从群成员列表获取；
+                        提供时按群成员和多维表格人员字段解析 open_id（用于请假检测和@人）
+        
+        Returns:
+            总结字典，包含每天的填写情况和统计；没有人员名单时返回 None
+        """
+        tz = pytz.timezone('Asia/Shanghai')
+        today = datetime.now(tz).date()
+        start_day = start_date.date() if isinstance(start_date, datetime) else start_date
+        end_day = min(end_date.date() if isinstance(end_date, datetime) else end_date, today)
+        start_date_str = start_day.strftime('%Y-%m-%d')
+        end_date_str = end_day.strftime('%Y-%m-%d')
         
         # 获取人员名单和user_id映射
         user_id_map = {}
@@ -222,54 +343,70 @@ class LaborHourChecker:
             self.log.error("没有可统计的人员名单")
             return None
         
+        all_records = None  # 需要时才同步一次记录，各天共用
+        if not user_id_map:
+            all_records = self.bitable.sync_records()
+            user_id_map = self.resolve_user_ids(user_names, all_records)
+        
         self.log.info(f"正在检查 {start_date_str} 至 {end_date_str} 的工时填写情况...")
         
         # 检查每一天的填写情况
         daily_results = {}
-        user_fill_count = defaultdict(int)  # 每个人填写的天数
         user_info_map = {}  # 存储用户信息（用于@人）
-        total_work_days = 0
-        
-        # 遍历日期范围内的每一天
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            
-            result = self.bitable.check_users_filled(
-                user_names=user_names,
-                date_str=date_str,
-                exceptions=self.exceptions,
-                external_user_id_map=user_id_map  # 传递user_id映射
-            )
-            daily_results[date_str] = result
+        total_work_days = workday_calendar.count_workdays(start_day, end_day)
+        
+        # 整个统计周期只构建一次请假索引，逐日检查时共享
+        leave_index = self.bitable.get_leave_index(start_date_str, end_date_str, open_ids=list(user_id_map.values()))
+        
+        # 已存储的日结果（补填窗口结束前检查的结果仍可能过时，重新计算）
+        stored_entries = self.compliance_store.get_day_entries(self.team, start_date_str, end_date_str)
+        recomputed = 0
+        
+        # 只遍历日期范围内的工作日（节假日由工作日日历预先排除）
+        for work_day in workday_calendar.workdays(start_day, end_day):
+            date_str = work_day.strftime('%Y-%m-%d')
             
-            # 如果不是节假日，统计填写情况
-            if not result.get('is_holiday'):
-                total_work_days += 1
-                
-                # 统计每个人的填写天数
-                for name in result.get('filled', []):
-                    user_fill_count[name] += 1
-                    
-                # 收集用户信息（为了后续@人）
-                for user_info in result.get('not_filled_with_id', []):
-                    name = user_info['name']
-                    user_id = user_info.get('user_id', '')
-                    if name not in user_info_map and user_id:
-                        user_info_map[name] = user_id
+            result = None
+            entry = stored_entries.get(date_str)
+            if entry and entry['checked_at'] >= self._settled_at(work_day) \
+                    and not self._leave_changed(entry['result'], work_day, leave_index, user_id_map):
+                result = entry['result']
+            if result is None:
+                if all_records is None:
+                    all_records = self.bitable.sync_records()
+                result = self.bitable.check_users_filled(
+                    user_names=user_names,
+                    date_str=date_str,
+                    exceptions=self.exceptions,
+                    skip_holiday_check=True,
+                    external_user_id_map=user_id_map,  # 传递user_id映射
+                    leave_index=leave_index,
+                    all_records=all_records
+                )
+                self.compliance_store.put_day(self.team, date_str, result)
+                recomputed += 1
+            daily_results[date_str] = result
             
-            current_date += timedelta(days=1)
+            # 收集用户信息（为了后续@人）
+            for user_info in result.get('not_filled_with_id', []):
+                name = user_info['name']
+                user_id = user_info.get('user_id', '')
+                if name not in user_info_map and user_id:
+                    user_info_map[name] = user_id
         
         # 如果user_info_map为空，使用传入的user_id_map
         if not user_info_map and user_id_map:
             user_info_map = user_id_map
         
-        # 计算统计数据
-        all_users = set()
-        for result in daily_results.values():
-            if not result.get('is_holiday'):
-                all_users.update(result.get('filled', []))
-                all_users.update([u['name'] for u in result.get('not_filled_with_id', [])])
+        # 人员 × 工作日状态矩阵（复用同一个请假索引标记请假，不额外调用接口）
+        matrix = AttendanceMatrix.from_daily_results(daily_results, leave_index=leave_index, user_id_map=user_id_map)
+        totals = matrix.totals()
+        
+        # 每人在统计周期内请假的工作日数
+        user_leave_days = {name: counts['leave_days'] for name, counts in totals.items() if counts['leave_days']}
+        
+        # 需要填写的人员：至少有一天已填写或未填写
+        all_users = {name for name, counts in totals.items() if counts['filled'] or counts['missing']}
         
         # 分类用户：全勤、部分填写、完全未填写
         perfect_users = []  # 全勤
@@ -277,11 +414,12 @@ class LaborHourChecker:
         never_filled_users = []  # 完全未填写
         
         for user in all_users:
-            fill_count = user_fill_count.get(user, 0)
+            fill_count = totals[user]['filled']
             if fill_count == total_work_days:
                 perfect_users.append(user)
             elif fill_count > 0:
-                partial_users.append({'name': user, 'days': fill_count, 'total': total_work_days})
+                partial_users.append({'name': user, 'days': fill_count, 'total': total_work_days,
+                                      'leave_days': user_leave_days.get(user, 0)})
             else:
                 never_filled_users.append(user)
         
@@ -295,16 +433,78 @@ class LaborHourChecker:
             'partial_users': sorted(partial_users, key=lambda x: x['days'], reverse=True),
             'never_filled_users': sorted(never_filled_users),
             'user_info_map': user_info_map,  # 用于@功能的用户ID映射
+            'user_leave_days': user_leave_days,  # 每人请假的工作日数
+            'analytics': matrix.analytics(),  # 整体/按星期填写率、最长连续未填写
             'total_users': len(all_users),
             'perfect_count': len(perfect_users),
             'partial_count': len(partial_users),
             'never_filled_count': len(never_filled_users)
         }
         
-        self.log.success(f"月总结完成: {total_work_days} 个工作日, {len(all_users)} 人, 全勤 {len(perfect_users)} 人")
+        self.log.success(
+            f"总结完成: {total_work_days} 个工作日（重新计算 {recomputed} 天）, "
+            f"{len(all_users)} 人, 全勤 {len(perfect_users)} 人"
+        )
         
         return summary
 
+    def resolve_user_ids(self, user_names: List[str], all_records: List[Dict[str, Any]] = None) -> Dict[str, str]:
+        """
+        为指定的人员名单解析 open_id：先查群成员，找不到的再从多维表格记录的人员字段中查找
+        
+        Args:
+            user_names: 人员名单
+            all_records: 已同步的多维表格记录（可选），不提供则同步记录快照
+        
+        Returns:
+            {姓名: open_id}，只包含能解析到的人员
+        """
+        names = set(user_names)
+        user_id_map = {}
+        if self.chat_id:
+            user_id_map = {m['name']: m['open_id'] for m in self.get_chat_members_info() or [] if m['name'] in names}
+        
+        missing = names - set(user_id_map)
+        if missing:
+            if all_records is None:
+                all_records = self.bitable.sync_records()
+            from_records = self.bitable.build_user_id_map(all_records)
+            user_id_map.update({name: from_records[name] for name in missing if name in from_records})
+        
+        unresolved = names - set(user_id_map)
+        if unresolved:
+            self.log.warning(f"{len(unresolved)} 人无法解析 open_id，请假检测和@人不生效: {', '.join(sorted(unresolved))}")
+        return user_id_map
+    
+    def _settled_at(self, work_day) -> float:
+        """
+        某个工作日的结果定型时间（时间戳）：之后第 settle_workdays 个工作日结束时
+        
+        补填提醒在下一个工作日发出，补填窗口内检查的结果可能不包含之后补填的记录
+        """
+        tz = pytz.timezone('Asia/Shanghai')
+        settle_workdays = self.cache_config.get('settle_workdays', 2)
+        day = work_day
+        while settle_workdays > 0:
+            day += timedelta(days=1)
+            if workday_calendar.is_workday(day):
+                settle_workdays -= 1
+        return tz.localize(datetime.combine(day + timedelta(days=1), datetime.min.time())).timestamp()
+    
+    @staticmethod
+    def _leave_changed(result: Dict[str, Any], work_day, leave_index: LeaveIndex,
+                       user_id_map: Dict[str, str]) -> bool:
+        """已存储结果的请假状态与当前请假索引是否不一致（新请假或撤销的请假，不调用接口）"""
+        on_leave_now = leave_index.users_on(work_day)
+        for user_info in result.get('not_filled_with_id', []):
+            if user_info.get('user_id') in on_leave_now:
+                return True
+        for name in result.get('on_leave', []):
+            open_id = user_id_map.get(name)
+            if open_id and open_id not in on_leave_now:
+                return True
+        return False
+
 class LaborHourPublisher:
     """工时检查结果发布器 - 通过飞书应用发送到群组"""
     
@@ -531,7 +731,11 @@ class LaborHourPublisher:
             elements.append({"tag": "hr"})
         
         # 缺少填写人员（部分填写 + 完全未填写，全部@）
-        incomplete_users = partial_users + [{'name': name, 'days': 0, 'total': total_work_days} for name in never_filled_users]
+        user_leave_days = summary.get('user_leave_days', {})
+        incomplete_users = partial_users + [
+            {'name': name, 'days': 0, 'total': total_work_days, 'leave_days': user_leave_days.get(name, 0)}
+            for name in never_filled_users
+        ]
         if incomplete_users:
             elements.append({
                 "tag": "div",
@@ -548,10 +752,14 @@ class LaborHourPublisher:
                 total = user_info['total']
                 user_id = user_info_map.get(name, '')
                 
+                # 有请假时附带请假天数
+                leave_days = user_info.get('leave_days', 0)
+                stats = f"{days}/{total}, 请假{leave_days}天" if leave_days else f"{days}/{total}"
+                
                 if user_id:
-                    incomplete_content += f"<at id={user_id}></at>({days}/{total})  "
+                    incomplete_content += f"<at id={user_id}></at>({stats})  "
                 else:
-                    incomplete_content += f"{name}({days}/{total})  "
+                    incomplete_content += f"{name}({stats})  "
             
             elements.append({
                 "tag": "div",
@@ -642,7 +850,9 @@ class LaborHourService:
     """工时检查服务 - 整合检查和发布功能"""
     
     def __init__(self, app_id: str, app_secret: str, bitable_url: str, 
-                 chat_id: str, leave_approval_code: str = None, exclude_members: list = None, exceptions: dict = None):
+                 chat_id: str, leave_approval_code: str = None, exclude_members: list = None, exceptions: dict = None,
+                 leave_config: dict = None, feishu_client: FeishuClient = None, approval_sync: ApprovalSync = None,
+                 attendance_leave: AttendanceLeave = None, team: str = "默认团队", cache_config: dict = None):
         """
         初始化工时检查服务
         
@@ -654,14 +864,23 @@ class LaborHourService:
             leave_approval_code: 请假审批定义编码（可选，用于自动检测请假状态）
             exclude_members: 排除成员列表（可选，这些成员完全不参与工时检查）
             exceptions: 例外日期配置，格式: {"姓名": ["星期一", "星期二"]}
+            leave_config: 请假检测配置（可选），对应 labor_hour.yaml 的 leave 配置段
+            feishu_client: 共享的飞书客户端（可选），检查和发布共用
+            approval_sync: 共享的审批同步器（可选）
+            attendance_leave: 共享的考勤请假查询（可选）
+            team: 团队名称
+            cache_config: 缓存配置（可选），对应 labor_hour.yaml 的 cache 配置段
         """
         # 初始化日志
         self.log = set_stage(Stage.LABOR_CHECK)
         
-        # 初始化飞书客户端
-        feishu_client = FeishuClient(app_id, app_secret)
+        # 初始化飞书客户端（检查和发布共用）
+        feishu_client = feishu_client or FeishuClient(app_id, app_secret)
         
-        self.checker = LaborHourChecker(app_id, app_secret, bitable_url, leave_approval_code, chat_id, exclude_members, exceptions)
+        self.checker = LaborHourChecker(app_id, app_secret, bitable_url, leave_approval_code, chat_id, exclude_members, exceptions,
+                                        leave_config=leave_config, feishu_client=feishu_client,
+                                        approval_sync=approval_sync, attendance_leave=attendance_leave, team=team,
+                                        cache_config=cache_config)
         self.publisher = LaborHourPublisher(feishu_client, chat_id)
         
         self.log.success(f"工时检查服务初始化完成")
@@ -691,46 +910,36 @@ class LaborHourService:
             # 1. 检查工时填写情况
             result = self.checker.check_users_filled(date_str)
             
-            # 2. 打印结果
-            if result.get('is_holiday'):
-                self.log.info(f"\n{date_str} 是节假日，无需检查工时填写，跳过发送")
-                self.log.info(f"\n工时检查完成")
-                self.log.info("=" * 80)
-                
-                return {
-                    "status": "success",
-                    "date": date_str,
-                    "result": result,
-                    "sent": False,
-                    "reason": "holiday"
-                }
+            # 2. 发布结果
+            return self.publish_check_result(date_str, result)
             
-            self.log.info(f"\n检查结果:")
-            self.log.info(f"   应填写人数: {len(result['filled']) + len(result['not_filled'])}")
-            self.log.info(f"   已填写: {len(result['filled'])} 人")
-            self.log.info(f"   未填写: {len(result['not_filled'])} 人")
-            self.log.info(f"   填写率: {result['fill_rate']:.1%}")
-            
-            # 如果所有人都已填写，跳过发送
-            if not result.get('not_filled'):
-                self.log.info(f"\n所有人都已填写工时，跳过发送消息")
-                self.log.info(f"\n工时检查完成")
-                self.log.info("=" * 80)
-                
-                return {
-                    "status": "success",
-                    "date": date_str,
-                    "result": result,
-                    "sent": False,
-                    "reason": "all_filled"
-                }
-            
-            # 3. 发布到飞书群组
-            self.log.info(f"\n正在发送结果到飞书群组...")
-            bitable_url = self.checker.get_bitable_url()
-            self.log.info(f"   Bitable URL: {bitable_url}")
-            response = self.publisher.publish_check_result(result, date_str, bitable_url)
+        except Exception as e:
+            self.log.info(f"\n工时检查失败: {e}")
+            self.log.info("=" * 80)
+            import traceback
+            traceback.print_exc()
             
+            return {
+                "status": "error",
+                "date": date_str,
+                "message": str(e)
+            }
+    
+    def publish_check_result(self, date_str: str, result: Dict[str, Any],
+                             cancel: threading.Event = None) -> Dict[str, Any]:
+        """
+        打印检查结果并发布到飞书群组（节假日或所有人都已填写时跳过发送）
+        
+        Args:
+            date_str: 检查日期，格式 YYYY-MM-DD
+            result: check_users_filled 的检查结果
+            cancel: 取消事件（可选），发布阶段已被放弃（超时）时不再发送，避免超时后或重试时重复发卡片
+        
+        Returns:
+            {"status": "success", "date", "result", "sent", "reason"(未发送时)}
+        """
+        if result.get('is_holiday'):
+            self.log.info(f"\n{date_str} 是节假日，无需检查工时填写，跳过发送")
             self.log.info(f"\n工时检查完成")
             self.log.info("=" * 80)
             
@@ -738,20 +947,57 @@ class LaborHourService:
                 "status": "success",
                 "date": date_str,
                 "result": result,
-                "sent": response and response.get('code') == 0
+                "sent": False,
+                "reason": "holiday"
             }
-            
-        except Exception as e:
-            self.log.info(f"\n工时检查失败: {e}")
+        
+        self.log.info(f"\n检查结果:")
+        self.log.info(f"   应填写人数: {len(result['filled']) + len(result['not_filled'])}")
+        self.log.info(f"   已填写: {len(result['filled'])} 人")
+        self.log.info(f"   未填写: {len(result['not_filled'])} 人")
+        self.log.info(f"   填写率: {result['fill_rate']:.1%}")
+        
+        # 如果所有人都已填写，跳过发送
+        if not result.get('not_filled'):
+            self.log.info(f"\n所有人都已填写工时，跳过发送消息")
+            self.log.info(f"\n工时检查完成")
             self.log.info("=" * 80)
-            import traceback
-            traceback.print_exc()
             
+            return {
+                "status": "success",
+                "date": date_str,
+                "result": result,
+                "sent": False,
+                "reason": "all_filled"
+            }
+        
+        # 阶段已被放弃，不再发送
+        if cancel is not None and cancel.is_set():
+            self.log.warning(f"{date_str} 发布阶段已被放弃，跳过发送")
             return {
                 "status": "error",
                 "date": date_str,
-                "message": str(e)
+                "result": result,
+                "sent": False,
+                "reason": "cancelled",
+                "message": "发布阶段已被放弃"
             }
+        
+        # 发布到飞书群组
+        self.log.info(f"\n正在发送结果到飞书群组...")
+        bitable_url = self.checker.get_bitable_url()
+        self.log.info(f"   Bitable URL: {bitable_url}")
+        response = self.publisher.publish_check_result(result, date_str, bitable_url)
+        
+        self.log.info(f"\n工时检查完成")
+        self.log.info("=" * 80)
+        
+        return {
+            "status": "success",
+            "date": date_str,
+            "result": result,
+            "sent": response and response.get('code') == 0
+        }
     
     def run_month_summary_and_publish(self, month: int = None, mention_users: List[str] = None) -> Dict[str, Any]:
         """
@@ -809,76 +1055,515 @@ class LaborHourService:
             }
 
 
-def run_labor_hour_check_from_config(date_str: str = None):
+def load_team_configs(config: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    从配置文件读取参数并运行工时检查
+    解析团队配置
+    
+    配置了 teams 列表时每一项为一个团队（结构与顶层的 bitable / group_chat 相同），
+    否则使用顶层的 bitable / group_chat 作为单个团队
     
     Args:
-        date_str: 检查日期，格式 YYYY-MM-DD，默认为今天
+        config: labor_hour.yaml 的配置内容
     
-    配置文件路径: backend/src/config/labor_hour.yaml
+    Returns:
+        团队配置列表: [{"name", "bitable_url", "chat_id", "exclude_members", "exceptions", "mention_users"}, ...]
     """
-    log = set_stage(Stage.CONFIG)
+    team_items = config.get('teams') or [{
+        'name': '默认团队',
+        'bitable': config.get('bitable', {}),
+        'group_chat': config.get('group_chat', {})
+    }]
+    
+    teams = []
+    for index, item in enumerate(team_items):
+        group_chat = item.get('group_chat', {}) or {}
+        teams.append({
+            'name': item.get('name') or f"团队{index + 1}",
+            'bitable_url': (item.get('bitable', {}) or {}).get('url'),
+            'chat_id': group_chat.get('chat_id'),
+            'exclude_members': group_chat.get('exclude_members', []) or [],
+            'exceptions': group_chat.get('exceptions', {}) or {},
+            'mention_users': item.get('mention_users')
+        })
+    return teams
+
+
+def load_leave_approval_code(config_dir: str) -> Optional[str]:
+    """
+    从 approval.yaml 读取请假审批编码（取第一个）
+    
+    Args:
+        config_dir: 配置文件目录
     
+    Returns:
+        请假审批编码，未配置或读取失败时返回 None
+    """
+    log = set_stage(Stage.CONFIG)
     try:
-        # 读取配置文件
-        # 从 src/service/feishu/ 回到 src/config/
-        config_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
-            'config',
-            'labor_hour.yaml'
+        approval_config_path = os.path.join(config_dir, 'approval.yaml')
+        if os.path.exists(approval_config_path):
+            with open(approval_config_path, 'r', encoding='utf-8') as f:
+                approval_config = yaml.safe_load(f)
+                leave_codes = approval_config.get('approval_codes', {}).get('leave', [])
+                if leave_codes:
+                    return leave_codes[0]  # 取第一个请假审批编码
+    except Exception as e:
+        log.warning(f"读取 approval.yaml 失败: {e}，将不进行请假状态检测")
+    return None
+
+
+class LaborHourTeamRunner:
+    """多团队工时运行器 - 团队间共享飞书客户端、请假数据和工作日日历，有界并发执行"""
+    
+    # 工时检查各阶段的默认截止时间（秒），可由定时任务的 stage_deadlines 覆盖
+    CHECK_STAGE_DEADLINES = {
+        'roster': 60,
+        'records': 180,
+        'leave': 180,
+        'check': 120,
+        'publish': 60
+    }
+    
+    def __init__(self, config: Dict[str, Any], leave_approval_code: str = None):
+        """
+        初始化多团队运行器
+        
+        Args:
+            config: labor_hour.yaml 的配置内容
+            leave_approval_code: 请假审批定义编码（可选）
+        """
+        self.log = set_stage(Stage.LABOR_CHECK)
+        
+        self.config = config
+        self.leave_approval_code = leave_approval_code
+        self.app_id = config['feishu']['app_id']
+        self.app_secret = config['feishu']['app_secret']
+        self.leave_config = config.get('leave', {}) or {}
+        self.teams = load_team_configs(config)
+        self.concurrency = max(1, config.get('team_concurrency', 4))
+        self.team_spread = max(0, config.get('team_spread', 0) or 0)
+        
+        # 所有团队共享：访问令牌与连接池、审批同步（含本地请假数据）、考勤通讯录映射
+        self.feishu_client = FeishuClient(self.app_id, self.app_secret)
+        self.approval_sync = ApprovalSync(
+            self.feishu_client,
+            concurrency=self.leave_config.get('concurrency', 8),
+            rate_limit=self.leave_config.get('rate_limit', 20),
+            lookback_days=self.leave_config.get('lookback_days', 30),
+            sync_interval=self.leave_config.get('sync_interval', 3600)
         )
+        self.attendance_leave = AttendanceLeave(self.feishu_client)
         
-        log.info(f"正在加载配置文件: {config_path}")
+        # 团队服务缓存：服务只创建一次，多次运行之间复用
+        self._services: Dict[str, LaborHourService] = {}
+        self._services_lock = threading.Lock()
+    
+    def get_service(self, team: Dict[str, Any]) -> LaborHourService:
+        """获取团队的工时服务（首次使用时创建，之后复用）"""
+        with self._services_lock:
+            service = self._services.get(team['name'])
+            if service is None:
+                service = self.build_service(team)
+                self._services[team['name']] = service
+            return service
+    
+    def build_service(self, team: Dict[str, Any]) -> LaborHourService:
+        """创建团队的工时服务（使用共享的客户端和请假数据）"""
+        return LaborHourService(
+            app_id=self.app_id,
+            app_secret=self.app_secret,
+            bitable_url=team['bitable_url'],
+            chat_id=team['chat_id'],
+            leave_approval_code=self.leave_approval_code,
+            exclude_members=team['exclude_members'],
+            exceptions=team['exceptions'],
+            leave_config=self.leave_config,
+            feishu_client=self.feishu_client,
+            approval_sync=self.approval_sync,
+            attendance_leave=self.attendance_leave,
+            team=team['name'],
+            cache_config=self.config.get('cache')
+        )
+    
+    def _run_teams(self, action, teams: List[Dict[str, Any]] = None, tag: str = "labor",
+                   **context) -> Dict[str, Any]:
+        """
+        并发对每个团队执行 action(service, team)，汇总结果、耗时和飞书接口调用统计
         
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+        Args:
+            action: 对单个团队执行的函数
+            teams: 要执行的团队列表，默认所有团队
+            tag: 接口调用统计的运行标签（如 labor_check、month_summary）
+            **context: 接口调用统计的附加上下文（如检查日期、月份）
         
-        log.success("配置文件加载成功")
+        Returns:
+            {"status": "success" | "partial" | "error", "teams": [...], "elapsed": float, "api_calls": {...}}
+        """
+        def run_team(team):
+            start = time.perf_counter()
+            with api_metrics.track(tag, team=team['name'], **context) as team_run:
+                if not team['bitable_url'] or not team['chat_id']:
+                    result = {"status": "error", "message": "缺少 bitable.url 或 group_chat.chat_id"}
+                else:
+                    try:
+                        result = action(self.get_service(team), team)
+                    except Exception as e:
+                        self.log.exception(f"团队 {team['name']} 执行失败: {e}")
+                        result = {"status": "error", "message": str(e)}
+            result = dict(result or {"status": "error", "message": "无结果"})
+            result['team'] = team['name']
+            result['elapsed'] = round(time.perf_counter() - start, 3)
+            result['api_calls'] = team_run.calls
+            return result
         
-        # 提取配置
-        app_id = config['feishu']['app_id']
-        app_secret = config['feishu']['app_secret']
-        bitable_url = config['bitable']['url']
-        chat_id = config.get('group_chat', {}).get('chat_id')
-        exclude_members = config.get('group_chat', {}).get('exclude_members', [])
-        exceptions = config.get('group_chat', {}).get('exceptions', {})
+        teams = self.teams if teams is None else teams
+        start = time.perf_counter()
+        with api_metrics.track(tag, **context) as run:
+            max_workers = min(self.concurrency, len(teams))
+            if max_workers <= 1:
+                team_results = [run_team(team) for team in teams]
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="labor-team") as executor:
+                    team_results = list(executor.map(api_metrics.bind(run_team), teams))
+        elapsed = round(time.perf_counter() - start, 3)
+        
+        success_count = sum(1 for r in team_results if r.get('status') == 'success')
+        if success_count == len(team_results):
+            status = "success"
+        elif success_count:
+            status = "partial"
+        else:
+            status = "error"
         
-        if not chat_id:
-            log.error("配置文件中缺少 group_chat.chat_id")
-            return None
+        for r in team_results:
+            self.log.info(f"   团队 {r['team']}: {r.get('status')}，耗时 {r['elapsed']:.2f}s，接口调用 {r['api_calls']} 次")
+        self.log.info(f"{len(team_results)} 个团队执行完成，总耗时 {elapsed:.2f}s，接口调用 {run.calls} 次")
         
-        # 从 approval.yaml 读取请假审批编码
-        leave_approval_code = None
-        try:
-            approval_config_path = os.path.join(os.path.dirname(config_path), 'approval.yaml')
-            if os.path.exists(approval_config_path):
-                with open(approval_config_path, 'r', encoding='utf-8') as f:
-                    approval_config = yaml.safe_load(f)
-                    leave_codes = approval_config.get('approval_codes', {}).get('leave', [])
-                    if leave_codes:
-                        leave_approval_code = leave_codes[0]  # 取第一个请假审批编码
-        except Exception as e:
-            log.warning(f"读取 approval.yaml 失败: {e}，将不进行请假状态检测")
-        
-        # 创建服务实例
-        service = LaborHourService(
-            app_id=app_id,
-            app_secret=app_secret,
-            bitable_url=bitable_url,
-            chat_id=chat_id,
-            leave_approval_code=leave_approval_code,
-            exclude_members=exclude_members,
-            exceptions=exceptions
+        return {"status": status, "teams": team_results, "elapsed": elapsed, "api_calls": run.summary()}
+    
+    def team_delay(self, team_name: str) -> int:
+        """
+        团队的错峰延迟（秒）：按团队名称哈希均匀分布在 [0, team_spread) 内，同一团队每次相同
+        """
+        if not self.team_spread:
+            return 0
+        return zlib.crc32(team_name.encode('utf-8')) % int(self.team_spread)
+    
+    def _add_check_stages(self, dag: JobDAG, service: LaborHourService, team: Dict[str, Any],
+                          date_str: str, deadlines: Dict[str, float]) -> str:
+        """
+        添加单个团队的检查阶段：群成员 → 请假数据，与多维表格记录并行同步 → 检查 → 发布
+        
+        Returns:
+            发布阶段的名称
+        """
+        checker = service.checker
+        prefix = f"{team['name']}/"
+        delay = self.team_delay(team['name'])
+        
+        def check(upstream, cancel):
+            member_info = upstream[f"{prefix}roster"]
+            return checker.check_users_filled(
+                date_str,
+                user_names=[m['name'] for m in member_info],
+                user_id_map={m['name']: m['open_id'] for m in member_info},
+                leave_index=upstream[f"{prefix}leave"],
+                all_records=upstream[f"{prefix}records"]  # 使用记录阶段同步的记录，不再重复同步
+            )
+        
+        roster = dag.add(f"{prefix}roster", lambda upstream, cancel: checker.get_chat_members_info(),
+                         deadline=deadlines.get('roster'), delay=delay)
+        records = dag.add(f"{prefix}records", lambda upstream, cancel: checker.bitable.sync_records(),
+                          deadline=deadlines.get('records'), delay=delay)
+        leave = dag.add(f"{prefix}leave", lambda upstream, cancel: checker.bitable.get_leave_index(
+                            date_str, date_str, open_ids=[m['open_id'] for m in upstream[roster]]),
+                        depends_on=[roster], deadline=deadlines.get('leave'))
+        checked = dag.add(f"{prefix}check", check, depends_on=[roster, records, leave], deadline=deadlines.get('check'))
+        return dag.add(f"{prefix}publish",
+                       lambda upstream, cancel: service.publish_check_result(date_str, upstream[checked], cancel=cancel),
+                       depends_on=[checked], deadline=deadlines.get('publish'))
+    
+    def run_check(self, date_str: str = None, deadline: float = None,
+                  stage_deadlines: Dict[str, float] = None) -> Dict[str, Any]:
+        """
+        所有团队执行工时检查并发布
+        
+        每个团队拆分为 群成员 / 多维表格记录 / 请假数据 → 检查 → 发布 阶段，按依赖并行执行；
+        同时执行的阶段数不超过 team_concurrency 的2倍（每个团队最多同时同步2项），配置了 team_spread 时
+        各团队按名称哈希错峰开始。超过截止时间的阶段被放弃，该团队后续阶段不再执行，不影响其他团队
+        
+        Args:
+            date_str: 检查日期，格式 YYYY-MM-DD，默认为今天
+            deadline: 整个检查的截止时间（秒），默认不限制
+            stage_deadlines: 各阶段的截止时间（秒），覆盖 CHECK_STAGE_DEADLINES 中的默认值
+        
+        Returns:
+            汇总结果，teams 中为每个团队的检查结果和耗时，stages 中为各阶段的耗时
+        """
+        date_str = date_str or datetime.now(pytz.timezone('Asia/Shanghai')).strftime('%Y-%m-%d')
+        deadlines = dict(self.CHECK_STAGE_DEADLINES, **(stage_deadlines or {}))
+        
+        dag = JobDAG("labor_check", max_parallel=self.concurrency * 2)
+        team_results = {}
+        for team in self.teams:
+            if not team['bitable_url'] or not team['chat_id']:
+                team_results[team['name']] = {"status": "error", "message": "缺少 bitable.url 或 group_chat.chat_id"}
+                continue
+            try:
+                self._add_check_stages(dag, self.get_service(team), team, date_str, deadlines)
+            except Exception as e:
+                self.log.exception(f"团队 {team['name']} 初始化失败: {e}")
+                team_results[team['name']] = {"status": "error", "message": str(e)}
+        
+        with api_metrics.track("labor_check", date=date_str) as run:
+            dag_result = dag.run(deadline=deadline)
+        
+        # 按团队汇总阶段结果
+        for team in self.teams:
+            if team['name'] in team_results:
+                team_results[team['name']].update(elapsed=0.0, api_calls=0)
+                continue
+            prefix = f"{team['name']}/"
+            stages = [stage for stage in dag_result['stages'] if stage['name'].startswith(prefix)]
+            publish = dag_result['results'].get(f"{prefix}publish")
+            if publish is not None:
+                team_result = dict(publish)
+            else:
+                failed = next((stage for stage in stages if stage['status'] != 'success'), stages[-1])
+                team_result = {"status": "timeout" if failed['status'] == "timeout" else "error",
+                               "stage": failed['name'][len(prefix):], "message": failed['error']}
+            started = [stage for stage in stages if stage['started_at'] is not None]
+            team_result['elapsed'] = round(max((s['started_at'] + (s['elapsed'] or 0) for s in started), default=0)
+                                           - min((s['started_at'] for s in started), default=0), 3)
+            team_result['api_calls'] = sum(stage['api_calls'] for stage in stages)
+            team_results[team['name']] = team_result
+        
+        results = []
+        for team in self.teams:
+            team_result = team_results[team['name']]
+            team_result['team'] = team['name']
+            results.append(team_result)
+            self.log.info(f"   团队 {team['name']}: {team_result.get('status')}，耗时 {team_result['elapsed']:.2f}s，"
+                          f"接口调用 {team_result['api_calls']} 次")
+        
+        success_count = sum(1 for r in results if r.get('status') == 'success')
+        if success_count == len(results):
+            status = "success"
+        elif success_count:
+            status = "partial"
+        else:
+            status = "error"
+        self.log.info(f"{len(results)} 个团队检查完成，总耗时 {dag_result['elapsed']:.2f}s，接口调用 {run.calls} 次")
+        
+        return {
+            "status": status,
+            "date": date_str,
+            "teams": results,
+            "elapsed": dag_result['elapsed'],
+            "stages": dag_result['stages'],
+            "api_calls": run.summary()
+        }
+    
+    def run_warm_up(self, date_str: str = None) -> Dict[str, Any]:
+        """
+        所有团队预热检查缓存（不发送消息）
+        
+        Args:
+            date_str: 即将检查的日期，格式 YYYY-MM-DD，默认为今天
+        
+        Returns:
+            汇总结果，teams 中为每个团队的预热结果和耗时
+        """
+        date_str = date_str or datetime.now(pytz.timezone('Asia/Shanghai')).strftime('%Y-%m-%d')
+        result = self._run_teams(
+            lambda service, team: service.checker.warm_up(date_str),
+            tag="labor_warm_up",
+            date=date_str
         )
+        result['date'] = date_str
+        return result
+    
+    def run_month_summary(self, month: int = None, mention_users: List[str] = None) -> Dict[str, Any]:
+        """
+        所有团队执行月度总结并发布
         
-        # 运行检查
-        result = service.run_check_and_publish(date_str)
+        Args:
+            month: 月份（1-12），默认为当前月
+            mention_users: 需要@的人员名单（团队配置了 mention_users 时使用团队自己的）
         
+        Returns:
+            汇总结果，teams 中为每个团队的月总结结果和耗时
+        """
+        return self._run_teams(
+            lambda service, team: service.run_month_summary_and_publish(
+                month=month,
+                mention_users=team['mention_users'] or mention_users
+            ),
+            tag="month_summary",
+            month=month
+        )
+    
+    def run_leave_audit(self) -> Dict[str, Any]:
+        """
+        请假审批全量一致性校验：重新列出同步范围内的实例并强制刷新详情，
+        同时重新检查仍在生效期内的已通过请假（发现审批回调遗漏的撤销、撤回）
+        
+        Returns:
+            {"status": "success" | "skipped" | "error", "listed", "fetched", "failed", "changed", "elapsed"}
+        """
+        provider = self.leave_config.get('provider', 'approval')
+        if provider != 'approval' or not self.leave_approval_code:
+            return {"status": "skipped", "message": f"请假数据来源为 {provider} 或未配置请假审批编码，无需校验"}
+        
+        start = time.perf_counter()
+        with api_metrics.track("leave_audit", approval_code=self.leave_approval_code) as api_run:
+            stats = self.approval_sync.sync(self.leave_approval_code, full=True)
+        elapsed = round(time.perf_counter() - start, 3)
+        self.log.info(
+            f"请假审批一致性校验完成: 检查 {stats['listed']} 个实例, 变化 {len(stats['changed'])} 个, "
+            f"失败 {stats['failed']} 个, 耗时 {elapsed:.2f}s"
+        )
+        return {
+            "status": "success" if not stats['failed'] else "partial",
+            "listed": stats['listed'],
+            "fetched": stats['fetched'],
+            "failed": stats['failed'],
+            "failed_codes": stats['failed_codes'],
+            "changed": [
+                {"instance_code": detail['instance_code'], "status": detail['status'], "open_id": detail['open_id']}
+                for detail in stats['changed']
+            ],
+            "elapsed": elapsed,
+            "api_calls": api_run.calls
+        }
+    
+    def run_report(self, start_date: str, end_date: str, team_name: str = None) -> Dict[str, Any]:
+        """
+        汇总日期范围内各团队的工时填写情况（不发送消息，季度/年度复盘使用）
+        
+        Args:
+            start_date: 开始日期，格式 YYYY-MM-DD
+            end_date: 结束日期，格式 YYYY-MM-DD
+            team_name: 只统计指定团队（可选）
+        
+        Returns:
+            汇总结果，teams 中为每个团队的总结和耗时
+        """
+        start_day = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_day = datetime.strptime(end_date, '%Y-%m-%d').date()
+        teams = [team for team in self.teams if team['name'] == team_name] if team_name else self.teams
+        
+        def summarize(service, team):
+            summary = service.checker.summarize_period(start_day, end_day)
+            if summary is None:
+                return {"status": "error", "message": "没有可统计的人员名单"}
+            return {"status": "success", "summary": summary}
+        
+        result = self._run_teams(summarize, teams, tag="labor_report", start_date=start_date, end_date=end_date)
+        result['start_date'] = start_date
+        result['end_date'] = end_date
+        
+        # 团队横向对比（由各团队的逐日结果构建矩阵）
+        result['comparison'] = compare_teams({
+            team_result['team']: AttendanceMatrix.from_daily_results(team_result['summary']['daily_results'])
+            for team_result in result['teams'] if team_result.get('summary')
+        })
         return result
+
+
+def _default_config_dir() -> str:
+    """配置文件目录: backend/src/config/"""
+    # 从 src/service/feishu/ 回到 src/config/
+    return os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        'config'
+    )
+
+
+class LaborHourRegistry:
+    """工时运行器注册表 - 按配置文件缓存运行器（及其团队服务），配置文件修改后自动重建"""
+    
+    # 影响运行器的配置文件
+    CONFIG_FILES = ('labor_hour.yaml', 'approval.yaml')
+    
+    def __init__(self, config_dir: str = None):
+        """
+        初始化注册表
+        
+        Args:
+            config_dir: 配置文件目录，默认为 backend/src/config/
+        """
+        self.config_dir = config_dir or _default_config_dir()
+        self.log = set_stage(Stage.CONFIG)
+        
+        self._runner: Optional[LaborHourTeamRunner] = None
+        self._mtimes: Optional[tuple] = None
+        self._lock = threading.Lock()
+    
+    def _config_mtimes(self) -> tuple:
+        """配置文件的修改时间（文件不存在时为 None）"""
+        mtimes = []
+        for name in self.CONFIG_FILES:
+            path = os.path.join(self.config_dir, name)
+            mtimes.append(os.path.getmtime(path) if os.path.exists(path) else None)
+        return tuple(mtimes)
+    
+    def get_runner(self) -> LaborHourTeamRunner:
+        """
+        获取运行器：配置文件未修改时复用已有实例（访问令牌、请假数据、团队服务等缓存随之保留）
+        
+        Raises:
+            FileNotFoundError: labor_hour.yaml 不存在
+        """
+        with self._lock:
+            mtimes = self._config_mtimes()
+            if self._runner is not None and mtimes == self._mtimes:
+                return self._runner
+            
+            config_path = os.path.join(self.config_dir, 'labor_hour.yaml')
+            self.log.info(f"正在加载配置文件: {config_path}")
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f)
+            
+            # 从 approval.yaml 读取请假审批编码
+            leave_approval_code = load_leave_approval_code(self.config_dir)
+            
+            self._runner = LaborHourTeamRunner(config, leave_approval_code)
+            self._mtimes = mtimes
+            self.log.success(f"配置文件加载成功，共 {len(self._runner.teams)} 个团队")
+            return self._runner
+    
+    def invalidate(self):
+        """丢弃缓存的运行器，下次使用时重新加载配置"""
+        with self._lock:
+            self._runner = None
+            self._mtimes = None
+
+
+# 全局工时运行器注册表
+labor_hour_registry = LaborHourRegistry()
+
+
+def run_labor_hour_check_from_config(date_str: str = None, deadline: float = None,
+                                     stage_deadlines: Dict[str, float] = None):
+    """
+    从配置文件读取参数并运行工时检查（配置了多个团队时并发检查所有团队）
+    
+    Args:
+        date_str: 检查日期，格式 YYYY-MM-DD，默认为今天
+        deadline: 整个检查的截止时间（秒），默认不限制
+        stage_deadlines: 各阶段的截止时间（秒），默认使用 LaborHourTeamRunner.CHECK_STAGE_DEADLINES
+    
+    配置文件路径: backend/src/config/labor_hour.yaml（修改后下次运行自动生效）
+    """
+    log = set_stage(Stage.CONFIG)
+    
+    try:
+        runner = labor_hour_registry.get_runner()
+        return runner.run_check(date_str, deadline=deadline, stage_deadlines=stage_deadlines)
         
     except FileNotFoundError:
-        log.error(f"配置文件不存在: {config_path}")
+        log.error("配置文件不存在: labor_hour.yaml")
         log.warning("请创建配置文件 backend/src/config/labor_hour.yaml")
         return None
     except Exception as e:
@@ -889,18 +1574,9 @@ def run_labor_hour_check_from_config(date_str: str = None):
 class LaborHourManager:
     """工时管理器 - 提供简洁的调用接口"""
     
-    @classmethod
-    def check(cls, date_str: str = None, offset: int = None) -> Dict[str, Any]:
-        """
-        检查工时填写情况并发送提醒
-        
-        Args:
-            date_str: 基准日期，格式 YYYY-MM-DD（可选）
-            offset: 日期偏移量，-1=昨天，0=今天，1=明天（可选）
-        
-        Returns:
-            检查结果字典
-        """
+    @staticmethod
+    def _target_date(date_str: str = None, offset: int = None) -> str:
+        """基准日期（默认今天）加上日期偏移量，返回 YYYY-MM-DD"""
         tz = pytz.timezone('Asia/Shanghai')
         
         # 确定基准日期
@@ -919,9 +1595,50 @@ class LaborHourManager:
             target_date = base_date
         
         # 转换为日期字符串
-        final_date_str = target_date.strftime('%Y-%m-%d')
+        return target_date.strftime('%Y-%m-%d')
+    
+    @classmethod
+    def check(cls, date_str: str = None, offset: int = None, deadline: float = None,
+              stage_deadlines: Dict[str, float] = None) -> Dict[str, Any]:
+        """
+        检查工时填写情况并发送提醒
         
-        return run_labor_hour_check_from_config(final_date_str)
+        Args:
+            date_str: 基准日期，格式 YYYY-MM-DD（可选）
+            offset: 日期偏移量，-1=昨天，0=今天，1=明天（可选）
+            deadline: 整个检查的截止时间（秒，可选）
+            stage_deadlines: 各阶段的截止时间（秒，可选），如 {"records": 120, "publish": 30}
+        
+        Returns:
+            检查结果字典
+        """
+        return run_labor_hour_check_from_config(cls._target_date(date_str, offset), deadline=deadline,
+                                                stage_deadlines=stage_deadlines)
+    
+    @classmethod
+    def warm_up(cls, date_str: str = None, offset: int = None) -> Dict[str, Any]:
+        """
+        预热工时检查使用的缓存（访问令牌、群成员、多维表格记录、请假数据）
+        
+        Args:
+            date_str: 基准日期，格式 YYYY-MM-DD（可选）
+            offset: 日期偏移量，与随后执行的检查相同（可选）
+        
+        Returns:
+            预热结果字典
+        """
+        log = set_stage(Stage.CONFIG)
+        
+        try:
+            runner = labor_hour_registry.get_runner()
+            return runner.run_warm_up(cls._target_date(date_str, offset))
+            
+        except Exception as e:
+            log.exception(f"缓存预热失败: {e}")
+            return {
+                "status": "error",
+                "message": str(e)
+            }
     
     @classmethod
     def monthly_summary(cls, month: int = None, mention_users: list = None) -> Dict[str, Any]:
@@ -948,54 +1665,64 @@ class LaborHourManager:
         log = set_stage(Stage.CONFIG)
         
         try:
-            # 读取配置文件
-            config_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
-                'config',
-                'labor_hour.yaml'
-            )
-            
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            # 运行月度总结（配置了多个团队时并发执行）
+            runner = labor_hour_registry.get_runner()
+            return runner.run_month_summary(month=month, mention_users=mention_users)
             
-            # 从 approval.yaml 读取请假审批编码
-            leave_approval_code = None
-            try:
-                approval_config_path = os.path.join(
-                    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
-                    'config',
-                    'approval.yaml'
-                )
-                if os.path.exists(approval_config_path):
-                    with open(approval_config_path, 'r', encoding='utf-8') as f:
-                        approval_config = yaml.safe_load(f)
-                        leave_codes = approval_config.get('approval_codes', {}).get('leave', [])
-                        if leave_codes:
-                            leave_approval_code = leave_codes[0]
-            except Exception as e:
-                log.warning(f"读取 approval.yaml 失败: {e}，将不进行请假状态检测")
-            
-            # 创建服务实例
-            service = LaborHourService(
-                app_id=config['feishu']['app_id'],
-                app_secret=config['feishu']['app_secret'],
-                bitable_url=config['bitable']['url'],
-                chat_id=config['group_chat']['chat_id'],
-                leave_approval_code=leave_approval_code,
-                exclude_members=config.get('group_chat', {}).get('exclude_members', []),
-                exceptions=config.get('group_chat', {}).get('exceptions', {})
-            )
-            
-            # 运行月度总结
-            result = service.run_month_summary_and_publish(
-                month=month,
-                mention_users=mention_users
-            )
+        except Exception as e:
+            log.exception(f"月度总结失败: {e}")
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+
+    
+    @classmethod
+    def leave_audit(cls) -> Dict[str, Any]:
+        """
+        请假审批全量一致性校验（定时任务 leave_audit 调用，补齐审批回调遗漏的撤销、撤回）
+        
+        Returns:
+            校验结果字典
+        """
+        log = set_stage(Stage.CONFIG)
+        
+        try:
+            runner = labor_hour_registry.get_runner()
+            return runner.run_leave_audit()
             
-            return result
+        except Exception as e:
+            log.exception(f"请假审批一致性校验失败: {e}")
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+    
+    @classmethod
+    def report(cls, start_date: str, end_date: str, team: str = None) -> Dict[str, Any]:
+        """
+        汇总日期范围内的工时填写情况（月度、季度、年度复盘，不发送消息）
+        
+        Args:
+            start_date: 开始日期，格式 YYYY-MM-DD
+            end_date: 结束日期，格式 YYYY-MM-DD
+            team: 只统计指定团队（可选）
+        
+        Returns:
+            汇总结果字典
+        
+        Examples:
+            # 第四季度复盘
+            result = LaborHourManager.report("2025-10-01", "2025-12-31")
+        """
+        log = set_stage(Stage.CONFIG)
+        
+        try:
+            runner = labor_hour_registry.get_runner()
+            return runner.run_report(start_date, end_date, team_name=team)
             
         except Exception as e:
-            log.exception(f"月度总结失败: {e}")
+            log.exception(f"工时汇总失败: {e}")
             return {
                 "status": "error",
                 "message": str(e)
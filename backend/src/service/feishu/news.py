@@ -10,6 +10,7 @@ import hmac
 import time
 import json
 import requests
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from autoagents_core.client import ChatClient
@@ -17,6 +18,8 @@ from autoagents_core.client import ChatClient
 import sys
 import os
 
+from src.utils.feishu.api_metrics import api_metrics
+from src.utils.job_dag import JobDAG
 from src.utils.news.config_manager import ConfigManager
 from src.utils.news.database import NewsDatabase
 from src.utils.scrapers import (
@@ -27,6 +30,7 @@ from src.utils.scrapers import (
     A16zScraper,
     Kr36Scraper
 )
+from src.utils.scrapers.fetcher import http_fetcher
 
 
 class NewsHandler:
@@ -50,6 +54,15 @@ class NewsHandler:
             Kr36Scraper()
         ]
         
+        # 爬虫共享抓取器的选项（按域名的并发数、请求间隔、重试和响应大小上限）
+        try:
+            http_fetcher.configure(**(self.config.get('scrapers.http') or {}))
+        except (TypeError, ValueError) as e:
+            print(f"⚠️ scrapers.http 配置无效，使用默认抓取选项: {e}")
+        
+        # 最近一次采集各来源的耗时和条数
+        self.fetch_stats: List[Dict[str, Any]] = []
+        
         # 初始化AI客户端（延迟加载）
         self._ai_client = None
         
@@ -107,25 +120,50 @@ class NewsHandler:
             return "新闻内容总结失败"
     
     def fetch_all_news(self) -> List[Dict[str, Any]]:
-        """从所有配置的爬虫获取新闻（每个爬虫限制3条）"""
-        all_news = []
-        
+        """
+        并发从所有配置的爬虫获取新闻（每个来源选取 per_source_limit 条）
+        
+        条数上限传给爬虫，爬虫只为选中的条目抓取正文。
+        每个来源有自己的截止时间，所有来源共享一个总截止时间；超时的来源被放弃，使用已完成来源的结果，
+        被放弃的爬虫收到取消事件后停止抓取（Product Hunt 同时关闭浏览器）。
+        各来源的耗时和条数记录在 self.fetch_stats 中。
+        """
+        per_source_limit = self.config.get('scrapers.per_source_limit', 3)
+        source_deadline = self.config.get('scrapers.source_deadline', 180)
+        deadline = self.config.get('scrapers.deadline', 300)
+        
+        def fetch(scraper):
+            def run(upstream, cancel):
+                news_list = scraper.get_news_list(limit=per_source_limit, cancel=cancel)
+                return news_list, news_list[:per_source_limit]
+            return run
+        
+        dag = JobDAG("fetch_news")
         for scraper in self.scrapers:
-            try:
-                scraper_name = scraper.__class__.__name__
-                print(f"📰 开始获取 {scraper_name} 新闻...")
-                news_list = scraper.get_news_list()
-                
-                # 限制每个爬虫3条新闻
-                limited_news = news_list[:3]
-                all_news.extend(limited_news)
-                
-                print(f"✅ {scraper_name} 获取到 {len(news_list)} 篇新闻，选取前 {len(limited_news)} 篇")
-            except Exception as e:
-                print(f"❌ {scraper_name} 获取新闻失败: {e}")
-                continue
+            print(f"📰 开始获取 {scraper.__class__.__name__} 新闻...")
+            dag.add(scraper.__class__.__name__, fetch(scraper), deadline=source_deadline)
+        result = dag.run(deadline=deadline)
         
-        print(f"🎯 总共获取到 {len(all_news)} 篇新闻")
+        all_news = []
+        self.fetch_stats = []
+        for stage in result['stages']:
+            scraper_name = stage['name']
+            fetched, selected = result['results'].get(scraper_name, ([], []))
+            all_news.extend(selected)
+            self.fetch_stats.append({
+                'source': scraper_name,
+                'status': stage['status'],
+                'elapsed': stage['elapsed'],
+                'fetched': len(fetched),
+                'selected': len(selected),
+                'error': stage['error']
+            })
+            if stage['status'] == 'success':
+                print(f"✅ {scraper_name} 获取到 {len(fetched)} 篇新闻，选取前 {len(selected)} 篇")
+            else:
+                print(f"❌ {scraper_name} 获取新闻失败: {stage['error']}")
+        
+        print(f"🎯 总共获取到 {len(all_news)} 篇新闻，耗时 {result['elapsed']:.2f}s")
         return all_news
     
     def batch_process_news_with_ai(self, news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -268,15 +306,22 @@ class NewsHandler:
         
         # 第3步：保存到数据库
         print("\n💾 阶段3：保存到数据库")
-        if processed_news:
-            try:
-                success_count = self.database.insert_news_batch(processed_news)
-                print(f"💾 成功保存 {success_count}/{len(processed_news)} 条新闻到数据库")
-            except Exception as e:
-                print(f"❌ 数据库保存失败: {e}")
+        self.save_news(processed_news)
         
         print(f"✅ 新闻处理完成，共处理 {len(processed_news)} 条新闻")
         return processed_news
+    
+    def save_news(self, processed_news: List[Dict[str, Any]]) -> int:
+        """保存处理后的新闻到数据库，返回成功保存的条数（失败时返回0）"""
+        if not processed_news:
+            return 0
+        try:
+            success_count = self.database.insert_news_batch(processed_news)
+            print(f"💾 成功保存 {success_count}/{len(processed_news)} 条新闻到数据库")
+            return success_count
+        except Exception as e:
+            print(f"❌ 数据库保存失败: {e}")
+            return 0
 
 
 class FeishuNewsPublisher:
@@ -292,6 +337,10 @@ class FeishuNewsPublisher:
         # 获取所有飞书配置
         self.lark_configs = self.config.get_all_lark_configs()
         
+        # 机器人 webhook 发送也记录到飞书接口调用统计
+        self.session = requests.Session()
+        self.session.hooks['response'].append(api_metrics.response_hook)
+        
         if not self.lark_configs:
             raise ValueError("至少需要配置一个有效的飞书机器人在 config/news.yaml 中")
         
@@ -500,7 +549,7 @@ class FeishuNewsPublisher:
 
         headers = {"Content-Type": "application/json"}
         
-        response = requests.post(api_url, json=data, headers=headers)
+        response = self.session.post(api_url, json=data, headers=headers)
         
         if response.status_code == 200:
             print(f"✅ 新闻卡片发送成功 → {group_name}")
@@ -509,13 +558,23 @@ class FeishuNewsPublisher:
         
         return response
     
-    def send_to_all_groups(self, news_list: List[Dict[str, Any]]) -> Dict[str, requests.Response]:
-        """发送新闻卡片到所有配置的飞书群组"""
+    def send_to_all_groups(self, news_list: List[Dict[str, Any]],
+                           cancel: threading.Event = None) -> Dict[str, requests.Response]:
+        """
+        发送新闻卡片到所有配置的飞书群组
+        
+        Args:
+            news_list: 新闻列表
+            cancel: 取消事件（可选），发布阶段被放弃后不再向剩余群组发送
+        """
         results = {}
         
         print(f"📤 开始向 {len(self.lark_configs)} 个群组发送新闻...")
         
         for config in self.lark_configs:
+            if cancel is not None and cancel.is_set():
+                print(f"⏹️ 发布阶段已被放弃，停止发送（已发送 {len(results)}/{len(self.lark_configs)} 个群组）")
+                break
             group_name = config['name']
             api_url = config['api_url']
             api_secret = config['api_secret']
@@ -570,22 +629,69 @@ class FeishuNewsPublisher:
         }
 
 
-def run_news_and_publish():
-    """运行新闻采集和发布流程"""
-    try:
-        # 1. 处理新闻
-        handler = NewsHandler()
-        news_list = handler.process_news()
-        
+# 新闻流程各阶段的默认截止时间（秒），可由定时任务的 stage_deadlines 覆盖
+NEWS_STAGE_DEADLINES = {
+    "fetch": 600,
+    "summarize": 600,
+    "save": 120,
+    "publish": 120
+}
+
+
+def run_news_pipeline(deadline: float = None, stage_deadlines: Dict[str, float] = None) -> Dict[str, Any]:
+    """
+    按阶段运行新闻流程：采集 → AI处理 → 保存数据库 / 发布到飞书（最后两步并行）
+    
+    超过截止时间的阶段被放弃（如卡住的页面），后续阶段不再执行
+    
+    Args:
+        deadline: 整个流程的截止时间（秒），默认不限制
+        stage_deadlines: 各阶段的截止时间（秒），覆盖 NEWS_STAGE_DEADLINES 中的默认值
+    
+    Returns:
+        JobDAG.run 的结果，results["publish"] 为各群组的发送结果，sources 为各新闻来源的耗时和条数
+    """
+    deadlines = dict(NEWS_STAGE_DEADLINES, **(stage_deadlines or {}))
+    handler = NewsHandler()
+    publisher = FeishuNewsPublisher()
+    print(f"🚀 开始处理 {handler.get_target_date()} 的新闻")
+    
+    def summarize(upstream, cancel):
+        raw_news = upstream["fetch"]
+        if not raw_news:
+            print("📭 没有获取到新闻数据")
+            return []
+        processed_news = handler.batch_process_news_with_ai(raw_news)
+        if not processed_news:
+            print("❌ AI处理失败，没有获得有效结果")
+        return processed_news or []
+    
+    def publish(upstream, cancel):
+        news_list = upstream["summarize"]
         if not news_list:
             print("📰 今日无新闻内容")
-            news_list = []
-        
-        # 2. 发布到飞书
-        publisher = FeishuNewsPublisher()
-        results = publisher.send_to_all_groups(news_list)
-        
-        return results
+        return publisher.send_to_all_groups(news_list, cancel=cancel)
+    
+    dag = JobDAG("news")
+    dag.add("fetch", lambda upstream, cancel: handler.fetch_all_news(), deadline=deadlines.get("fetch"))
+    dag.add("summarize", summarize, depends_on=["fetch"], deadline=deadlines.get("summarize"))
+    dag.add("save", lambda upstream, cancel: handler.save_news(upstream["summarize"]), depends_on=["summarize"],
+            deadline=deadlines.get("save"))
+    dag.add("publish", publish, depends_on=["summarize"], deadline=deadlines.get("publish"))
+    result = dag.run(deadline=deadline)
+    result["sources"] = handler.fetch_stats
+    return result
+
+
+def run_news_and_publish(deadline: float = None, stage_deadlines: Dict[str, float] = None):
+    """
+    运行新闻采集和发布流程
+    
+    Returns:
+        各群组的发送结果 {群组key: Response}，流程失败时返回 None
+    """
+    try:
+        return run_news_pipeline(deadline, stage_deadlines)["results"].get("publish")
         
     except Exception as e:
         print(f"❌ 执行新闻采集和发布失败: {e}")
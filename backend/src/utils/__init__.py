@@ -3,6 +3,7 @@
 """
 
 from .event_manager import EventManager, event_manager
+from .workday_calendar import WorkdayCalendar, workday_calendar
 
-__all__ = ['EventManager', 'event_manager']
+__all__ = ['EventManager', 'event_manager', 'WorkdayCalendar', 'workday_calendar']
 
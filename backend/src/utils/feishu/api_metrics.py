@@ -0,0 +1,271 @@
+"""
+飞书接口调用统计
+
+为每次飞书接口调用记录接口、耗时、状态码和响应字节数，并归属到当前的任务或请求上下文：
+- HTTP 状态码 >= 400、请求异常，或 JSON 响应中的业务错误码 code 非 0（飞书接口出错时常返回 HTTP 200）都计为失败；
+  业务错误码只从响应体开头读取（飞书响应的第一个字段为 code），不解析整个响应体，调用方解析时不会重复解码
+- track(tag): 标记一次任务运行（如某天的工时检查、月度总结、某个聊天事件），期间的调用都记在该运行下
+- 运行可以嵌套（如工时检查下的各个团队），调用同时计入所有外层运行
+- 上下文基于 contextvars，线程池中执行的函数通过 bind() 继承提交时的上下文
+- 最近的运行汇总保存在内存中，可通过 recent_runs() 查询
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable
+from urllib.parse import urlparse
+
+import pytz
+
+
+# 接口路径中的版本段（v1、v4 等）保持原样
+_VERSION_SEGMENT = re.compile(r'^v\d+$')
+
+# 响应体开头的业务错误码（飞书接口和机器人 webhook 的响应都以 {"code": ... 开头）
+_LEADING_CODE = re.compile(rb'\s*\{\s*"code"\s*:\s*(-?\d+)')
+
+
+def normalize_endpoint(method: str, url: str) -> str:
+    """
+    将请求归一化为接口名：去掉域名、查询参数和 /open-apis 前缀，路径中的 ID 替换为 :id
+
+    例如 GET https://open.feishu.cn/open-apis/approval/v4/instances/ABC123?x=1
+    → GET /approval/v4/instances/:id
+    """
+    path = urlparse(url).path
+    if path.startswith('/open-apis'):
+        path = path[len('/open-apis'):]
+    segments = []
+    for segment in path.split('/'):
+        # 含数字的段视为 ID（open_id、message_id、实例编码等）
+        if segment and not _VERSION_SEGMENT.match(segment) and any(ch.isdigit() for ch in segment):
+            segment = ':id'
+        segments.append(segment)
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+class ApiRun:
+    """一次任务运行的接口调用统计"""
+
+    def __init__(self, tag: str, parent: 'ApiRun' = None, **context):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.tag = tag
+        self.parent = parent
+        self.context = context
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency = 0.0
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, status: int, latency: float, size: int, code: Optional[int] = None):
+        """记录一次调用（code 为 JSON 响应中的业务错误码，非 0 视为失败）"""
+        failed = status is None or status >= 400 or bool(code)
+        with self._lock:
+            self.calls += 1
+            self.errors += 1 if failed else 0
+            self.bytes += size
+            self.latency += latency
+
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = {'calls': 0, 'errors': 0, 'bytes': 0, 'latency': 0.0, 'max_latency': 0.0, 'statuses': {}, 'codes': {}}
+                self.endpoints[endpoint] = stats
+            stats['calls'] += 1
+            stats['errors'] += 1 if failed else 0
+            stats['bytes'] += size
+            stats['latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+            key = str(status) if status is not None else 'error'
+            stats['statuses'][key] = stats['statuses'].get(key, 0) + 1
+            if code:
+                stats['codes'][str(code)] = stats['codes'].get(str(code), 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        """运行汇总（按调用次数从多到少列出接口）"""
+        tz = pytz.timezone('Asia/Shanghai')
+        end = self.finished_at or time.time()
+        with self._lock:
+            endpoints = [
+                {
+                    'endpoint': endpoint,
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'bytes': stats['bytes'],
+                    'total_latency': round(stats['latency'], 3),
+                    'avg_latency': round(stats['latency'] / stats['calls'], 4),
+                    'max_latency': round(stats['max_latency'], 4),
+                    'statuses': dict(stats['statuses']),
+                    'codes': dict(stats['codes'])  # 非 0 的业务错误码
+                }
+                for endpoint, stats in self.endpoints.items()
+            ]
+            return {
+                'run_id': self.run_id,
+                'tag': self.tag,
+                'parent_run_id': self.parent.run_id if self.parent else None,
+                'context': dict(self.context),
+                'started_at': datetime.fromtimestamp(self.started_at, tz).isoformat(),
+                'elapsed': round(end - self.started_at, 3),
+                'finished': self.finished_at is not None,
+                'calls': self.calls,
+                'errors': self.errors,
+                'bytes': self.bytes,
+                'api_latency': round(self.latency, 3),
+                'endpoints': sorted(endpoints, key=lambda item: item['calls'], reverse=True)
+            }
+
+
+class ApiMetrics:
+    """飞书接口调用统计（按任务运行汇总）"""
+
+    def __init__(self, history_size: int = 200):
+        """
+        初始化调用统计
+
+        Args:
+            history_size: 内存中保留的已完成运行数，默认200
+        """
+        self._current: ContextVar[Optional[ApiRun]] = ContextVar('feishu_api_run', default=None)
+        self._history: deque = deque(maxlen=history_size)
+        self._active: Dict[str, ApiRun] = {}
+        self._lock = threading.Lock()
+
+        # 不属于任何运行的调用（如启动时的令牌获取）
+        self.untracked = ApiRun('untracked')
+
+    def current(self) -> Optional[ApiRun]:
+        """当前上下文的运行"""
+        return self._current.get()
+
+    @contextmanager
+    def track(self, tag: str, **context):
+        """
+        标记一次任务运行，期间（包括嵌套运行中）的接口调用都计入该运行
+
+        Args:
+            tag: 运行标签，如 labor_check、month_summary、chat_event
+            **context: 附加上下文，如 date='2025-10-24'、event_id='...'
+
+        Yields:
+            ApiRun 实例
+        """
+        run = ApiRun(tag, parent=self._current.get(), **context)
+        token = self._current.set(run)
+        with self._lock:
+            self._active[run.run_id] = run
+        try:
+            yield run
+        finally:
+            run.finished_at = time.time()
+            self._current.reset(token)
+            with self._lock:
+                self._active.pop(run.run_id, None)
+                self._history.append(run)
+
+    def bind(self, fn: Callable) -> Callable:
+        """包装函数，使其在其他线程中执行时仍计入当前运行（用于线程池）"""
+        run = self._current.get()
+        if run is None:
+            return fn
+
+        def wrapper(*args, **kwargs):
+            token = self._current.set(run)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._current.reset(token)
+        return wrapper
+
+    def record(self, method: str, url: str, status: Optional[int], latency: float, size: int,
+               code: Optional[int] = None):
+        """
+        记录一次接口调用，计入当前运行及其所有外层运行
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            status: HTTP 状态码，请求异常时为 None
+            latency: 耗时（秒）
+            size: 响应字节数
+            code: JSON 响应中的业务错误码（可选），非 0 计为失败
+        """
+        endpoint = normalize_endpoint(method, url)
+        run = self._current.get()
+        if run is None:
+            self.untracked.record(endpoint, status, latency, size, code)
+            return
+        while run is not None:
+            run.record(endpoint, status, latency, size, code)
+            run = run.parent
+
+    @staticmethod
+    def response_code(response) -> Optional[int]:
+        """
+        JSON 响应中的业务错误码 code（只匹配响应体开头，不解析整个响应体）
+
+        Returns:
+            业务错误码；非 JSON 响应或 code 不是第一个字段时返回 None
+        """
+        if 'json' not in response.headers.get('Content-Type', ''):
+            return None
+        match = _LEADING_CODE.match(response.content[:64] or b'')
+        return int(match.group(1)) if match else None
+
+    def response_hook(self, response, *args, **kwargs):
+        """requests 响应钩子：记录 Session 发出的每次调用（JSON 响应的 code 非 0 计为失败）"""
+        request = response.request
+        self.record(
+            request.method,
+            request.url,
+            response.status_code,
+            response.elapsed.total_seconds(),
+            len(response.content or b''),
+            self.response_code(response)
+        )
+        return response
+
+    def recent_runs(self, limit: int = 20, tag: str = None, include_children: bool = False) -> List[Dict[str, Any]]:
+        """
+        最近的运行汇总（进行中的运行在前，其余按结束时间倒序）
+
+        Args:
+            limit: 返回数量
+            tag: 只返回指定标签的运行（指定时包括嵌套的子运行，如定时任务运行下的 labor_check）
+            include_children: 是否包含嵌套的子运行
+
+        Returns:
+            运行汇总列表
+        """
+        with self._lock:
+            runs = list(self._active.values()) + list(reversed(self._history))
+        if tag is not None:
+            runs = [run for run in runs if run.tag == tag]
+        elif not include_children:
+            runs = [run for run in runs if run.parent is None]
+        return [run.summary() for run in runs[:limit]]
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """按 run_id 查询运行汇总（附带子运行）"""
+        with self._lock:
+            runs = list(self._active.values()) + list(self._history)
+        match = next((run for run in runs if run.run_id == run_id), None)
+        if match is None:
+            return None
+        summary = match.summary()
+        summary['children'] = [run.summary() for run in runs if run.parent is match]
+        return summary
+
+
+# 全局飞书接口调用统计实例
+api_metrics = ApiMetrics()
@@ -0,0 +1,391 @@
+"""
+审批实例详情缓存
+
+将 /approval/v4/instances/{instance_code} 的详情解析后持久化到本地 SQLite：
+- 只保存请假检测需要的字段：状态、申请人 open_id、leaveGroupV2 请假区间
+- 终态（已通过、已拒绝、已撤回等）的实例永不过期
+- 审批中的实例使用较短的 TTL，过期后重新拉取
+- 按审批定义记录同步水位（已覆盖的创建时间范围），供增量同步使用
+- 记录同步时获取详情失败的实例，下次同步时重试（水位前进后这些实例不会再被列出）
+- 审批事件回调直接写入/更新状态，请假索引从本地数据构建
+- 记录数据来源应用 app_id（open_id 按应用隔离，跨应用的数据需要重新拉取）；
+  其他应用重新拉取得到的申请人 open_id 单独按 (实例, 应用) 保存，不覆盖原记录，每个实例每个应用只拉取一次
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+
+# 审批实例终态，进入终态后详情不会再变化（撤销会通过审批事件单独处理）
+TERMINAL_STATUSES = {'APPROVED', 'REJECTED', 'CANCELED', 'DELETED', 'REVERTED'}
+
+# 默认数据目录: backend/data/
+DEFAULT_DATA_DIR = Path(__file__).parent.parent.parent.parent / "data"
+
+
+def parse_approval_detail(instance_code: str, instance: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    解析审批实例详情，提取请假检测需要的字段
+
+    Args:
+        instance_code: 审批实例编码
+        instance: 审批详情接口返回的 data 字段
+
+    Returns:
+        dict: {
+            'instance_code': str,
+            'approval_code': str,
+            'status': str,           # PENDING / APPROVED / REJECTED / ...
+            'open_id': str,          # 申请人 open_id
+            'intervals': [           # leaveGroupV2 请假区间（本地时间，YYYY-MM-DDTHH:MM:SS）
+                {'start': str, 'end': str, 'name': str}
+            ]
+        }
+    """
+    intervals = []
+
+    # 审批表单（form 是 JSON 字符串）
+    form_str = instance.get('form', '[]')
+    try:
+        form_data = json.loads(form_str) if isinstance(form_str, str) else (form_str or [])
+    except Exception:
+        form_data = []
+
+    for widget in form_data:
+        if not isinstance(widget, dict) or widget.get('type') != 'leaveGroupV2':
+            continue
+
+        leave_info = widget.get('value', {}) or {}
+        start_str = leave_info.get('start', '')  # 格式: "2025-10-24T00:00:00+08:00"
+        end_str = leave_info.get('end', '')      # 格式: "2025-10-24T12:00:00+08:00"
+
+        if start_str and end_str:
+            intervals.append({
+                'start': start_str[:19],
+                'end': end_str[:19],
+                'name': leave_info.get('name', '')
+            })
+
+    return {
+        'instance_code': instance_code,
+        'approval_code': instance.get('approval_code', ''),
+        'status': instance.get('status', ''),
+        'open_id': instance.get('open_id', ''),
+        'intervals': intervals
+    }
+
+
+class ApprovalCache:
+    """审批实例详情缓存（SQLite 持久化）"""
+
+    def __init__(self, db_path: str = None, pending_ttl: int = 300):
+        """
+        初始化审批详情缓存
+
+        Args:
+            db_path: SQLite 文件路径，默认为 backend/data/approval_cache.db
+            pending_ttl: 非终态实例的缓存有效期（秒），默认5分钟
+        """
+        self.db_path = Path(db_path) if db_path else DEFAULT_DATA_DIR / "approval_cache.db"
+        self.pending_ttl = pending_ttl
+
+        # 延迟建立连接，避免导入模块时就创建文件
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """获取数据库连接（首次调用时建表）"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS approval_instances (
+                    instance_code TEXT PRIMARY KEY,
+                    approval_code TEXT,
+                    status TEXT,
+                    open_id TEXT,
+                    intervals TEXT,
+                    fetched_at REAL,
+                    app_id TEXT
+                )
+            """)
+            # 兼容旧版本数据库（没有 app_id 列）
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(approval_instances)")}
+            if 'app_id' not in columns:
+                conn.execute("ALTER TABLE approval_instances ADD COLUMN app_id TEXT")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_approval_instances_code
+                ON approval_instances (approval_code)
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_watermarks (
+                    approval_code TEXT PRIMARY KEY,
+                    since_ms INTEGER,
+                    watermark_ms INTEGER,
+                    synced_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS app_open_ids (
+                    instance_code TEXT,
+                    app_id TEXT,
+                    open_id TEXT,
+                    PRIMARY KEY (instance_code, app_id)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_failures (
+                    instance_code TEXT PRIMARY KEY,
+                    approval_code TEXT,
+                    attempts INTEGER,
+                    failed_at REAL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def is_fresh(self, detail: Dict[str, Any], now: float = None) -> bool:
+        """判断缓存的详情是否仍然有效"""
+        if detail.get('status') in TERMINAL_STATUSES:
+            return True
+        now = now if now is not None else time.time()
+        return now - detail.get('fetched_at', 0) < self.pending_ttl
+
+    @staticmethod
+    def _row_to_detail(row: sqlite3.Row) -> Dict[str, Any]:
+        """数据库行转换为详情字典"""
+        return {
+            'instance_code': row['instance_code'],
+            'approval_code': row['approval_code'],
+            'status': row['status'],
+            'open_id': row['open_id'],
+            'intervals': json.loads(row['intervals'] or '[]'),
+            'fetched_at': row['fetched_at'],
+            'app_id': row['app_id'] or ''
+        }
+
+    def get(self, instance_code: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的审批详情
+
+        Args:
+            instance_code: 审批实例编码
+
+        Returns:
+            有效的详情字典；不存在或已过期时返回 None
+        """
+        with self._lock:
+            row = self._get_conn().execute(
+                "SELECT * FROM approval_instances WHERE instance_code = ?",
+                (instance_code,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        detail = self._row_to_detail(row)
+        return detail if self.is_fresh(detail) else None
+
+    def put(self, detail: Dict[str, Any]):
+        """
+        写入审批详情
+
+        Args:
+            detail: parse_approval_detail 返回的详情字典（可附带来源应用 app_id）
+        """
+        fetched_at = detail.get('fetched_at') or time.time()
+        detail['fetched_at'] = fetched_at
+
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO approval_instances
+                    (instance_code, approval_code, status, open_id, intervals, fetched_at, app_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    detail['instance_code'],
+                    detail.get('approval_code', ''),
+                    detail.get('status', ''),
+                    detail.get('open_id', ''),
+                    json.dumps(detail.get('intervals', []), ensure_ascii=False),
+                    fetched_at,
+                    detail.get('app_id', '')
+                )
+            )
+            conn.commit()
+
+    def update_status(self, instance_code: str, status: str, approval_code: str = '', app_id: str = ''):
+        """
+        更新实例状态（保留已有的申请人和请假区间），实例不存在时插入一条只有状态的记录
+
+        Args:
+            instance_code: 审批实例编码
+            status: 新状态，例如 REVERTED / CANCELED / PENDING
+            approval_code: 审批定义编码（插入新记录时使用）
+            app_id: 数据来源应用（插入新记录时使用）
+        """
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.execute(
+                "UPDATE approval_instances SET status = ?, fetched_at = ? WHERE instance_code = ?",
+                (status, time.time(), instance_code)
+            )
+            if cursor.rowcount == 0:
+                conn.execute(
+                    """
+                    INSERT INTO approval_instances
+                        (instance_code, approval_code, status, open_id, intervals, fetched_at, app_id)
+                    VALUES (?, ?, ?, '', '[]', ?, ?)
+                    """,
+                    (instance_code, approval_code, status, time.time(), app_id)
+                )
+            conn.commit()
+
+    def invalidate(self, instance_code: str):
+        """删除指定实例的缓存，下次查询时重新拉取"""
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("DELETE FROM approval_instances WHERE instance_code = ?", (instance_code,))
+            conn.commit()
+
+    def list_details(self, approval_code: str) -> List[Dict[str, Any]]:
+        """
+        读取某个审批定义下已同步的全部实例详情（不检查有效期）
+
+        Args:
+            approval_code: 审批定义编码
+
+        Returns:
+            详情字典列表
+        """
+        with self._lock:
+            rows = self._get_conn().execute(
+                "SELECT * FROM approval_instances WHERE approval_code = ?",
+                (approval_code,)
+            ).fetchall()
+        return [self._row_to_detail(row) for row in rows]
+
+    def put_app_open_ids(self, app_id: str, open_ids: Dict[str, str]):
+        """
+        保存实例申请人在指定应用下的 open_id（不修改实例记录本身）
+
+        Args:
+            app_id: 应用ID
+            open_ids: {实例编码: 该应用下的申请人 open_id}
+        """
+        if not open_ids:
+            return
+        with self._lock:
+            conn = self._get_conn()
+            conn.executemany(
+                "INSERT OR REPLACE INTO app_open_ids (instance_code, app_id, open_id) VALUES (?, ?, ?)",
+                [(code, app_id, open_id) for code, open_id in open_ids.items()]
+            )
+            conn.commit()
+
+    def app_open_ids(self, app_id: str, approval_code: str) -> Dict[str, str]:
+        """读取某个审批定义下实例申请人在指定应用下的 open_id {实例编码: open_id}"""
+        with self._lock:
+            rows = self._get_conn().execute(
+                "SELECT m.instance_code, m.open_id FROM app_open_ids m "
+                "JOIN approval_instances i ON i.instance_code = m.instance_code "
+                "WHERE m.app_id = ? AND i.approval_code = ?",
+                (app_id, approval_code)
+            ).fetchall()
+        return {row['instance_code']: row['open_id'] for row in rows}
+
+    def pending_codes(self, approval_code: str) -> List[str]:
+        """获取某个审批定义下尚未进入终态的实例编码（状态可能已变化，需要重新拉取）"""
+        placeholders = ", ".join("?" for _ in TERMINAL_STATUSES)
+        with self._lock:
+            rows = self._get_conn().execute(
+                f"SELECT instance_code FROM approval_instances "
+                f"WHERE approval_code = ? AND status NOT IN ({placeholders})",
+                (approval_code, *TERMINAL_STATUSES)
+            ).fetchall()
+        return [row['instance_code'] for row in rows]
+
+    def get_watermark(self, approval_code: str) -> Optional[Dict[str, Any]]:
+        """
+        读取审批定义的同步水位
+
+        Returns:
+            {'since_ms': int, 'watermark_ms': int, 'synced_at': float}，从未同步时返回 None
+            since_ms ~ watermark_ms 为已完整同步的实例创建时间范围（毫秒时间戳）
+        """
+        with self._lock:
+            row = self._get_conn().execute(
+                "SELECT * FROM sync_watermarks WHERE approval_code = ?",
+                (approval_code,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return {
+            'since_ms': row['since_ms'],
+            'watermark_ms': row['watermark_ms'],
+            'synced_at': row['synced_at']
+        }
+
+    def set_watermark(self, approval_code: str, since_ms: int, watermark_ms: int):
+        """写入审批定义的同步水位"""
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO sync_watermarks (approval_code, since_ms, watermark_ms, synced_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (approval_code, since_ms, watermark_ms, time.time())
+            )
+            conn.commit()
+
+    def record_failures(self, approval_code: str, instance_codes: List[str]):
+        """记录获取详情失败的实例（累加失败次数），下次同步时重试"""
+        if not instance_codes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.executemany(
+                """
+                INSERT INTO sync_failures (instance_code, approval_code, attempts, failed_at)
+                VALUES (?, ?, 1, ?)
+                ON CONFLICT(instance_code) DO UPDATE SET attempts = attempts + 1, failed_at = excluded.failed_at
+                """,
+                [(code, approval_code, now) for code in instance_codes]
+            )
+            conn.commit()
+
+    def failed_codes(self, approval_code: str) -> Dict[str, int]:
+        """获取某个审批定义下待重试的实例编码及已失败次数"""
+        with self._lock:
+            rows = self._get_conn().execute(
+                "SELECT instance_code, attempts FROM sync_failures WHERE approval_code = ?",
+                (approval_code,)
+            ).fetchall()
+        return {row['instance_code']: row['attempts'] for row in rows}
+
+    def clear_failures(self, instance_codes: List[str]):
+        """清除已成功获取详情的实例的失败记录"""
+        if not instance_codes:
+            return
+        with self._lock:
+            conn = self._get_conn()
+            conn.executemany(
+                "DELETE FROM sync_failures WHERE instance_code = ?",
+                [(code,) for code in instance_codes]
+            )
+            conn.commit()
+
+
+# 全局审批详情缓存实例
+approval_cache = ApprovalCache()
@@ -0,0 +1,365 @@
+"""
+审批实例增量同步
+
+将审批定义下的实例同步到本地审批缓存（本地请假数据）：
+- 审批列表接口按 page_token 完整翻页，不会遗漏第一页之后的实例
+- 每个审批定义记录同步水位（已覆盖的实例创建时间范围），后续只拉取水位之后新创建的实例
+- 未进入终态的实例每次同步都会重新检查状态（受缓存 TTL 约束）
+- 获取详情失败的实例记录在本地，之后每次同步都会重试，直到成功（水位照常前进，失败的实例不会丢失）
+- 查询更早的日期时自动向前补齐同步范围
+- 审批事件回调实时写入本地数据，轮询同步只作为定期一致性校验（sync_interval）
+- 全量校验（定时任务 leave_audit）重新列出同步范围内的实例，并重新拉取仍在生效期内的已通过实例，
+  发现回调遗漏的撤销、撤回
+- 同步发现新增或变化的请假时，将请假日期（变化前后）的工时日结果标记为 dirty
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+
+import pytz
+
+from src.utils.logging import set_stage
+from src.utils.feishu.api_metrics import api_metrics
+from src.utils.feishu.approval_cache import approval_cache as default_approval_cache, parse_approval_detail
+from src.utils.feishu.compliance_store import compliance_store as default_compliance_store
+from src.utils.feishu.leave_index import LeaveIndex
+from src.utils.feishu.rate_limiter import RateLimiter
+from src.models import Stage
+
+
+class ApprovalSync:
+    """审批实例增量同步器"""
+
+    # 审批列表接口单页最大条数
+    PAGE_SIZE = 100
+
+    def __init__(self, client, approval_cache=None, concurrency: int = 8, rate_limit: float = 20,
+                 lookback_days: int = 30, overlap_seconds: int = 300, sync_interval: int = 3600,
+                 compliance_store=None):
+        """
+        初始化同步器
+
+        Args:
+            client: FeishuClient实例
+            approval_cache: 审批详情缓存（可选），默认使用全局 ApprovalCache
+            concurrency: 并发获取审批详情的最大线程数，默认8，设为1则串行获取
+            rate_limit: 审批详情接口每秒最大请求数，默认20，<=0 表示不限流
+            lookback_days: 查询某个日期的请假时，向前同步的实例创建天数（请假通常提前申请），默认30
+            overlap_seconds: 增量同步时水位回退的秒数，避免接口索引延迟导致漏数据，默认300
+            sync_interval: 查询请假时两次轮询同步的最小间隔（秒），期间只读本地数据，默认3600，<=0 表示每次都同步
+            compliance_store: 工时日结果存储（可选），默认使用全局 ComplianceStore
+        """
+        self.client = client
+        self.approval_cache = approval_cache or default_approval_cache
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.lookback_days = lookback_days
+        self.overlap_seconds = overlap_seconds
+        self.sync_interval = sync_interval
+        self.compliance_store = compliance_store or default_compliance_store
+
+        # 可重入锁：get_leave_index 判断是否需要同步与同步本身在同一个锁内，多个团队共享时不会重复同步
+        self._lock = threading.RLock()
+        self.log = set_stage(Stage.LEAVE_CHECK)
+
+    def _headers(self) -> dict:
+        """构造请求头"""
+        return {
+            "Authorization": f"Bearer {self.client.get_access_token()}",
+            "Content-Type": "application/json"
+        }
+
+    def list_instance_codes(self, approval_code: str, start_ms: int, end_ms: int) -> List[str]:
+        """
+        列出创建时间在 [start_ms, end_ms] 内的全部审批实例编码（完整翻页）
+
+        Args:
+            approval_code: 审批定义编码
+            start_ms: 开始时间（毫秒时间戳）
+            end_ms: 结束时间（毫秒时间戳）
+
+        Returns:
+            审批实例编码列表
+
+        Raises:
+            Exception: 审批列表接口返回错误
+        """
+        url = f"{self.client.base_url}/approval/v4/instances"
+        headers = self._headers()
+        params = {
+            "approval_code": approval_code,
+            "start_time": str(start_ms),
+            "end_time": str(end_ms),
+            "page_size": self.PAGE_SIZE
+        }
+
+        instance_codes = []
+        while True:
+            response = self.client.session.get(url, headers=headers, params=params)
+            result = response.json()
+
+            if result.get('code') != 0:
+                raise Exception(f"审批列表查询失败: code={result.get('code')}, msg={result.get('msg')}")
+
+            data = result.get('data', {}) or {}
+            instance_codes.extend(data.get('instance_code_list', []) or [])
+
+            page_token = data.get('page_token')
+            if not data.get('has_more') or not page_token:
+                break
+            params['page_token'] = page_token
+
+        return instance_codes
+
+    def fetch_detail(self, instance_code: str, headers: dict, approval_code: str = None,
+                     force: bool = False, store: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        获取审批实例的请假详情（优先读取缓存）
+
+        Args:
+            instance_code: 审批实例编码
+            headers: 请求头（包含访问令牌）
+            approval_code: 所属审批定义编码，详情中缺失时补齐
+            force: 是否忽略缓存强制重新拉取
+            store: 是否写入缓存（为其他应用的实例解析本应用 open_id 时不写入，避免覆盖原记录）
+
+        Returns:
+            parse_approval_detail 格式的详情字典，获取失败时返回 None
+        """
+        if not force:
+            detail = self.approval_cache.get(instance_code)
+            if detail is not None:
+                return detail
+
+        # 缓存未命中才请求接口，受审批接口限流约束
+        self.rate_limiter.acquire()
+
+        detail_url = f"{self.client.base_url}/approval/v4/instances/{instance_code}"
+        detail_params = {"user_id_type": "open_id"}
+        detail_response = self.client.session.get(detail_url, headers=headers, params=detail_params)
+        detail_result = detail_response.json()
+
+        if detail_result.get('code') != 0:
+            self.log.debug(
+                f"   获取审批详情失败 ({instance_code}): code={detail_result.get('code')}, msg={detail_result.get('msg')}"
+            )
+            return None
+
+        detail = parse_approval_detail(instance_code, detail_result.get('data', {}))
+        if approval_code and not detail['approval_code']:
+            detail['approval_code'] = approval_code
+        detail['app_id'] = self.client.app_id
+        if store:
+            self.approval_cache.put(detail)
+        return detail
+
+    def fetch_details(self, instance_codes: List[str], approval_code: str = None,
+                      force: bool = False) -> List[Dict[str, Any]]:
+        """
+        批量获取审批实例的请假详情（有界并发）
+
+        Args:
+            instance_codes: 审批实例编码列表
+            approval_code: 所属审批定义编码
+            force: 是否忽略缓存强制重新拉取
+
+        Returns:
+            获取成功的详情列表，顺序与 instance_codes 一致
+        """
+        details, _ = self._fetch_details(instance_codes, approval_code, force)
+        return details
+
+    def _fetch_details(self, instance_codes: List[str], approval_code: str = None,
+                       force: bool = False, store: bool = True) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        批量获取审批实例的请假详情，同时返回获取失败的实例编码
+
+        Returns:
+            (获取成功的详情列表, 获取失败的实例编码列表)
+        """
+        if not instance_codes:
+            return [], []
+
+        headers = self._headers()
+
+        def fetch(instance_code):
+            try:
+                return self.fetch_detail(instance_code, headers, approval_code, force, store)
+            except Exception as e:
+                # 单个实例查询失败，不影响其他实例
+                self.log.debug(f"   获取审批详情失败 ({instance_code}): {e}")
+                return None
+
+        max_workers = min(self.concurrency, len(instance_codes))
+        if max_workers <= 1:
+            details = [fetch(code) for code in instance_codes]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="approval-detail") as executor:
+                details = list(executor.map(api_metrics.bind(fetch), instance_codes))
+
+        failed_codes = [code for code, detail in zip(instance_codes, details) if not detail]
+        return [detail for detail in details if detail], failed_codes
+
+    def sync(self, approval_code: str, since_ms: int = None, full: bool = False) -> Dict[str, Any]:
+        """
+        增量同步审批定义下的实例
+
+        Args:
+            approval_code: 审批定义编码
+            since_ms: 需要覆盖的最早实例创建时间（毫秒时间戳），早于已同步范围时向前补齐；
+                      默认从 lookback_days 天前开始
+            full: 是否全量重新同步（忽略水位并强制刷新全部详情，同时重新检查请假区间结束于 since_ms 之后的
+                  已通过实例），用于定期一致性校验
+
+        Returns:
+            dict: {'listed': 列出的实例数（含重试的实例和全量校验重新检查的实例）, 'fetched': 获取到的详情数,
+                   'retried': 上次失败本次重试的实例数, 'failed': 本次获取失败的实例数,
+                   'failed_codes': 获取失败的实例编码（下次同步时重试）,
+                   'changed': 状态或请假区间发生变化（含新增）的详情列表, 'since_ms': int, 'watermark_ms': int}
+        """
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            if since_ms is None:
+                since_ms = now_ms - self.lookback_days * 86400 * 1000
+
+            state = None if full else self.approval_cache.get_watermark(approval_code)
+            overlap_ms = self.overlap_seconds * 1000
+
+            # 需要列出的创建时间范围
+            ranges = []
+            if state is None:
+                ranges.append((since_ms, now_ms))
+                new_since = since_ms
+            else:
+                new_since = min(state['since_ms'], since_ms)
+                if since_ms < state['since_ms']:
+                    ranges.append((since_ms, state['since_ms']))
+                ranges.append((state['watermark_ms'] - overlap_ms, now_ms))
+
+            instance_codes = []
+            for start_ms, end_ms in ranges:
+                instance_codes.extend(self.list_instance_codes(approval_code, start_ms, end_ms))
+
+            # 已同步但未进入终态的实例，状态可能已变化
+            instance_codes.extend(self.approval_cache.pending_codes(approval_code))
+            # 之前获取详情失败的实例（可能已在水位之前，不会再被列出）
+            retry_codes = self.approval_cache.failed_codes(approval_code)
+            instance_codes.extend(retry_codes)
+            # 全量校验：已通过且仍在生效期内的请假，即使创建时间早于同步范围也重新检查（回调可能遗漏撤销）
+            known = {detail['instance_code']: detail for detail in self.approval_cache.list_details(approval_code)}
+            if full:
+                since_date = datetime.fromtimestamp(since_ms / 1000, pytz.timezone('Asia/Shanghai')).strftime('%Y-%m-%d')
+                instance_codes.extend(
+                    code for code, detail in known.items()
+                    if detail['status'] == 'APPROVED'
+                    and any(interval['end'][:10] >= since_date for interval in detail.get('intervals', []))
+                )
+            instance_codes = list(dict.fromkeys(instance_codes))
+
+            details, failed_codes = self._fetch_details(instance_codes, approval_code, force=full)
+            self.approval_cache.clear_failures([detail['instance_code'] for detail in details])
+            self.approval_cache.record_failures(approval_code, failed_codes)
+            self.approval_cache.set_watermark(approval_code, new_since, now_ms)
+
+            changed = [
+                detail for detail in details
+                if detail['instance_code'] not in known
+                or known[detail['instance_code']]['status'] != detail['status']
+                or known[detail['instance_code']]['intervals'] != detail['intervals']
+            ]
+            self._mark_days_dirty(changed, known)
+
+            self.log.debug(
+                f"   审批同步完成 ({approval_code}): 列出 {len(instance_codes)} 个实例, 获取详情 {len(details)} 个"
+            )
+            if failed_codes:
+                self.log.warning(
+                    f"   {len(failed_codes)} 个审批实例获取详情失败，下次同步时重试 ({approval_code}): "
+                    f"{', '.join(failed_codes[:10])}{' ...' if len(failed_codes) > 10 else ''}"
+                )
+            return {
+                'listed': len(instance_codes),
+                'fetched': len(details),
+                'retried': len(retry_codes),
+                'failed': len(failed_codes),
+                'failed_codes': failed_codes,
+                'changed': changed,
+                'since_ms': new_since,
+                'watermark_ms': now_ms
+            }
+
+    def _mark_days_dirty(self, changed: List[Dict[str, Any]], known: Dict[str, Dict[str, Any]]):
+        """将变化的请假（新区间和变化前的旧区间）覆盖的日期标记为 dirty，汇总时重新计算"""
+        intervals = []
+        for detail in changed:
+            intervals.extend(detail.get('intervals', []))
+            intervals.extend(known.get(detail['instance_code'], {}).get('intervals', []))
+
+        try:
+            for start, end in {(interval['start'][:10], interval['end'][:10]) for interval in intervals}:
+                self.compliance_store.mark_dirty(start, end)
+        except Exception as e:
+            self.log.warning(f"   标记工时日结果失败: {e}")
+
+    def needs_sync(self, approval_code: str, since_ms: int) -> bool:
+        """判断是否需要轮询同步：从未同步、需要向前补齐，或距上次同步超过 sync_interval"""
+        state = self.approval_cache.get_watermark(approval_code)
+        if state is None or since_ms < state['since_ms']:
+            return True
+        return time.time() - (state['synced_at'] or 0) >= self.sync_interval
+
+    def get_leave_index(self, approval_code: str, start_date: str, force_sync: bool = False) -> LeaveIndex:
+        """
+        从本地请假数据构建请假索引（必要时先增量同步）
+
+        Args:
+            approval_code: 请假审批定义编码
+            start_date: 需要查询的最早日期，格式 YYYY-MM-DD，同步范围会覆盖该日期前 lookback_days 天
+            force_sync: 忽略 sync_interval 立即增量同步（预热时使用）
+
+        Returns:
+            LeaveIndex: 请假区间索引（包含本地已同步的全部已通过请假）
+        """
+        tz = pytz.timezone('Asia/Shanghai')
+        range_start = tz.localize(datetime.strptime(start_date, '%Y-%m-%d')) - timedelta(days=self.lookback_days)
+        since_ms = min(int(range_start.timestamp() * 1000),
+                       int(time.time() * 1000) - self.lookback_days * 86400 * 1000)
+
+        with self._lock:
+            if force_sync or self.needs_sync(approval_code, since_ms):
+                self.sync(approval_code, since_ms=since_ms)
+
+        details = self.approval_cache.list_details(approval_code)
+
+        return LeaveIndex.from_details(self._with_own_open_ids(details, approval_code))
+
+    def _with_own_open_ids(self, details: List[Dict[str, Any]], approval_code: str) -> List[Dict[str, Any]]:
+        """
+        其他应用（如审批事件回调）写入的已通过请假，申请人 open_id 属于其他应用，替换为本应用的 open_id
+
+        本应用的 open_id 单独保存（不覆盖原记录），每个实例只拉取一次
+        """
+        app_id = self.client.app_id
+        foreign = {
+            detail['instance_code'] for detail in details
+            if detail['status'] == 'APPROVED' and detail.get('app_id') and detail['app_id'] != app_id
+        }
+        if not foreign:
+            return details
+
+        own_open_ids = self.approval_cache.app_open_ids(app_id, approval_code)
+        missing = [code for code in foreign if code not in own_open_ids]
+        if missing:
+            fetched, _ = self._fetch_details(missing, approval_code, force=True, store=False)
+            resolved = {detail['instance_code']: detail['open_id'] for detail in fetched if detail.get('open_id')}
+            self.approval_cache.put_app_open_ids(app_id, resolved)
+            own_open_ids.update(resolved)
+
+        return [
+            dict(detail, open_id=own_open_ids[detail['instance_code']])
+            if detail['instance_code'] in foreign and detail['instance_code'] in own_open_ids else detail
+            for detail in details
+        ]
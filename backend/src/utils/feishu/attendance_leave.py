@@ -0,0 +1,159 @@
+"""
+考勤请假查询
+
+通过飞书考勤「获取审批通过数据」接口（/attendance/v1/user_approvals/query）
+按人员批量查询日期范围内已通过的请假，几次调用即可覆盖整个名单：
+- 考勤接口使用 employee_id（用户 user_id），通过通讯录批量接口与 open_id 互相转换
+- 每批最多 50 人，日期范围按 30 天切分
+- 结果构建为 LeaveIndex，与审批实例方式的接口一致
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Iterable
+
+from src.utils.logging import set_stage
+from src.utils.feishu.leave_index import LeaveIndex
+from src.models import Stage
+
+
+class AttendanceLeave:
+    """基于考勤接口的批量请假查询"""
+
+    # 考勤接口单次最多查询的人数
+    BATCH_SIZE = 50
+    # 单次查询的最大日期跨度（天）
+    MAX_DAYS = 30
+
+    def __init__(self, client, batch_size: int = BATCH_SIZE):
+        """
+        初始化考勤请假查询
+
+        Args:
+            client: FeishuClient实例
+            batch_size: 每批查询的人数，默认50（接口上限）
+        """
+        self.client = client
+        self.batch_size = max(1, min(batch_size, self.BATCH_SIZE))
+
+        # open_id -> user_id 映射缓存（通讯录数据基本不变）
+        self._user_id_cache: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.log = set_stage(Stage.LEAVE_CHECK)
+
+    def _headers(self) -> dict:
+        """构造请求头"""
+        return {
+            "Authorization": f"Bearer {self.client.get_access_token()}",
+            "Content-Type": "application/json"
+        }
+
+    def _resolve_user_ids(self, open_ids: List[str]) -> Dict[str, str]:
+        """
+        批量将 open_id 转换为 user_id（通讯录批量获取用户接口）
+
+        Args:
+            open_ids: open_id 列表
+
+        Returns:
+            dict: {user_id: open_id}
+        """
+        with self._lock:
+            missing = [open_id for open_id in open_ids if open_id not in self._user_id_cache]
+
+        url = f"{self.client.base_url}/contact/v3/users/batch"
+        for i in range(0, len(missing), self.BATCH_SIZE):
+            batch = missing[i:i + self.BATCH_SIZE]
+            params = [("user_id_type", "open_id")] + [("user_ids", open_id) for open_id in batch]
+            response = self.client.session.get(url, headers=self._headers(), params=params)
+            result = response.json()
+
+            if result.get('code') != 0:
+                self.log.warning(f"   通讯录查询失败: code={result.get('code')}, msg={result.get('msg')}")
+                continue
+
+            with self._lock:
+                for item in result.get('data', {}).get('items', []) or []:
+                    if item.get('open_id') and item.get('user_id'):
+                        self._user_id_cache[item['open_id']] = item['user_id']
+
+        with self._lock:
+            return {
+                self._user_id_cache[open_id]: open_id
+                for open_id in open_ids if open_id in self._user_id_cache
+            }
+
+    @classmethod
+    def _date_windows(cls, start_date: str, end_date: str) -> List[tuple]:
+        """将日期范围切分为不超过 MAX_DAYS 天的窗口，返回 [(yyyyMMdd, yyyyMMdd), ...]"""
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+
+        windows = []
+        while start <= end:
+            window_end = min(end, start + timedelta(days=cls.MAX_DAYS - 1))
+            windows.append((int(start.strftime('%Y%m%d')), int(window_end.strftime('%Y%m%d'))))
+            start = window_end + timedelta(days=1)
+        return windows
+
+    def get_leave_index(self, start_date: str, end_date: str = None, open_ids: Iterable[str] = None) -> LeaveIndex:
+        """
+        查询人员名单在日期范围内已通过的请假，构建请假索引
+
+        Args:
+            start_date: 开始日期，格式 YYYY-MM-DD
+            end_date: 结束日期，格式同上，默认与开始日期相同
+            open_ids: 需要查询的人员 open_id 列表（考勤接口必须指定人员）
+
+        Returns:
+            LeaveIndex: 请假区间索引（以 open_id 为键）
+        """
+        end_date = end_date or start_date
+        index = LeaveIndex()
+
+        open_ids = list(dict.fromkeys(open_id for open_id in (open_ids or []) if open_id))
+        if not open_ids:
+            return index
+
+        user_to_open = self._resolve_user_ids(open_ids)
+        if not user_to_open:
+            self.log.warning("   未能获取人员的 user_id，无法查询考勤请假")
+            return index
+
+        url = f"{self.client.base_url}/attendance/v1/user_approvals/query"
+        user_ids = list(user_to_open)
+        call_count = 0
+
+        for date_from, date_to in self._date_windows(start_date, end_date):
+            for i in range(0, len(user_ids), self.batch_size):
+                body = {
+                    "user_ids": user_ids[i:i + self.batch_size],
+                    "check_date_from": date_from,
+                    "check_date_to": date_to
+                }
+                response = self.client.session.post(
+                    url,
+                    headers=self._headers(),
+                    params={"employee_type": "employee_id"},
+                    json=body
+                )
+                result = response.json()
+                call_count += 1
+
+                if result.get('code') != 0:
+                    self.log.warning(f"   考勤请假查询失败: code={result.get('code')}, msg={result.get('msg')}")
+                    continue
+
+                for approval in result.get('data', {}).get('user_approvals', []) or []:
+                    open_id = user_to_open.get(approval.get('user_id'))
+                    if not open_id:
+                        continue
+                    for leave in approval.get('leaves', []) or []:
+                        # 格式: "2025-10-24 09:00:00"
+                        start_time = leave.get('start_time', '')
+                        end_time = leave.get('end_time', '')
+                        if start_time and end_time:
+                            index.add(open_id, start_time, end_time)
+
+        self.log.debug(f"   考勤请假查询完成: {len(user_ids)} 人, {call_count} 次调用, {len(index)} 人有请假")
+        return index
@@ -0,0 +1,254 @@
+"""
+工时出勤矩阵
+
+将一段时间内的逐日检查结果整理为「人员 × 工作日」的 uint8 状态矩阵，统计全部基于 NumPy 向量化运算：
+- totals(): 每人各状态的天数
+- max_streaks(state): 每人某状态的最长连续天数（如最长连续未填写）
+- weekday_fill_rates(): 周一至周日各自的填写率
+- compare_teams(): 多个团队矩阵的横向对比
+
+状态码：
+- MISSING: 未填写
+- FILLED: 已填写
+- LEAVE: 请假（未填写但请假）
+- EXCEPTION: 例外日期
+- HOLIDAY: 节假日（整列）
+"""
+
+from datetime import date
+from typing import Dict, List, Any, Iterable, Optional
+
+import numpy as np
+
+from src.utils.feishu.leave_index import LeaveIndex, to_ordinal
+
+
+# 状态码
+MISSING = 0
+FILLED = 1
+LEAVE = 2
+EXCEPTION = 3
+HOLIDAY = 4
+
+STATE_NAMES = {
+    MISSING: 'missing',
+    FILLED: 'filled',
+    LEAVE: 'leave',
+    EXCEPTION: 'exception',
+    HOLIDAY: 'holiday'
+}
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+
+class AttendanceMatrix:
+    """人员 × 工作日的出勤状态矩阵"""
+
+    def __init__(self, users: List[str], dates: List[date], states: np.ndarray, leave: np.ndarray = None):
+        """
+        初始化矩阵（通常通过 from_daily_results 构建）
+
+        Args:
+            users: 人员姓名列表（行）
+            dates: 日期列表（列，按日期排序）
+            states: shape=(人数, 天数) 的 uint8 状态矩阵
+            leave: shape 同上的布尔矩阵，标记请假（不论当天是否填写），默认由 states 推出
+        """
+        self.users = list(users)
+        self.dates = list(dates)
+        self.states = states
+        self.leave = leave if leave is not None else states == LEAVE
+        self._row = {name: i for i, name in enumerate(self.users)}
+
+    @classmethod
+    def from_daily_results(cls, daily_results: Dict[str, Dict[str, Any]], users: Iterable[str] = None,
+                           leave_index: LeaveIndex = None,
+                           user_id_map: Dict[str, str] = None) -> 'AttendanceMatrix':
+        """
+        从逐日检查结果构建矩阵
+
+        Args:
+            daily_results: {日期: BitableAPI.check_users_filled 返回的检查结果}
+            users: 人员名单（可选），默认取检查结果中出现过的所有人员
+            leave_index: 请假索引（可选），补充标记检查结果中没有的请假
+            user_id_map: 姓名到 open_id 的映射，配合 leave_index 使用
+
+        Returns:
+            AttendanceMatrix 实例
+        """
+        date_strs = sorted(daily_results)
+        if users is None:
+            seen = {}
+            for date_str in date_strs:
+                result = daily_results[date_str]
+                for key in ('filled', 'not_filled', 'on_leave', 'exception_day'):
+                    for name in result.get(key, []) or []:
+                        seen.setdefault(name, None)
+            users = list(seen)
+        users = list(users)
+        row = {name: i for i, name in enumerate(users)}
+
+        states = np.full((len(users), len(date_strs)), MISSING, dtype=np.uint8)
+        leave = np.zeros(states.shape, dtype=bool)
+
+        for col, date_str in enumerate(date_strs):
+            result = daily_results[date_str]
+            if result.get('is_holiday'):
+                states[:, col] = HOLIDAY
+                continue
+            for key, state in (('on_leave', LEAVE), ('exception_day', EXCEPTION), ('filled', FILLED)):
+                rows = [row[name] for name in result.get(key, []) or [] if name in row]
+                if rows:
+                    states[rows, col] = state
+                    if state == LEAVE:
+                        leave[rows, col] = True
+
+        dates = [date.fromisoformat(date_str) for date_str in date_strs]
+
+        # 请假索引中的请假：整段区间一次性转换为列范围
+        if leave_index is not None and user_id_map and dates:
+            ordinals = np.array([day.toordinal() for day in dates])
+            first, last = dates[0], dates[-1]
+            for name, open_id in user_id_map.items():
+                i = row.get(name)
+                if i is None:
+                    continue
+                leave_ords = [to_ordinal(day) for day in leave_index.leave_dates(open_id, first, last)]
+                if leave_ords:
+                    leave[i] |= np.isin(ordinals, leave_ords)
+
+            # 请假且未填写（非例外、非节假日）的单元格记为请假
+            states[leave & (states == MISSING)] = LEAVE
+
+        return cls(users, dates, states, leave)
+
+    @property
+    def shape(self) -> tuple:
+        """(人数, 天数)"""
+        return self.states.shape
+
+    def _working_columns(self) -> np.ndarray:
+        """非节假日的列"""
+        if not self.states.size:
+            return np.ones(self.states.shape[1], dtype=bool)
+        return ~(self.states == HOLIDAY).all(axis=0)
+
+    def counts(self, state: int) -> np.ndarray:
+        """每人处于某状态的天数，shape=(人数,)"""
+        return (self.states == state).sum(axis=1)
+
+    def totals(self) -> Dict[str, Dict[str, int]]:
+        """
+        每人各状态的天数
+
+        Returns:
+            {姓名: {'filled': n, 'missing': n, 'leave': n, 'exception': n, 'holiday': n, 'leave_days': n}}
+            leave_days 为请假的工作日数（包括请假当天仍填写的情况）
+        """
+        # 每行按状态码计数：偏移后一次 bincount
+        n_users, n_days = self.states.shape
+        offsets = (np.arange(n_users, dtype=np.int64) * len(STATE_NAMES))[:, None]
+        counts = np.bincount(
+            (self.states.astype(np.int64) + offsets).ravel(),
+            minlength=n_users * len(STATE_NAMES)
+        ).reshape(n_users, len(STATE_NAMES))
+        leave_days = (self.leave & self._working_columns()).sum(axis=1)
+
+        totals = {}
+        for i, name in enumerate(self.users):
+            totals[name] = {STATE_NAMES[state]: int(counts[i, state]) for state in STATE_NAMES}
+            totals[name]['leave_days'] = int(leave_days[i])
+        return totals
+
+    def max_streaks(self, state: int = MISSING) -> Dict[str, int]:
+        """
+        每人某状态的最长连续天数（节假日列跳过，不打断连续）
+
+        Args:
+            state: 状态码，默认 MISSING（最长连续未填写）
+
+        Returns:
+            {姓名: 最长连续天数}
+        """
+        mask = (self.states[:, self._working_columns()] == state).astype(np.int8)
+        if not mask.size:
+            return {name: 0 for name in self.users}
+
+        # 两侧补 0 后求差分，+1 为连续段起点，-1 为终点后一位
+        padded = np.pad(mask, ((0, 0), (1, 1)))
+        diff = np.diff(padded, axis=1)
+        rows, starts = np.nonzero(diff == 1)
+        _, ends = np.nonzero(diff == -1)
+        longest = np.zeros(len(self.users), dtype=np.int64)
+        np.maximum.at(longest, rows, ends - starts)
+        return {name: int(longest[i]) for i, name in enumerate(self.users)}
+
+    def weekday_fill_rates(self) -> Dict[str, float]:
+        """
+        周一至周日各自的填写率（已填写 / 应填写，请假、例外和节假日不计入应填写）
+
+        Returns:
+            {'周一': 0.95, ...}（没有应填写记录的星期不返回）
+        """
+        weekdays = np.array([day.weekday() for day in self.dates], dtype=np.int64)
+        filled = np.bincount(weekdays, weights=(self.states == FILLED).sum(axis=0), minlength=7)
+        expected = np.bincount(
+            weekdays, weights=((self.states == FILLED) | (self.states == MISSING)).sum(axis=0), minlength=7
+        )
+        return {
+            WEEKDAY_NAMES[day]: round(float(filled[day] / expected[day]), 4)
+            for day in range(7) if expected[day] > 0
+        }
+
+    def fill_rate(self) -> float:
+        """整体填写率（已填写 / 应填写）"""
+        filled = int((self.states == FILLED).sum())
+        expected = filled + int((self.states == MISSING).sum())
+        return filled / expected if expected else 1.0
+
+    def daily_fill_rates(self) -> Dict[str, float]:
+        """每天的填写率 {YYYY-MM-DD: rate}"""
+        filled = (self.states == FILLED).sum(axis=0)
+        expected = filled + (self.states == MISSING).sum(axis=0)
+        rates = np.divide(filled, expected, out=np.ones(len(self.dates)), where=expected > 0)
+        return {day.strftime('%Y-%m-%d'): round(float(rate), 4) for day, rate in zip(self.dates, rates)}
+
+    def analytics(self) -> Dict[str, Any]:
+        """矩阵的主要统计（可直接序列化为 JSON）"""
+        missing_streaks = self.max_streaks(MISSING)
+        return {
+            'users': len(self.users),
+            'days': len(self.dates),
+            'fill_rate': round(self.fill_rate(), 4),
+            'weekday_fill_rates': self.weekday_fill_rates(),
+            'max_missing_streaks': {name: days for name, days in missing_streaks.items() if days}
+        }
+
+
+def compare_teams(matrices: Dict[str, AttendanceMatrix]) -> List[Dict[str, Any]]:
+    """
+    多个团队的横向对比（按整体填写率从高到低排序）
+
+    Args:
+        matrices: {团队名称: AttendanceMatrix}
+
+    Returns:
+        [{'team', 'users', 'days', 'fill_rate', 'perfect_rate', 'max_missing_streak', 'weekday_fill_rates'}, ...]
+    """
+    rows = []
+    for team, matrix in matrices.items():
+        n_users = len(matrix.users)
+        missing = matrix.counts(MISSING)
+        expected = matrix.counts(FILLED) + missing
+        streaks = matrix.max_streaks(MISSING)
+        rows.append({
+            'team': team,
+            'users': n_users,
+            'days': len(matrix.dates),
+            'fill_rate': round(matrix.fill_rate(), 4),
+            # 有应填写记录且从未漏填的人员比例
+            'perfect_rate': round(float(((missing == 0) & (expected > 0)).sum() / n_users), 4) if n_users else 1.0,
+            'max_missing_streak': max(streaks.values(), default=0),
+            'weekday_fill_rates': matrix.weekday_fill_rates()
+        })
+    return sorted(rows, key=lambda item: item['fill_rate'], reverse=True)
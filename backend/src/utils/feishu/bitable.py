@@ -3,22 +3,31 @@
 """
 
 import re
-import json
-import requests
-from datetime import datetime, timedelta
-from pathlib import Path
+import threading
+import time
+from datetime import datetime
 from urllib.parse import urlparse, parse_qs
-from typing import Optional, List, Dict, Any
-import pytz
-import chinese_calendar as calendar
+from typing import Optional, List, Dict, Any, Callable, Set
 from src.utils.logging import set_stage
+from src.utils.workday_calendar import workday_calendar
+from src.utils.feishu.approval_sync import ApprovalSync
+from src.utils.feishu.attendance_leave import AttendanceLeave
+from src.utils.feishu.leave_index import LeaveIndex
 from src.models import Stage
 
 
 class BitableAPI:
     """飞书多维表格API"""
     
-    def __init__(self, client, app_token: str = None, table_id: str = None, url: str = None, leave_approval_code: str = None):
+    # 工时记录的日期字段
+    RECORD_DATE_FIELD = "记录时间"
+    
+    def __init__(self, client, app_token: str = None, table_id: str = None, url: str = None, leave_approval_code: str = None,
+                 approval_cache=None, approval_concurrency: int = 8, approval_rate_limit: float = 20,
+                 approval_lookback_days: int = 30, approval_sync_interval: int = 3600,
+                 leave_provider: str = "approval", approval_sync: ApprovalSync = None,
+                 attendance_leave: AttendanceLeave = None, records_ttl: float = 1800,
+                 on_records_changed: Callable[[Set[str]], None] = None):
         """
         初始化多维表格API
         
@@ -28,6 +37,16 @@ class BitableAPI:
             table_id: 表格的table_id（可选）
             url: 飞书多维表格URL，如果提供则自动解析出app_token和table_id（可选）
             leave_approval_code: 请假审批定义编码，用于请假检测（可选）
+            approval_cache: 审批详情缓存（可选），默认使用全局 ApprovalCache
+            approval_concurrency: 并发获取审批详情的最大线程数，默认8，设为1则串行获取
+            approval_rate_limit: 审批详情接口每秒最大请求数，默认20，<=0 表示不限流
+            approval_lookback_days: 请假检测时向前同步的审批实例创建天数，默认30
+            approval_sync_interval: 请假检测时两次轮询同步审批的最小间隔（秒），默认3600
+            leave_provider: 请假数据来源，"approval"（审批实例，默认）或 "attendance"（考勤接口按人员批量查询）
+            approval_sync: 共享的审批同步器（可选），多个团队共用时传入，此时忽略上面的审批相关参数
+            attendance_leave: 共享的考勤请假查询（可选），多个团队共用时传入
+            records_ttl: 记录快照的有效期（秒），默认1800；有效期内按日期筛选时只增量拉取新增记录，<=0 不使用快照
+            on_records_changed: 同步快照时发现新增、修改或删除的记录后调用，参数为这些记录的日期集合（YYYY-MM-DD）
             
         示例:
             # 方式1: 直接传入URL（推荐）
@@ -38,6 +57,24 @@ class BitableAPI:
         """
         self.client = client
         self.leave_approval_code = leave_approval_code
+        self.approval_sync = approval_sync or ApprovalSync(
+            client,
+            approval_cache=approval_cache,
+            concurrency=approval_concurrency,
+            rate_limit=approval_rate_limit,
+            lookback_days=approval_lookback_days,
+            sync_interval=approval_sync_interval
+        )
+        self.leave_provider = leave_provider
+        self.attendance_leave = None
+        if leave_provider == "attendance":
+            self.attendance_leave = attendance_leave or AttendanceLeave(client)
+        
+        # 记录快照 {'pages': [(拉取该页使用的 page_token, 记录列表), ...], 'synced_at': 上次全量拉取时间}
+        self.records_ttl = records_ttl
+        self._records_snapshot: Optional[Dict[str, Any]] = None
+        self._records_lock = threading.Lock()
+        self.on_records_changed = on_records_changed
         
         # 初始化日志
         self.log = set_stage(Stage.BITABLE)
@@ -136,6 +173,49 @@ class BitableAPI:
             print(f"解析URL失败: {e}")
             return result
     
+    def _fetch_record_pages(self, view_id: str = None, page_token: str = None) -> Optional[List[tuple]]:
+        """
+        从 page_token 开始分页拉取记录（不转换时间戳）
+        
+        Returns:
+            [(拉取该页使用的 page_token, 记录列表), ...]，请求失败时返回 None
+        """
+        pages = []
+        page_num = 0
+        while True:
+            page_num += 1
+            access_token = self.client.get_access_token()
+            url = f"{self.client.base_url}/bitable/v1/apps/{self.app_token}/tables/{self.table_id}/records"
+            
+            headers = {
+                "Authorization": f"Bearer {access_token}",
+                "Content-Type": "application/json"
+            }
+            
+            params = {"page_size": 500}  # 使用最大值
+            if view_id:
+                params["view_id"] = view_id
+            if page_token:
+                params["page_token"] = page_token
+            
+            response = self.client.session.get(url, headers=headers, params=params)
+            result = response.json()
+            
+            if result.get("code") != 0:
+                self.log.error(f"获取多维表格记录失败")
+                self.log.debug(f"   错误代码: {result.get('code')}")
+                self.log.debug(f"   错误信息: {result.get('msg')}")
+                return None
+            
+            items = result.get('data', {}).get('items') or []
+            pages.append((page_token, items))
+            self.log.debug(f"  获取第 {page_num} 页，{len(items)} 条记录")
+            
+            # 检查是否有下一页
+            if not result.get('data', {}).get('has_more', False):
+                return pages
+            page_token = result.get('data', {}).get('page_token')
+    
     def get_all_records(self, view_id: str = None, convert_timestamp: bool = True):
         """
         获取多维表格的所有记录（自动分页）
@@ -151,49 +231,11 @@ class BitableAPI:
             self.log.error("缺少app_token或table_id，请在初始化时设置")
             return []
         
-        all_items = []
-        page_token = None
-        page_num = 0
-        
         try:
-            while True:
-                page_num += 1
-                access_token = self.client.get_access_token()
-                url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.app_token}/tables/{self.table_id}/records"
-                
-                headers = {
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json"
-                }
-                
-                params = {"page_size": 500}  # 使用最大值
-                if view_id:
-                    params["view_id"] = view_id
-                if page_token:
-                    params["page_token"] = page_token
-                
-                response = requests.get(url, headers=headers, params=params)
-                result = response.json()
-                
-                if result.get("code") == 0:
-                    items = result.get('data', {}).get('items', [])
-                    all_items.extend(items)
-                    
-                    # 检查是否有下一页
-                    has_more = result.get('data', {}).get('has_more', False)
-                    page_token = result.get('data', {}).get('page_token')
-                    
-                    self.log.debug(f"  获取第 {page_num} 页，{len(items)} 条记录")
-                    
-                    if not has_more:
-                        break
-                else:
-                    error_code = result.get("code")
-                    error_msg = result.get("msg")
-                    self.log.error(f"获取多维表格记录失败")
-                    self.log.debug(f"   错误代码: {error_code}")
-                    self.log.debug(f"   错误信息: {error_msg}")
-                    return []
+            pages = self._fetch_record_pages(view_id=view_id)
+            if pages is None:
+                return []
+            all_items = [item for _, items in pages for item in items]
             
             # 如果需要转换时间戳
             if convert_timestamp:
@@ -208,6 +250,70 @@ class BitableAPI:
             self.log.error(f"获取多维表格记录失败: {e}")
             return []
     
+    def sync_records(self, full: bool = False) -> List[Dict[str, Any]]:
+        """
+        同步记录快照并返回全部记录（未转换时间戳，调用方不要修改返回的记录）
+        
+        新记录追加在表格末尾：快照有效期（records_ttl）内只从快照的最后一页开始重新拉取；
+        超过有效期（使修改和删除的记录生效）、full=True 或增量拉取失败时全量拉取。
+        
+        Args:
+            full: 是否强制全量拉取（预热时使用）
+        
+        Returns:
+            全部记录列表，拉取失败时返回空列表
+        """
+        if not self.app_token or not self.table_id:
+            self.log.error("缺少app_token或table_id，请在初始化时设置")
+            return []
+        if self.records_ttl <= 0:
+            return self.get_all_records(convert_timestamp=False)
+        
+        with self._records_lock:
+            snapshot = self._records_snapshot
+            fresh = snapshot is not None and time.time() - snapshot['synced_at'] < self.records_ttl
+            pages = None
+            try:
+                if fresh and not full:
+                    tail = self._fetch_record_pages(page_token=snapshot['pages'][-1][0])
+                    if tail is not None:
+                        pages = snapshot['pages'][:-1] + tail
+                        self.log.debug(f"  增量同步记录快照：重新拉取 {len(tail)} 页")
+                        self._records_snapshot = {'pages': pages, 'synced_at': snapshot['synced_at']}
+                if pages is None:
+                    synced_at = time.time()
+                    pages = self._fetch_record_pages()
+                    if pages is None:
+                        return []
+                    self._records_snapshot = {'pages': pages, 'synced_at': synced_at}
+            except Exception as e:
+                self.log.error(f"同步多维表格记录失败: {e}")
+                return []
+            
+            records = [item for _, items in pages for item in items]
+            changed_dates = self._changed_record_dates(snapshot, records) if snapshot is not None else set()
+        
+        if changed_dates and self.on_records_changed:
+            try:
+                self.on_records_changed(changed_dates)
+            except Exception as e:
+                self.log.warning(f"记录变化回调失败: {e}")
+        return records
+    
+    def _changed_record_dates(self, snapshot: Dict[str, Any], records: List[Dict[str, Any]]) -> Set[str]:
+        """对比旧快照与新记录，返回新增、修改、删除的记录的日期（RECORD_DATE_FIELD）"""
+        old = {item.get('record_id'): item for _, items in snapshot['pages'] for item in items}
+        new = {item.get('record_id'): item for item in records}
+        changed = [item for record_id, item in new.items() if old.get(record_id) != item]
+        changed.extend(item for record_id, item in old.items() if record_id not in new)
+        
+        dates = set()
+        for item in changed:
+            record_time = (item.get('fields') or {}).get(self.RECORD_DATE_FIELD)
+            if isinstance(record_time, (int, float)):
+                dates.add(datetime.fromtimestamp(record_time / 1000).strftime('%Y-%m-%d'))
+        return dates
+    
     def get_records(self, view_id: str = None, page_size: int = 100, convert_timestamp: bool = True):
         """
         获取多维表格的记录列表
@@ -223,7 +329,7 @@ class BitableAPI:
         
         try:
             access_token = self.client.get_access_token()
-            url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.app_token}/tables/{self.table_id}/records"
+            url = f"{self.client.base_url}/bitable/v1/apps/{self.app_token}/tables/{self.table_id}/records"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -234,7 +340,7 @@ class BitableAPI:
             if view_id:
                 params["view_id"] = view_id
             
-            response = requests.get(url, headers=headers, params=params)
+            response = self.client.session.get(url, headers=headers, params=params)
             result = response.json()
             
             if result.get("code") == 0:
@@ -284,7 +390,7 @@ class BitableAPI:
         
         try:
             access_token = self.client.get_access_token()
-            url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.app_token}/tables/{self.table_id}/records/search"
+            url = f"{self.client.base_url}/bitable/v1/apps/{self.app_token}/tables/{self.table_id}/records/search"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -305,7 +411,7 @@ class BitableAPI:
                 }
             }
             
-            response = requests.post(url, headers=headers, json=data)
+            response = self.client.session.post(url, headers=headers, json=data)
             result = response.json()
             
             if result.get("code") == 0:
@@ -319,7 +425,8 @@ class BitableAPI:
             self.log.error(f"搜索多维表格记录失败: {e}")
             return []
     
-    def get_records_by_date(self, date_field: str, start_date: str, end_date: str = None, convert_timestamp: bool = True):
+    def get_records_by_date(self, date_field: str, start_date: str, end_date: str = None, convert_timestamp: bool = True,
+                            all_records: List[Dict[str, Any]] = None):
         """
         根据日期范围获取记录
         
@@ -328,6 +435,7 @@ class BitableAPI:
             start_date: 开始日期，格式 YYYY-MM-DD 或 YYYY-MM-DD HH:MM:SS
             end_date: 结束日期，格式同上，如果不提供则只筛选start_date当天
             convert_timestamp: 是否自动转换时间戳为日期格式，默认True
+            all_records: 已同步的全部记录（可选，sync_records 的返回值），不提供则同步记录快照
             
         Returns:
             符合条件的记录列表
@@ -358,9 +466,10 @@ class BitableAPI:
                 end_dt = start_dt.replace(hour=23, minute=59, second=59)
                 end_ts = int(end_dt.timestamp() * 1000)
             
-            # 获取所有记录（自动分页，不转换时间戳，用于筛选）
-            print(f"正在获取所有记录以筛选日期...")
-            all_records = self.get_all_records(convert_timestamp=False)
+            # 获取所有记录（记录快照，有效期内只增量拉取新增记录；不转换时间戳，用于筛选）
+            if all_records is None:
+                print(f"正在获取所有记录以筛选日期...")
+                all_records = self.sync_records()
             
             # 筛选符合日期范围的记录
             filtered_records = []
@@ -370,9 +479,9 @@ class BitableAPI:
                 
                 if isinstance(record_time, (int, float)):
                     if start_ts <= record_time <= end_ts:
-                        # 如果需要转换时间戳
+                        # 如果需要转换时间戳（不修改快照中的记录）
                         if convert_timestamp:
-                            record['fields'] = self._convert_fields_timestamps(fields)
+                            record = dict(record, fields=self._convert_fields_timestamps(fields))
                         filtered_records.append(record)
             
             self.log.success(f"根据日期筛选成功，找到 {len(filtered_records)} 条记录")
@@ -401,7 +510,7 @@ class BitableAPI:
     def is_holiday(date_str: str) -> bool:
         """
         判断是否为节假日（非工作日）
-        使用 chinesecalendar 库，支持中国法定节假日和调休
+        使用预计算的工作日日历（chinesecalendar + 本地覆盖文件），支持中国法定节假日和调休
         
         Args:
             date_str: 日期字符串，格式 YYYY-MM-DD
@@ -411,179 +520,99 @@ class BitableAPI:
         
         说明:
             - 法定节假日（元旦、春节、清明、劳动节、端午、中秋、国庆）→ True
-            - 普通周末 → True
-            - 调休工作日（如国庆前的周六上班）→ False
+            - 普通周末、公司额外放假 → True
+            - 调休工作日（如国庆前的周六上班）、公司额外工作日 → False
         """
-        try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            # 使用 is_workday() 的反向逻辑
-            # is_workday() 会正确处理调休：
-            # - 正常工作日 → True
-            # - 调休的周末（要上班）→ True
-            # - 法定节假日 → False
-            # - 普通周末 → False
-            is_work = calendar.is_workday(date_obj)
-            is_hol = not is_work
-            
-            if is_hol:
-                # 获取节假日详情
-                detail = calendar.get_holiday_detail(date_obj)
-                if detail and detail[0]:  # (True, 'Holiday Name')
-                    holiday_name = detail[1] if detail[1] else '休息日'
-                    # 转换英文节假日名称为中文
-                    name_map = {
-                        'New Year\'s Day': '元旦',
-                        'Spring Festival': '春节',
-                        'Tomb-sweeping Day': '清明节',
-                        'Labour Day': '劳动节',
-                        'Dragon Boat Festival': '端午节',
-                        'Mid-autumn Festival': '中秋节',
-                        'National Day': '国庆节'
-                    }
-                    holiday_name = name_map.get(holiday_name, holiday_name)
-                    print(f"{date_str} 是{holiday_name}，无需检查")
-                else:
-                    print(f"{date_str} 是休息日，无需检查")
-            
-            return is_hol
-                
-        except Exception as e:
-            # 异常情况，fallback 到周末判断
-            print(f"判断节假日时出错: {e}，使用周末判断")
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            is_weekend = date_obj.weekday() >= 5
-            if is_weekend:
-                print(f"{date_str} 是周末，无需检查")
-            return is_weekend
+        is_hol = workday_calendar.is_holiday(date_str)
+        if is_hol:
+            holiday_name = workday_calendar.holiday_name(date_str) or '休息日'
+            print(f"{date_str} 是{holiday_name}，无需检查")
+        return is_hol
     
-    def get_leave_users_on_date(self, date_str: str, config_path: str = None) -> tuple[set, dict]:
+    def get_leave_index(self, start_date: str, end_date: str = None, open_ids: list = None,
+                        refresh: bool = False) -> LeaveIndex:
         """
-        获取指定日期所有请假人员的 open_id 集合（一次性查询）
+        获取请假区间索引
+        
+        数据来源由 leave_provider 决定：
+        - approval: 从本地请假数据构建，必要时先增量同步审批实例
+        - attendance: 按人员名单批量查询考勤接口（必须提供 open_ids）；没有 open_ids 时
+          如果配置了请假审批编码，退回使用审批实例构建
         
         Args:
-            date_str: 日期字符串，格式 YYYY-MM-DD
-            config_path: （已弃用，保留用于向后兼容）
+            start_date: 开始日期，格式 YYYY-MM-DD
+            end_date: 结束日期，格式同上，默认与开始日期相同
+            open_ids: 需要查询的人员 open_id 列表（attendance 方式必填，approval 方式忽略）
+            refresh: approval 方式下忽略同步间隔，立即增量同步审批（预热时使用）
         
         Returns:
-            tuple: (请假人员的 open_id 集合, open_id 到姓名的映射字典)
+            LeaveIndex: 请假区间索引；未配置数据来源或查询失败时返回空索引
+        
+        示例:
+            # 月度总结只需构建一次索引，逐日查询
+            leave_index = bitable.get_leave_index("2025-09-28", "2025-10-27")
+            leave_index.users_on("2025-10-08")
         """
         try:
-            # 初始化映射字典
-            id_to_name = {}
-            
-            # 转换日期为时间戳（毫秒）
-            tz = pytz.timezone('Asia/Shanghai')
-            check_date = datetime.strptime(date_str, '%Y-%m-%d')
-            check_date = tz.localize(check_date)
-            
-            # 查询时间范围：前后各7天
-            start_date = check_date - timedelta(days=7)
-            end_date = check_date + timedelta(days=7)
-            start_timestamp = int(start_date.timestamp() * 1000)
-            end_timestamp = int(end_date.timestamp() * 1000)
+            if self.attendance_leave is not None and (open_ids or not self.leave_approval_code):
+                return self.attendance_leave.get_leave_index(start_date, end_date, open_ids)
+            if self.attendance_leave is not None:
+                self.log.warning("   没有人员 open_id，考勤接口无法查询，改用审批实例构建请假索引")
             
-            # 如果没有配置请假审批编码，返回空集合
+            # 如果没有配置请假审批编码，返回空索引
             if not self.leave_approval_code:
-                return set(), id_to_name
-            
-            # 调用飞书审批 API 查询审批实例
-            token = self.client.get_access_token()
-            
-            url = "https://open.feishu.cn/open-apis/approval/v4/instances"
-            
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            params = {
-                "approval_code": self.leave_approval_code,
-                "start_time": str(start_timestamp),
-                "end_time": str(end_timestamp),
-                "page_size": 100
-            }
-            
-            response = requests.get(url, headers=headers, params=params)
-            result = response.json()
-            
-            # 检查API返回的错误
-            if result.get('code') != 0:
-                error_msg = result.get('msg', 'Unknown error')
-                self.log.debug(f"   审批API返回错误: code={result.get('code')}, msg={error_msg}")
-                return set(), {}
-            
-            # 检查是否有审批实例编码
-            instance_codes = result.get('data', {}).get('instance_code_list', [])
-            if not instance_codes:
-                return set(), {}
-            
-            self.log.debug(f"   找到 {len(instance_codes)} 条审批记录，正在解析...")
-            
-            leave_users = set()
-            id_to_name = {}  # open_id 到姓名的映射
-            
-            # 遍历每个审批实例，提取当天请假的人员
-            for instance_code in instance_codes:
-                try:
-                    # 获取审批实例详情
-                    detail_url = f"https://open.feishu.cn/open-apis/approval/v4/instances/{instance_code}"
-                    detail_params = {"user_id_type": "open_id"}
-                    detail_response = requests.get(detail_url, headers=headers, params=detail_params)
-                    detail_result = detail_response.json()
-                    
-                    if detail_result.get('code') != 0:
-                        continue
-                    
-                    instance = detail_result.get('data', {})
-                    
-                    # 只处理已通过的审批
-                    if instance.get('status') != 'APPROVED':
-                        continue
-                    
-                    # 获取申请人 open_id
-                    applicant_open_id = instance.get('open_id')
-                    
-                    # 解析审批表单（form 是 JSON 字符串）
-                    form_str = instance.get('form', '[]')
-                    try:
-                        form_data = json.loads(form_str) if isinstance(form_str, str) else form_str
-                        
-                        # 查找请假表单组件（leaveGroupV2）
-                        for widget in form_data:
-                            if widget.get('type') == 'leaveGroupV2':
-                                leave_info = widget.get('value', {})
-                                
-                                # 直接从 value 中获取请假时间
-                                start_str = leave_info.get('start', '')
-                                end_str = leave_info.get('end', '')
-                                leave_type = leave_info.get('name', '')
-                                
-                                if start_str and end_str:
-                                    # 解析 ISO 格式时间
-                                    leave_start = datetime.strptime(start_str[:19], '%Y-%m-%dT%H:%M:%S')
-                                    leave_end = datetime.strptime(end_str[:19], '%Y-%m-%dT%H:%M:%S')
-                                    leave_start = tz.localize(leave_start)
-                                    leave_end = tz.localize(leave_end)
-                                    
-                                    # 检查是否包含查询日期
-                                    if leave_start.date() <= check_date.date() <= leave_end.date():
-                                        leave_users.add(applicant_open_id)
-                                        break
-                                        
-                    except Exception as e:
-                        continue
-                
-                except Exception as e:
-                    continue
-            
-            return leave_users, id_to_name
+                return LeaveIndex()
             
+            return self.approval_sync.get_leave_index(self.leave_approval_code, start_date, force_sync=refresh)
         except Exception as e:
-            self.log.debug(f"   获取请假人员失败: {e}")
+            self.log.debug(f"   构建请假索引失败: {e}")
             import traceback
             traceback.print_exc()
-            return set(), {}
+            return LeaveIndex()
+    
+    def get_leave_users_on_date(self, date_str: str, config_path: str = None, open_ids: list = None) -> tuple[set, dict]:
+        """
+        获取指定日期所有请假人员的 open_id 集合（一次性查询）
+        
+        Args:
+            date_str: 日期字符串，格式 YYYY-MM-DD
+            config_path: （已弃用，保留用于向后兼容）
+            open_ids: 需要查询的人员 open_id 列表（attendance 方式必填）
+        
+        Returns:
+            tuple: (请假人员的 open_id 集合, open_id 到姓名的映射字典)
+        """
+        leave_index = self.get_leave_index(date_str, open_ids=open_ids)
+        return leave_index.users_on(date_str), {}
+    
+    def check_users_on_leave(self, open_ids: list, start_date: str, end_date: str = None,
+                             leave_index: LeaveIndex = None) -> Dict[str, List[str]]:
+        """
+        批量检查多个用户在日期（范围）内的请假情况（共享一次请假查询）
+        
+        Args:
+            open_ids: 用户 open_id 列表
+            start_date: 开始日期，格式 YYYY-MM-DD
+            end_date: 结束日期，格式同上，默认与开始日期相同
+            leave_index: 预先构建的请假区间索引（可选），不提供则查询一次
+        
+        Returns:
+            dict: {open_id: [请假日期 YYYY-MM-DD, ...]}，未请假的用户为空列表
+        
+        示例:
+            leave_map = bitable.check_users_on_leave(["ou_xxx", "ou_yyy"], "2025-10-01", "2025-10-31")
+            # {"ou_xxx": ["2025-10-09", "2025-10-10"], "ou_yyy": []}
+        """
+        end_date = end_date or start_date
+        open_ids = [open_id for open_id in open_ids if open_id]
+        if leave_index is None:
+            leave_index = self.get_leave_index(start_date, end_date, open_ids=open_ids)
+        
+        leave_map = {}
+        for open_id in open_ids:
+            dates = leave_index.leave_dates(open_id, start_date, end_date)
+            leave_map[open_id] = [day.strftime('%Y-%m-%d') for day in dates]
+        return leave_map
     
     def check_user_on_leave(self, user_id: str, date_str: str) -> bool:
         """
@@ -596,137 +625,40 @@ class BitableAPI:
         Returns:
             bool: True 表示请假，False 表示未请假
         """
-        try:
-            # 转换日期为时间戳（毫秒）
-            tz = pytz.timezone('Asia/Shanghai')
-            check_date = datetime.strptime(date_str, '%Y-%m-%d')
-            check_date = tz.localize(check_date)
-            
-            # 查询时间范围：前后各30天（单位：毫秒）
-            start_date = check_date - timedelta(days=30)
-            end_date = check_date + timedelta(days=30)
-            start_timestamp = int(start_date.timestamp() * 1000)  # 毫秒级时间戳
-            end_timestamp = int(end_date.timestamp() * 1000)      # 毫秒级时间戳
-            
-            # 调用飞书审批 API 查询用户的审批实例
-            token = self.client.get_access_token()
-            
-            url = "https://open.feishu.cn/open-apis/approval/v4/instances"
-            
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            # 如果没有配置请假审批编码，跳过检查
-            if not self.leave_approval_code:
-                return False
-            
-            # 飞书审批 API 不支持按申请人过滤，需要查询所有记录后手动过滤
-            # 为了提升性能，将时间范围缩小到7天，page_size 设为100
-            # 前后各7天
-            start_date_short = check_date - timedelta(days=7)
-            end_date_short = check_date + timedelta(days=7)
-            start_timestamp_short = int(start_date_short.timestamp() * 1000)
-            end_timestamp_short = int(end_date_short.timestamp() * 1000)
-            
-            params = {
-                "approval_code": self.leave_approval_code,
-                "start_time": str(start_timestamp_short),
-                "end_time": str(end_timestamp_short),
-                "page_size": 100
-            }
-            
-            response = requests.get(url, headers=headers, params=params)
-            result = response.json()
-            
-            # 调试信息（生产环境可关闭）
-            # self.log.debug(f"   请求URL: {url}")
-            # self.log.debug(f"   请求参数: {json.dumps(params, ensure_ascii=False, indent=2)}")
-            # self.log.debug(f"   响应: {json.dumps(result, ensure_ascii=False, indent=2)}")
-            
-            # 检查API返回的错误
-            if result.get('code') != 0:
-                error_msg = result.get('msg', 'Unknown error')
-                self.log.debug(f"   审批API返回错误: code={result.get('code')}, msg={error_msg}")
-                # self.log.debug(f"   完整响应: {json.dumps(result, ensure_ascii=False, indent=2)}")
-                return False
-            
-            # 检查是否有审批实例编码
-            instance_codes = result.get('data', {}).get('instance_code_list', [])
-            if not instance_codes:
-                self.log.debug(f"   ℹ️ 该用户在查询时间范围内没有审批记录")
-                return False  # 没有审批记录
-            
-            self.log.debug(f"   找到 {len(instance_codes)} 条审批记录")
-            
-            # 遍历每个审批实例，获取详情并判断请假时间
-            # 如果找到匹配的请假记录，立即返回 True
-            for idx, instance_code in enumerate(instance_codes, 1):
-                try:
-                    # 获取审批实例详情
-                    detail_url = f"https://open.feishu.cn/open-apis/approval/v4/instances/{instance_code}"
-                    detail_params = {"user_id_type": "open_id"}
-                    detail_response = requests.get(detail_url, headers=headers, params=detail_params)
-                    detail_result = detail_response.json()
-                    
-                    if detail_result.get('code') != 0:
-                        continue
-                    
-                    instance = detail_result.get('data', {})
-                    
-                    # 检查是否是目标用户的审批
-                    if instance.get('open_id') != user_id:
-                        continue
-                    
-                    # 只处理已通过的审批
-                    if instance.get('status') != 'APPROVED':
-                        continue
-                    
-                    # 解析审批表单（form 是 JSON 字符串）
-                    form_str = instance.get('form', '[]')
-                    try:
-                        form_data = json.loads(form_str) if isinstance(form_str, str) else form_str
-                        
-                        # 查找请假表单组件（leaveGroupV2）
-                        for widget in form_data:
-                            if widget.get('type') == 'leaveGroupV2':
-                                leave_info = widget.get('value', {})
-                                
-                                # 直接从 value 中获取请假时间
-                                start_str = leave_info.get('start', '')  # 格式: "2025-10-24T00:00:00+08:00"
-                                end_str = leave_info.get('end', '')      # 格式: "2025-10-24T12:00:00+08:00"
-                                leave_type = leave_info.get('name', '')
-                                
-                                if start_str and end_str:
-                                    # 解析 ISO 格式时间（去掉时区信息后解析）
-                                    leave_start = datetime.strptime(start_str[:19], '%Y-%m-%dT%H:%M:%S')
-                                    leave_end = datetime.strptime(end_str[:19], '%Y-%m-%dT%H:%M:%S')
-                                    leave_start = tz.localize(leave_start)
-                                    leave_end = tz.localize(leave_end)
-                                    
-                                    # 检查是否包含查询日期
-                                    if leave_start.date() <= check_date.date() <= leave_end.date():
-                                        self.log.debug(f"   检测到请假: {leave_type} ({leave_start.date()} ~ {leave_end.date()})")
-                                        return True
-                                        
-                    except Exception as e:
-                        continue
-                
-                except Exception as e:
-                    # 单个实例查询失败，继续处理下一个
-                    continue
-            
-            return False  # 没有找到匹配的请假记录
-            
-        except Exception as e:
-            self.log.debug(f"   检查请假状态失败 ({user_id}): {e}")
-            import traceback
-            return False  # 出错时认为未请假
+        on_leave = bool(self.check_users_on_leave([user_id], date_str).get(user_id))
+        if on_leave:
+            self.log.debug(f"   检测到请假: {user_id} 在 {date_str} 请假")
+        return on_leave
+    
+    @staticmethod
+    def build_user_id_map(records: List[Dict[str, Any]], user_field: str = "员工") -> Dict[str, str]:
+        """
+        从记录的人员字段建立姓名到 open_id 的映射（同名取第一次出现的记录）
+        
+        Args:
+            records: 记录列表
+            user_field: 用户字段名，默认"员工"
+        
+        Returns:
+            {姓名: open_id}
+        """
+        user_id_map = {}
+        for record in records:
+            user_info = record.get('fields', {}).get(user_field, {})
+            if isinstance(user_info, list):
+                user_info = user_info[0] if user_info else {}
+            if not isinstance(user_info, dict):
+                continue
+            user_name = user_info.get('name', '')
+            user_id = user_info.get('id', '')
+            if user_name and user_id and user_name not in user_id_map:
+                user_id_map[user_name] = user_id
+        return user_id_map
     
     def check_users_filled(self, user_names: list = None, date_str: str = None, user_field: str = "员工", 
                           exceptions: dict = None, skip_holiday_check: bool = False, 
-                          external_user_id_map: dict = None):
+                          external_user_id_map: dict = None, leave_index: LeaveIndex = None,
+                          all_records: list = None):
         """
         检查指定人员名单是否都填写了某日期的记录
         
@@ -737,6 +669,8 @@ class BitableAPI:
             exceptions: 例外日期配置，格式: {"姓名": ["星期一", "星期二"]}
             skip_holiday_check: 是否跳过节假日检查，默认False
             external_user_id_map: 外部提供的姓名到open_id的映射，用于@功能和请假检测
+            leave_index: 预先构建的请假区间索引（可选），批量检查多天时共享，不提供则按日期查询审批
+            all_records: 已同步的全部记录（可选，sync_records 的返回值），不提供则同步记录快照
             
         Returns:
             dict: 包含已填写、未填写人员信息的字典
@@ -836,28 +770,13 @@ class BitableAPI:
                 # 如果没有外部映射，从Bitable历史记录中建立映射
                 self.log.info("正在从Bitable记录获取用户ID映射...")
                 all_recent_records = self.get_records(page_size=500)  # 获取最近500条记录来建立映射
-                user_id_map = {}  # 存储姓名到user_id的映射
-                
-                for record in all_recent_records:
-                    fields = record.get('fields', {})
-                    user_info = fields.get(user_field, {})
-                    
-                    # 提取user_id
-                    if isinstance(user_info, dict):
-                        user_name = user_info.get('name', '')
-                        user_id = user_info.get('id', '')
-                        if user_name and user_id and user_name not in user_id_map:
-                            user_id_map[user_name] = user_id
-                    elif isinstance(user_info, list) and len(user_info) > 0:
-                        user_name = user_info[0].get('name', '') if isinstance(user_info[0], dict) else ''
-                        user_id = user_info[0].get('id', '') if isinstance(user_info[0], dict) else ''
-                        if user_name and user_id and user_name not in user_id_map:
-                            user_id_map[user_name] = user_id
+                user_id_map = self.build_user_id_map(all_recent_records, user_field)
                 
                 self.log.success(f"已从Bitable建立 {len(user_id_map)} 个用户的ID映射")
             
             # 获取指定日期的所有记录
-            records = self.get_records_by_date("记录时间", date_str, convert_timestamp=False)
+            records = self.get_records_by_date(self.RECORD_DATE_FIELD, date_str, convert_timestamp=False,
+                                               all_records=all_records)
             
             # 提取已填写的人员姓名
             filled_users = set()
@@ -912,8 +831,13 @@ class BitableAPI:
             if not_filled_with_id and date_str:
                 print(f"\n检查未填写人员的请假状态...")
                 
-                # 一次性获取当天所有请假人员的 open_id 集合和姓名映射
-                leave_user_ids, leave_id_to_name = self.get_leave_users_on_date(date_str, None)
+                # 一次性获取当天所有请假人员的 open_id 集合和姓名映射（优先使用共享的请假索引）
+                if leave_index is not None:
+                    leave_user_ids, leave_id_to_name = leave_index.users_on(date_str), {}
+                else:
+                    leave_user_ids, leave_id_to_name = self.get_leave_users_on_date(
+                        date_str, None, open_ids=[u.get('user_id') for u in not_filled_with_id]
+                    )
                 
                 if leave_user_ids:
                     print(f"\n   开始匹配未填写人员...")
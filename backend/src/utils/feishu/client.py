@@ -5,23 +5,38 @@
 
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from src.utils.logging import set_stage
+from src.utils.feishu.api_metrics import api_metrics
 from src.models import Stage
 
 
 class FeishuClient:
     """飞书API客户端"""
     
-    def __init__(self, app_id: str, app_secret: str):
+    BASE_URL = "https://open.feishu.cn/open-apis"
+    
+    def __init__(self, app_id: str, app_secret: str, base_url: str = None):
         """
         初始化飞书客户端
         
         Args:
             app_id: 飞书应用ID
             app_secret: 飞书应用密钥
+            base_url: 开放平台接口地址（可选），默认为飞书开放平台，压测时可指向本地替身服务
         """
         self.app_id = app_id
         self.app_secret = app_secret
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
+        
+        # 复用 HTTP 连接（keep-alive），并发请求时连接池大小与并发数匹配
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # 每次调用记录接口、耗时、状态码和响应字节数，归属到当前任务运行
+        self.session.hooks['response'].append(api_metrics.response_hook)
         
         # 初始化日志
         self.log = set_stage(Stage.FEISHU_AUTH)
@@ -32,17 +47,22 @@ class FeishuClient:
             "expires_at": 0
         }
     
-    def get_access_token(self) -> str:
-        """获取飞书访问令牌"""
+    def get_access_token(self, min_ttl: float = 0) -> str:
+        """
+        获取飞书访问令牌
+        
+        Args:
+            min_ttl: 缓存的令牌剩余有效期不足该秒数时提前刷新（预热时使用），默认0
+        """
         current_time = time.time()
         
         # 如果令牌还有效，直接返回缓存的令牌
         if (self._access_token_cache["token"] and 
-            current_time < self._access_token_cache["expires_at"]):
+            current_time + min_ttl < self._access_token_cache["expires_at"]):
             return self._access_token_cache["token"]
         
         # 获取新的访问令牌
-        url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
+        url = f"{self.base_url}/auth/v3/tenant_access_token/internal"
         headers = {"Content-Type": "application/json"}
         data = {
             "app_id": self.app_id,
@@ -50,7 +70,7 @@ class FeishuClient:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             result = response.json()
             
             if result.get("code") == 0:
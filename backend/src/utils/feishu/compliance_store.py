@@ -0,0 +1,168 @@
+"""
+工时合规日结果存储
+
+将每天的工时检查结果按 (团队, 日期) 持久化到本地 SQLite：
+- 保存已填写、未填写、请假、例外、节假日标记等完整检查结果
+- 月度/季度/年度总结直接读取已定型的日期（检查时间晚于补填窗口），只重新计算缺失、未定型或被标记为 dirty 的日期
+- 请假变化（审批回调、轮询同步发现的新请假或撤销）和多维表格记录变化时将相关日期标记为 dirty
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union
+
+from src.utils.feishu.approval_cache import DEFAULT_DATA_DIR
+
+
+DateLike = Union[str, date, datetime]
+
+
+def _to_date_str(value: DateLike) -> str:
+    """日期统一转换为 YYYY-MM-DD 字符串"""
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    return value[:10]
+
+
+class ComplianceStore:
+    """工时合规日结果存储（SQLite 持久化）"""
+
+    def __init__(self, db_path: str = None):
+        """
+        初始化日结果存储
+
+        Args:
+            db_path: SQLite 文件路径，默认为 backend/data/labor_compliance.db
+        """
+        self.db_path = Path(db_path) if db_path else DEFAULT_DATA_DIR / "labor_compliance.db"
+
+        # 延迟建立连接，避免导入模块时就创建文件
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """获取数据库连接（首次调用时建表）"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daily_compliance (
+                    team TEXT,
+                    date TEXT,
+                    is_holiday INTEGER,
+                    fill_rate REAL,
+                    result TEXT,
+                    checked_at REAL,
+                    dirty INTEGER DEFAULT 0,
+                    PRIMARY KEY (team, date)
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def put_day(self, team: str, date_str: DateLike, result: Dict[str, Any]):
+        """
+        保存某个团队某天的检查结果（覆盖旧结果并清除 dirty 标记）
+
+        Args:
+            team: 团队名称
+            date_str: 日期
+            result: BitableAPI.check_users_filled 返回的检查结果
+        """
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO daily_compliance
+                    (team, date, is_holiday, fill_rate, result, checked_at, dirty)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """,
+                (
+                    team,
+                    _to_date_str(date_str),
+                    1 if result.get('is_holiday') else 0,
+                    result.get('fill_rate', 0.0),
+                    json.dumps(result, ensure_ascii=False, default=str),
+                    time.time()
+                )
+            )
+            conn.commit()
+
+    def get_days(self, team: str, start: DateLike, end: DateLike, include_dirty: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        读取团队在 [start, end] 内已存储的检查结果
+
+        Args:
+            team: 团队名称
+            start: 开始日期
+            end: 结束日期
+            include_dirty: 是否包含被标记为 dirty 的日期
+
+        Returns:
+            {日期: 检查结果}
+        """
+        sql = "SELECT date, result FROM daily_compliance WHERE team = ? AND date >= ? AND date <= ?"
+        if not include_dirty:
+            sql += " AND dirty = 0"
+
+        with self._lock:
+            rows = self._get_conn().execute(
+                sql, (team, _to_date_str(start), _to_date_str(end))
+            ).fetchall()
+        return {row['date']: json.loads(row['result']) for row in rows}
+
+    def get_day_entries(self, team: str, start: DateLike, end: DateLike) -> Dict[str, Dict[str, Any]]:
+        """
+        读取团队在 [start, end] 内已存储且未被标记为 dirty 的检查结果及检查时间
+
+        Returns:
+            {日期: {'result': 检查结果, 'checked_at': 检查时间（时间戳）}}
+        """
+        with self._lock:
+            rows = self._get_conn().execute(
+                "SELECT date, result, checked_at FROM daily_compliance "
+                "WHERE team = ? AND date >= ? AND date <= ? AND dirty = 0",
+                (team, _to_date_str(start), _to_date_str(end))
+            ).fetchall()
+        return {row['date']: {'result': json.loads(row['result']), 'checked_at': row['checked_at']} for row in rows}
+
+    def mark_dirty(self, start: DateLike, end: DateLike = None, team: str = None) -> int:
+        """
+        将日期范围内的结果标记为 dirty（下次汇总时重新计算）
+
+        Args:
+            start: 开始日期
+            end: 结束日期，默认与开始日期相同
+            team: 团队名称，默认所有团队
+
+        Returns:
+            标记的记录数
+        """
+        end = end or start
+        sql = "UPDATE daily_compliance SET dirty = 1 WHERE date >= ? AND date <= ?"
+        params = [_to_date_str(start), _to_date_str(end)]
+        if team is not None:
+            sql += " AND team = ?"
+            params.append(team)
+
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.execute(sql, params)
+            conn.commit()
+            return cursor.rowcount
+
+    def teams(self) -> List[str]:
+        """已存储结果的团队列表"""
+        with self._lock:
+            rows = self._get_conn().execute("SELECT DISTINCT team FROM daily_compliance").fetchall()
+        return [row['team'] for row in rows]
+
+
+# 全局工时合规日结果存储实例
+compliance_store = ComplianceStore()
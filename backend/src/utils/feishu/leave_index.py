@@ -0,0 +1,216 @@
+"""
+请假区间索引
+
+由已通过的审批详情一次性构建，供工时检查、月度总结等统计共享：
+- users_on(date): 某天请假的人员集合，O(log n)
+- leave_days(open_id, start, end): 某人在日期范围内的请假天数，O(log n)
+- leave_dates(open_id, start, end): 某人在日期范围内的请假日期
+
+实现：
+- 全局按区间端点做扫描线，切分为若干段，每段对应一个固定的请假人员集合，按日期二分定位
+- 每个人的请假区间合并为不相交区间，并维护区间长度前缀和
+"""
+
+from bisect import bisect_right
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, List, Iterable, Any, Set, Union
+
+
+DateLike = Union[str, date, datetime]
+
+
+def to_ordinal(value: DateLike) -> int:
+    """将日期（YYYY-MM-DD 字符串、date 或 datetime）转换为日序号"""
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return datetime.strptime(value[:10], '%Y-%m-%d').date().toordinal()
+
+
+class LeaveIndex:
+    """请假区间索引"""
+
+    def __init__(self):
+        """初始化空索引，通过 add() 添加区间，首次查询时自动构建"""
+        self._intervals: Dict[str, List[List[int]]] = {}
+        self._dirty = True
+
+        # 扫描线结构：端点序号列表，以及每段 [points[i], points[i+1]) 的请假人员集合
+        self._points: List[int] = []
+        self._segments: List[frozenset] = []
+
+        # 每人合并后的区间起点、终点和长度前缀和
+        self._user_starts: Dict[str, List[int]] = {}
+        self._user_ends: Dict[str, List[int]] = {}
+        self._user_prefix: Dict[str, List[int]] = {}
+
+    @classmethod
+    def from_details(cls, details: Iterable[Dict[str, Any]]) -> 'LeaveIndex':
+        """
+        从审批详情构建索引（只收录已通过的审批）
+
+        Args:
+            details: parse_approval_detail 格式的详情列表
+
+        Returns:
+            LeaveIndex 实例
+        """
+        index = cls()
+        for detail in details:
+            if detail.get('status') != 'APPROVED' or not detail.get('open_id'):
+                continue
+            for interval in detail.get('intervals', []):
+                index.add(detail['open_id'], interval['start'], interval['end'])
+        return index
+
+    def add(self, open_id: str, start: DateLike, end: DateLike):
+        """
+        添加一个请假区间（按自然日计算，首尾两天都算请假）
+
+        Args:
+            open_id: 请假人员 open_id
+            start: 开始日期
+            end: 结束日期
+        """
+        start_ord, end_ord = to_ordinal(start), to_ordinal(end)
+        if end_ord < start_ord:
+            start_ord, end_ord = end_ord, start_ord
+        self._intervals.setdefault(open_id, []).append([start_ord, end_ord])
+        self._dirty = True
+
+    def _build(self):
+        """构建扫描线分段和每人的前缀和结构"""
+        active = Counter()
+        deltas: Dict[int, List[tuple]] = {}
+        self._user_starts, self._user_ends, self._user_prefix = {}, {}, {}
+
+        for open_id, intervals in self._intervals.items():
+            # 合并重叠或相邻的区间
+            merged: List[List[int]] = []
+            for start_ord, end_ord in sorted(intervals):
+                if merged and start_ord <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end_ord)
+                else:
+                    merged.append([start_ord, end_ord])
+
+            starts, ends, prefix = [], [], [0]
+            for start_ord, end_ord in merged:
+                starts.append(start_ord)
+                ends.append(end_ord)
+                prefix.append(prefix[-1] + end_ord - start_ord + 1)
+                deltas.setdefault(start_ord, []).append((open_id, 1))
+                deltas.setdefault(end_ord + 1, []).append((open_id, -1))
+
+            self._user_starts[open_id] = starts
+            self._user_ends[open_id] = ends
+            self._user_prefix[open_id] = prefix
+
+        self._points = sorted(deltas)
+        self._segments = []
+        for point in self._points:
+            for open_id, delta in deltas[point]:
+                active[open_id] += delta
+                if active[open_id] == 0:
+                    del active[open_id]
+            self._segments.append(frozenset(active))
+
+        self._dirty = False
+
+    def _ensure_built(self):
+        """有新增区间时重新构建索引"""
+        if self._dirty:
+            self._build()
+
+    def users_on(self, day: DateLike) -> Set[str]:
+        """
+        获取某天请假的人员集合
+
+        Args:
+            day: 查询日期
+
+        Returns:
+            请假人员 open_id 集合
+        """
+        self._ensure_built()
+        i = bisect_right(self._points, to_ordinal(day)) - 1
+        if i < 0:
+            return set()
+        return set(self._segments[i])
+
+    def is_on_leave(self, open_id: str, day: DateLike) -> bool:
+        """判断某人某天是否请假"""
+        return self.leave_days(open_id, day, day) > 0
+
+    def _covered_until(self, open_id: str, day_ord: int) -> int:
+        """某人截至 day_ord（含）累计的请假天数"""
+        starts = self._user_starts.get(open_id)
+        if not starts:
+            return 0
+        i = bisect_right(starts, day_ord) - 1
+        if i < 0:
+            return 0
+        prefix = self._user_prefix[open_id]
+        end_ord = self._user_ends[open_id][i]
+        return prefix[i] + min(end_ord, day_ord) - starts[i] + 1
+
+    def leave_days(self, open_id: str, start: DateLike, end: DateLike) -> int:
+        """
+        统计某人在 [start, end] 内的请假天数（自然日）
+
+        Args:
+            open_id: 人员 open_id
+            start: 开始日期
+            end: 结束日期
+
+        Returns:
+            请假天数
+        """
+        self._ensure_built()
+        start_ord, end_ord = to_ordinal(start), to_ordinal(end)
+        if end_ord < start_ord:
+            return 0
+        return self._covered_until(open_id, end_ord) - self._covered_until(open_id, start_ord - 1)
+
+    def leave_dates(self, open_id: str, start: DateLike, end: DateLike) -> List[date]:
+        """
+        获取某人在 [start, end] 内请假的日期列表（按日期排序）
+
+        Args:
+            open_id: 人员 open_id
+            start: 开始日期
+            end: 结束日期
+
+        Returns:
+            请假日期列表
+        """
+        self._ensure_built()
+        start_ord, end_ord = to_ordinal(start), to_ordinal(end)
+        starts = self._user_starts.get(open_id)
+        if not starts or end_ord < start_ord:
+            return []
+
+        ends = self._user_ends[open_id]
+        dates = []
+        # 从可能与 start 重叠的第一个区间开始
+        i = max(0, bisect_right(starts, start_ord) - 1)
+        while i < len(starts) and starts[i] <= end_ord:
+            for day_ord in range(max(starts[i], start_ord), min(ends[i], end_ord) + 1):
+                dates.append(date.fromordinal(day_ord))
+            i += 1
+        return dates
+
+    def leave_days_by_user(self, start: DateLike, end: DateLike) -> Dict[str, int]:
+        """统计 [start, end] 内每个有请假记录的人员的请假天数（不含0天的人员）"""
+        self._ensure_built()
+        result = {}
+        for open_id in self._user_starts:
+            days = self.leave_days(open_id, start, end)
+            if days:
+                result[open_id] = days
+        return result
+
+    def __len__(self) -> int:
+        """索引中的人员数"""
+        return len(self._intervals)
@@ -3,7 +3,6 @@
 """
 
 import json
-import requests
 
 
 class MessageAPI:
@@ -22,7 +21,7 @@ class MessageAPI:
         """发送文本消息到飞书群组"""
         try:
             access_token = self.client.get_access_token()
-            url = "https://open.feishu.cn/open-apis/im/v1/messages"
+            url = f"{self.client.base_url}/im/v1/messages"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -37,7 +36,7 @@ class MessageAPI:
                 "content": json.dumps({"text": message})
             }
             
-            response = requests.post(url, headers=headers, json=data, params=params)
+            response = self.client.session.post(url, headers=headers, json=data, params=params)
             result = response.json()
             
             if result.get("code") == 0:
@@ -54,7 +53,7 @@ class MessageAPI:
         """回复特定消息"""
         try:
             access_token = self.client.get_access_token()
-            url = f"https://open.feishu.cn/open-apis/im/v1/messages/{message_id}/reply"
+            url = f"{self.client.base_url}/im/v1/messages/{message_id}/reply"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -66,7 +65,7 @@ class MessageAPI:
                 "content": json.dumps({"text": message})
             }
             
-            response = requests.post(url, headers=headers, json=data)
+            response = self.client.session.post(url, headers=headers, json=data)
             result = response.json()
             
             if result.get("code") == 0:
@@ -83,7 +82,7 @@ class MessageAPI:
         """发送交互式卡片到飞书群组"""
         try:
             access_token = self.client.get_access_token()
-            url = "https://open.feishu.cn/open-apis/im/v1/messages"
+            url = f"{self.client.base_url}/im/v1/messages"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -98,7 +97,7 @@ class MessageAPI:
                 "content": json.dumps(card)
             }
             
-            response = requests.post(url, headers=headers, json=data, params=params)
+            response = self.client.session.post(url, headers=headers, json=data, params=params)
             result = response.json()
             
             if result.get("code") == 0:
@@ -115,7 +114,7 @@ class MessageAPI:
         """使用交互式卡片回复特定消息"""
         try:
             access_token = self.client.get_access_token()
-            url = f"https://open.feishu.cn/open-apis/im/v1/messages/{message_id}/reply"
+            url = f"{self.client.base_url}/im/v1/messages/{message_id}/reply"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -127,7 +126,7 @@ class MessageAPI:
                 "content": json.dumps(card)
             }
             
-            response = requests.post(url, headers=headers, json=data)
+            response = self.client.session.post(url, headers=headers, json=data)
             result = response.json()
             
             if result.get("code") == 0:
@@ -144,7 +143,7 @@ class MessageAPI:
         """更新已发送的交互式卡片"""
         try:
             access_token = self.client.get_access_token()
-            url = f"https://open.feishu.cn/open-apis/im/v1/messages/{message_id}"
+            url = f"{self.client.base_url}/im/v1/messages/{message_id}"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -156,7 +155,7 @@ class MessageAPI:
                 "content": json.dumps(card)
             }
             
-            response = requests.patch(url, headers=headers, json=data)
+            response = self.client.session.patch(url, headers=headers, json=data)
             result = response.json()
             
             if result.get("code") == 0:
@@ -173,7 +172,7 @@ class MessageAPI:
         """发送带@提醒的交互式卡片到群组"""
         try:
             access_token = self.client.get_access_token()
-            url = "https://open.feishu.cn/open-apis/im/v1/messages"
+            url = f"{self.client.base_url}/im/v1/messages"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -203,7 +202,7 @@ class MessageAPI:
                 "content": json.dumps(card)
             }
             
-            response = requests.post(url, headers=headers, json=data, params=params)
+            response = self.client.session.post(url, headers=headers, json=data, params=params)
             result = response.json()
             
             if result.get("code") == 0:
@@ -220,7 +219,7 @@ class MessageAPI:
         """发送私信给指定用户"""
         try:
             access_token = self.client.get_access_token()
-            url = "https://open.feishu.cn/open-apis/im/v1/messages"
+            url = f"{self.client.base_url}/im/v1/messages"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -235,7 +234,7 @@ class MessageAPI:
                 "content": json.dumps(card)
             }
             
-            response = requests.post(url, headers=headers, json=data, params=params)
+            response = self.client.session.post(url, headers=headers, json=data, params=params)
             result = response.json()
             
             if result.get("code") == 0:
@@ -274,7 +273,7 @@ class MessageAPI:
         """
         try:
             access_token = self.client.get_access_token()
-            url = f"https://open.feishu.cn/open-apis/im/v1/chats/{chat_id}/members"
+            url = f"{self.client.base_url}/im/v1/chats/{chat_id}/members"
             
             headers = {
                 "Authorization": f"Bearer {access_token}",
@@ -289,7 +288,7 @@ class MessageAPI:
             if page_token:
                 params["page_token"] = page_token
             
-            response = requests.get(url, headers=headers, params=params)
+            response = self.client.session.get(url, headers=headers, params=params)
             result = response.json()
             
             if result.get("code") == 0:
@@ -0,0 +1,45 @@
+"""
+飞书接口限流器
+
+令牌桶实现，多个线程共享同一个限流器时保证整体请求速率不超过设定值
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """线程安全的令牌桶限流器"""
+
+    def __init__(self, rate: float, burst: int = None):
+        """
+        初始化限流器
+
+        Args:
+            rate: 每秒允许的请求数，<=0 表示不限流
+            burst: 桶容量（允许的瞬时突发请求数），默认等于 rate
+        """
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """获取一个令牌，令牌不足时阻塞等待"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait_seconds = (1 - self._tokens) / self.rate
+
+            time.sleep(wait_seconds)
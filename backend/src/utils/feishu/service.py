@@ -15,6 +15,7 @@ from .message import MessageAPI
 from .bitable import BitableAPI
 from .card import CardBuilder
 from .typing_handler import TypingEffectHandler
+from .api_metrics import api_metrics
 
 
 class FeishuService:
@@ -273,7 +274,8 @@ class FeishuService:
         """异步处理消息的后台任务 - 打字效果版本"""
         try:
             print(f"🚀 开始异步处理消息 (Event: {event_id})")
-            result = await self.process_with_typing_effect(data)
+            with api_metrics.track('chat_event', event_id=event_id):
+                result = await self.process_with_typing_effect(data)
             
             if result:
                 print(f"✅ 异步消息处理完成 (Event: {event_id})")
@@ -0,0 +1,222 @@
+"""
+任务阶段依赖图（DAG）
+
+一个任务拆分为多个阶段（如 同步 → 检查 → 发布），每个阶段声明依赖和截止时间：
+- 依赖全部成功的阶段立即启动（可声明最早开始时间，用于错峰），互不依赖的阶段并行执行，
+  可限制同时执行的阶段数
+- 阶段超过自己的截止时间、或整个任务超过截止时间时放弃该阶段：线程无法强制结束，
+  阶段在后台线程中继续运行直到返回，但结果被丢弃，依赖它的阶段不再执行
+- 每个阶段收到一个取消事件，放弃时置位；阶段在发送消息等副作用之前检查，被放弃后不再执行副作用
+- 被放弃但仍在运行的阶段继续占用并行名额，直到线程真正返回；没有其他阶段在运行、只剩它们占用名额时
+  最多再等待 abandon_grace 秒，仍未返回则跳过等待名额的阶段（卡死的阶段不会让整个任务永远阻塞）
+- 记录每个阶段的开始时间、耗时、状态和飞书接口调用次数，便于定位慢阶段
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Any, Iterable, Optional
+
+from src.utils.feishu.api_metrics import api_metrics
+
+
+STATUS_ICONS = {
+    "success": "✅",
+    "error": "❌",
+    "timeout": "⏱️",
+    "skipped": "⏭️",
+    "pending": "⏸️",
+}
+
+
+def _failed(value) -> Optional[str]:
+    """阶段返回 {"status": "error", ...} 时视为失败，返回错误信息"""
+    if isinstance(value, dict) and value.get("status") == "error":
+        return value.get("message") or "阶段返回错误"
+    return None
+
+
+class JobDAG:
+    """任务阶段依赖图"""
+
+    def __init__(self, name: str, max_parallel: int = None, abandon_grace: float = 30):
+        """
+        Args:
+            name: 任务名称（用于日志和接口调用统计）
+            max_parallel: 同时执行的阶段数上限（已放弃但线程仍在运行的阶段也计入），None 表示不限制
+            abandon_grace: 只剩已放弃的阶段占用并行名额时，等待它们返回的最长时间（秒），超过后跳过等待名额的阶段
+        """
+        self.name = name
+        self.max_parallel = max_parallel
+        self.abandon_grace = abandon_grace
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, func: Callable[[Dict[str, Any], threading.Event], Any], depends_on: Iterable[str] = (),
+            deadline: float = None, delay: float = 0) -> str:
+        """
+        添加阶段（依赖的阶段必须先添加，保证无环）
+
+        Args:
+            name: 阶段名称（DAG 内唯一）
+            func: 阶段函数，参数为 {依赖阶段名称: 返回值} 和取消事件（阶段被放弃时置位，副作用之前应检查）；
+                  抛出异常或返回 {"status": "error"} 视为失败
+            depends_on: 依赖的阶段名称
+            deadline: 阶段截止时间（秒，从阶段开始计时），None 表示只受整个任务的截止时间限制
+            delay: 最早开始时间（秒，从任务开始计时），用于错峰；依赖完成前不会开始
+
+        Returns:
+            阶段名称
+        """
+        if name in self._stages:
+            raise ValueError(f"重复的阶段: {name}")
+        depends_on = list(depends_on)
+        for dep in depends_on:
+            if dep not in self._stages:
+                raise ValueError(f"阶段 {name} 依赖的阶段 {dep} 不存在（需先添加）")
+        self._stages[name] = {"func": func, "depends_on": depends_on, "deadline": deadline, "delay": delay or 0}
+        return name
+
+    def run(self, deadline: float = None) -> Dict[str, Any]:
+        """
+        执行所有阶段（阻塞到全部完成、放弃或跳过）
+
+        Args:
+            deadline: 整个任务的截止时间（秒），超过后放弃正在执行的阶段、跳过未开始的阶段
+
+        Returns:
+            {"status": "success" | "error" | "timeout", "elapsed": float,
+             "stages": [{name, status, depends_on, deadline, started_at, elapsed, api_calls, error}, ...],
+             "results": {阶段名称: 返回值}}（只包含成功的阶段）
+        """
+        start = time.monotonic()
+        job_deadline_at = start + deadline if deadline else None
+        finished = queue.Queue()
+        results: Dict[str, Any] = {}
+        states = {
+            name: {"name": name, "status": "pending", "depends_on": stage["depends_on"], "deadline": stage["deadline"],
+                   "started_at": None, "elapsed": None, "api_calls": 0, "error": None}
+            for name, stage in self._stages.items()
+        }
+        running: Dict[str, float] = {}  # 阶段名称 -> 开始时间（monotonic）
+        abandoned: Dict[str, float] = {}  # 已放弃但线程仍在运行的阶段 -> 放弃时间（monotonic），继续占用并行名额
+        cancel_events: Dict[str, threading.Event] = {}
+        job_timed_out = False
+
+        def execute(name, func, upstream, cancel):
+            with api_metrics.track("job_stage", job=self.name, stage=name) as api_run:
+                try:
+                    value = func(upstream, cancel)
+                    error = _failed(value)
+                except Exception as e:
+                    value, error = None, f"{type(e).__name__}: {e}"
+            finished.put((name, value, error, api_run.calls))
+
+        while True:
+            # 启动依赖已满足且到达最早开始时间的阶段（不超过并行上限），依赖失败的阶段跳过
+            delayed = []  # 依赖已满足、等待最早开始时间的阶段的开始时间（monotonic）
+            waiting_slot = False  # 有阶段因并行上限（含已放弃的阶段）等待
+            for name, state in states.items():
+                if state["status"] != "pending":
+                    continue
+                dep_statuses = [states[dep]["status"] for dep in state["depends_on"]]
+                blocked = [dep for dep in state["depends_on"] if states[dep]["status"] in ("error", "timeout", "skipped")]
+                if blocked:
+                    state["status"] = "skipped"
+                    state["error"] = f"依赖的阶段未完成: {', '.join(blocked)}"
+                elif all(status == "success" for status in dep_statuses):
+                    not_before = start + self._stages[name]["delay"]
+                    if time.monotonic() < not_before:
+                        delayed.append(not_before)
+                        continue
+                    if self.max_parallel and len(running) + len(abandoned) >= self.max_parallel:
+                        waiting_slot = True
+                        continue
+                    state["status"] = "running"
+                    state["started_at"] = round(time.monotonic() - start, 3)
+                    running[name] = time.monotonic()
+                    upstream = {dep: results[dep] for dep in state["depends_on"]}
+                    cancel_events[name] = threading.Event()
+                    threading.Thread(
+                        target=api_metrics.bind(execute),
+                        args=(name, self._stages[name]["func"], upstream, cancel_events[name]),
+                        name=f"dag-{self.name}-{name}",
+                        daemon=True  # 被放弃的阶段不阻止进程退出
+                    ).start()
+
+            if not running and not delayed and not (waiting_slot and abandoned):
+                break
+
+            # 只剩已放弃的阶段占用并行名额：最多等待 abandon_grace 秒，超过后跳过等待名额的阶段
+            slot_grace_at = None
+            if not running and not delayed:
+                slot_grace_at = min(abandoned.values()) + self.abandon_grace
+                if time.monotonic() >= slot_grace_at:
+                    for state in states.values():
+                        if state["status"] == "pending":
+                            state["status"] = "skipped"
+                            state["error"] = (f"并行名额被已放弃的阶段占用超过 {self.abandon_grace} 秒: "
+                                              f"{', '.join(abandoned)}")
+                    break
+
+            # 等待下一个阶段结束，最多等到最近的截止时间或错峰阶段的开始时间
+            deadlines = [running[name] + states[name]["deadline"] for name in running if states[name]["deadline"]]
+            deadlines.extend(delayed)
+            if slot_grace_at:
+                deadlines.append(slot_grace_at)
+            if job_deadline_at:
+                deadlines.append(job_deadline_at)
+            wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            try:
+                name, value, error, api_calls = finished.get(timeout=wait)
+            except queue.Empty:
+                name = None
+            if name is not None and name in abandoned:
+                abandoned.pop(name)
+            elif name is not None and name in running:
+                state = states[name]
+                state["elapsed"] = round(time.monotonic() - running.pop(name), 3)
+                state["api_calls"] = api_calls
+                state["status"] = "error" if error else "success"
+                state["error"] = error
+                if not error:
+                    results[name] = value
+
+            # 放弃超时的阶段
+            now = time.monotonic()
+            job_timed_out = bool(job_deadline_at and now >= job_deadline_at)
+            for name in list(running):
+                state = states[name]
+                stage_overrun = state["deadline"] and now - running[name] >= state["deadline"]
+                if stage_overrun or job_timed_out:
+                    cancel_events[name].set()
+                    abandoned[name] = now
+                    state["elapsed"] = round(now - running.pop(name), 3)
+                    state["status"] = "timeout"
+                    state["error"] = (f"超过阶段截止时间 {state['deadline']} 秒，已放弃" if stage_overrun
+                                      else f"任务超过截止时间 {deadline} 秒，已放弃")
+            if job_timed_out:
+                for state in states.values():
+                    if state["status"] == "pending":
+                        state["status"] = "skipped"
+                        state["error"] = f"任务超过截止时间 {deadline} 秒"
+                break
+
+        if job_timed_out:
+            status = "timeout"
+        elif all(state["status"] == "success" for state in states.values()):
+            status = "success"
+        else:
+            status = "error"
+        elapsed = round(time.monotonic() - start, 3)
+        stages = list(states.values())
+        self._print_timings(status, elapsed, stages)
+        return {"status": status, "elapsed": elapsed, "stages": stages, "results": results}
+
+    def _print_timings(self, status: str, elapsed: float, stages: list):
+        """打印各阶段耗时（按开始时间排序）"""
+        print(f"{STATUS_ICONS.get(status, '❌')} {self.name}: {len(stages)} 个阶段，总耗时 {elapsed:.2f}s")
+        for state in sorted(stages, key=lambda s: (s["started_at"] is None, s["started_at"] or 0)):
+            timing = (f"+{state['started_at']:.2f}s 开始，耗时 {state['elapsed']:.2f}s，接口调用 {state['api_calls']} 次"
+                      if state["started_at"] is not None else "未执行")
+            detail = f"（{state['error']}）" if state["error"] else ""
+            print(f"   {STATUS_ICONS.get(state['status'], '❌')} {state['name']}: {timing}{detail}")
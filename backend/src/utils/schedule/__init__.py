@@ -3,5 +3,7 @@
 """
 
 from .unified_scheduler import UnifiedScheduler
+from .job_executor import JobExecutor
+from .leader import LeaderElector
 
-__all__ = ['UnifiedScheduler']
+__all__ = ['UnifiedScheduler', 'JobExecutor', 'LeaderElector']
@@ -0,0 +1,321 @@
+"""
+定时任务执行器
+
+每类定时任务可以声明自己的执行方式，重任务不再与 Web 服务共享 GIL 和内存：
+- thread: 在调度器线程中直接执行（默认，可复用进程内缓存）
+- process: 提交到常驻进程池执行，超时和内存上限在工作进程内生效（SIGALRM / RLIMIT_DATA）
+- subprocess: 每次启动独立子进程执行（包括其启动的浏览器等子进程），
+  超时或整个进程树的 RSS 超过上限时结束整个进程组；子进程崩溃不影响 Web 服务
+
+任务函数以 "模块路径:函数名" 指定，便于在其他进程中导入执行。
+"""
+
+import importlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，内存上限不生效
+    resource = None
+
+
+EXECUTOR_MODES = ("thread", "process", "subprocess")
+
+# 各类任务的默认执行方式
+DEFAULT_EXECUTORS = {
+    "news": "subprocess",              # Playwright 启动 Chromium，独立进程并限制内存
+    "labor_hour": "thread",            # 轻量，复用进程内的运行器和请假数据缓存
+    "labor_month_summary": "process",  # 解析量大，放到进程池避免阻塞回调响应
+    "leave_audit": "thread"            # 复用进程内的请假数据同步器（与工时检查共享锁）
+}
+
+# backend/ 目录（子进程的工作目录，保证 src 包可导入）
+BACKEND_DIR = Path(__file__).parent.parent.parent.parent
+
+
+def resolve_target(target: str):
+    """将 "模块路径:函数名" 解析为函数"""
+    module_name, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _process_tree_rss(pid: int) -> Optional[int]:
+    """进程及其全部子孙进程的 RSS 之和（字节），无法读取 /proc 时返回 None"""
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+
+    children: Dict[int, list] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            # 格式: pid (comm) state ppid ...，comm 中可能有空格，从最后一个 ')' 之后解析
+            ppid = int(stat[stat.rfind(")") + 2:].split()[1])
+            children.setdefault(ppid, []).append(int(entry.name))
+        except (OSError, ValueError, IndexError):
+            continue
+
+    total = 0
+    pending = [pid]
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    while pending:
+        current = pending.pop()
+        try:
+            # statm 第二列为常驻内存页数
+            total += int((proc / str(current) / "statm").read_text().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            pass
+        pending.extend(children.get(current, []))
+    return total
+
+
+def _outcome(result) -> Dict[str, Any]:
+    """任务函数的返回值转换为执行结果（返回 {"status": "error", ...} 时视为失败）"""
+    if isinstance(result, dict) and result.get("status") == "error":
+        return {"status": "error", "message": result.get("message", ""), "result": result}
+    return {"status": "success", "result": result}
+
+
+class _JobTimeout(BaseException):
+    """进程池中的任务超时（继承 BaseException，不会被任务内部的 except Exception 吞掉）"""
+
+
+def _on_alarm(signum, frame):
+    raise _JobTimeout()
+
+
+def _run_in_pool(target: str, kwargs: Dict[str, Any], timeout: Optional[float],
+                 memory_limit_mb: Optional[int]) -> Dict[str, Any]:
+    """进程池工作进程中执行任务（设置本次任务的超时和内存上限，结束后恢复）"""
+    old_limit = None
+    if memory_limit_mb and resource is not None:
+        old_limit = resource.getrlimit(resource.RLIMIT_DATA)
+        resource.setrlimit(resource.RLIMIT_DATA, (memory_limit_mb * 1024 * 1024, old_limit[1]))
+    if timeout:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.alarm(int(max(1, timeout)))
+
+    try:
+        return _outcome(resolve_target(target)(**kwargs))
+    except _JobTimeout:
+        return {"status": "timeout", "message": f"执行超过 {timeout} 秒"}
+    except MemoryError:
+        return {"status": "memory_exceeded", "message": f"内存超过 {memory_limit_mb}MB"}
+    finally:
+        if timeout:
+            signal.alarm(0)
+        if old_limit is not None:
+            resource.setrlimit(resource.RLIMIT_DATA, old_limit)
+
+
+class JobExecutor:
+    """按任务声明的方式执行定时任务"""
+
+    def __init__(self, process_workers: int = 2, max_tasks_per_child: int = 20, poll_interval: float = 1.0):
+        """
+        初始化执行器
+
+        Args:
+            process_workers: 进程池的工作进程数，默认2
+            max_tasks_per_child: 每个工作进程执行多少个任务后重建（释放累积的内存），默认20
+            poll_interval: 子进程超时和内存检查的间隔（秒），默认1
+        """
+        self.process_workers = max(1, process_workers)
+        self.max_tasks_per_child = max_tasks_per_child
+        self.poll_interval = poll_interval
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """获取进程池（首次使用时创建，崩溃后重建）"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=get_context("spawn"),
+                    max_tasks_per_child=self.max_tasks_per_child
+                )
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor):
+        """丢弃已损坏的进程池，下次使用时重建"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, target: str, kwargs: Dict[str, Any] = None, mode: str = "thread",
+            timeout: float = None, memory_limit_mb: int = None, name: str = None) -> Dict[str, Any]:
+        """
+        执行任务（阻塞直到结束，在调度器的线程中调用）
+
+        Args:
+            target: 任务函数，"模块路径:函数名"
+            kwargs: 任务参数（process / subprocess 方式需可序列化）
+            mode: 执行方式 thread / process / subprocess
+            timeout: 超时秒数（thread 方式只记录超时，无法中断）
+            memory_limit_mb: 内存上限（MB），thread 方式不生效
+            name: 任务名称，用于日志
+
+        Returns:
+            {"status": "success" | "error" | "timeout" | "memory_exceeded" | "crashed",
+             "mode": str, "elapsed": float, ...}
+        """
+        kwargs = kwargs or {}
+        name = name or target
+        if mode not in EXECUTOR_MODES:
+            print(f"⚠️ 未知的执行方式 {mode}，任务 {name} 改为 thread 方式执行")
+            mode = "thread"
+
+        start = time.perf_counter()
+        if mode == "process":
+            outcome = self._run_process(target, kwargs, timeout, memory_limit_mb)
+        elif mode == "subprocess":
+            outcome = self._run_subprocess(target, kwargs, timeout, memory_limit_mb)
+        else:
+            outcome = self._run_thread(target, kwargs)
+
+        outcome["mode"] = mode
+        outcome["elapsed"] = round(time.perf_counter() - start, 3)
+        if mode == "thread" and timeout and outcome["elapsed"] > timeout:
+            print(f"⚠️ 任务 {name} 执行 {outcome['elapsed']:.1f}s，超过设定的 {timeout}s（thread 方式无法中断）")
+
+        if outcome["status"] == "success":
+            print(f"✅ 任务 {name} 执行完成 ({mode}, {outcome['elapsed']:.2f}s)")
+        else:
+            print(f"❌ 任务 {name} 执行失败 ({mode}): {outcome['status']} {outcome.get('message', '')}")
+        return outcome
+
+    @staticmethod
+    def _run_thread(target: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """当前线程中直接执行"""
+        try:
+            return _outcome(resolve_target(target)(**kwargs))
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return {"status": "error", "message": str(e)}
+
+    def _run_process(self, target: str, kwargs: Dict[str, Any], timeout: Optional[float],
+                     memory_limit_mb: Optional[int]) -> Dict[str, Any]:
+        """进程池中执行"""
+        pool = self._get_pool()
+        try:
+            future = pool.submit(_run_in_pool, target, kwargs, timeout, memory_limit_mb)
+            return future.result()
+        except BrokenProcessPool as e:
+            # 工作进程崩溃（如被 OOM 杀死），重建进程池
+            self._reset_pool(pool)
+            return {"status": "crashed", "message": f"工作进程异常退出: {e}"}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def _run_subprocess(self, target: str, kwargs: Dict[str, Any], timeout: Optional[float],
+                        memory_limit_mb: Optional[int]) -> Dict[str, Any]:
+        """独立子进程中执行，超时或超出内存时结束整个进程组"""
+        with tempfile.TemporaryDirectory(prefix="job_") as work_dir:
+            result_path = os.path.join(work_dir, "result.json")
+            spec = json.dumps({"target": target, "kwargs": kwargs, "result_path": result_path},
+                              ensure_ascii=False, default=str)
+
+            process = subprocess.Popen(
+                [sys.executable, "-c", _SUBPROCESS_ENTRY, spec],
+                cwd=str(BACKEND_DIR),
+                start_new_session=True  # 独立进程组，结束时连同浏览器等子进程一起结束
+            )
+
+            start = time.monotonic()
+            peak_rss = 0
+            outcome = None
+            while process.poll() is None:
+                rss = _process_tree_rss(process.pid)
+                if rss is not None:
+                    peak_rss = max(peak_rss, rss)
+                if timeout and time.monotonic() - start > timeout:
+                    outcome = {"status": "timeout", "message": f"执行超过 {timeout} 秒"}
+                elif memory_limit_mb and rss is not None and rss > memory_limit_mb * 1024 * 1024:
+                    outcome = {"status": "memory_exceeded",
+                               "message": f"进程树 RSS {rss / 1024 / 1024:.0f}MB 超过 {memory_limit_mb}MB"}
+                if outcome:
+                    self._kill_group(process)
+                    break
+                try:
+                    process.wait(timeout=self.poll_interval)
+                except subprocess.TimeoutExpired:
+                    pass
+
+            if outcome is None:
+                # 任务已返回，但被放弃的阶段启动的浏览器等子进程可能仍在运行，结束进程组中剩余的进程
+                self._kill_leftovers(process)
+                if process.returncode == 0 and os.path.exists(result_path):
+                    with open(result_path, 'r', encoding='utf-8') as f:
+                        outcome = json.load(f)
+                elif process.returncode == 0:
+                    outcome = {"status": "success"}
+                else:
+                    outcome = {"status": "crashed", "message": f"子进程退出码 {process.returncode}"}
+
+            outcome["returncode"] = process.returncode
+            if peak_rss:
+                outcome["peak_rss_mb"] = round(peak_rss / 1024 / 1024, 1)
+            return outcome
+
+    @staticmethod
+    def _kill_group(process: subprocess.Popen):
+        """结束子进程所在的进程组"""
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def _kill_leftovers(process: subprocess.Popen):
+        """子进程已退出后，结束同一进程组中残留的进程"""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 子进程入口（不用 -m 运行本模块，避免包 __init__ 先导入本模块导致重复加载）
+_SUBPROCESS_ENTRY = "import sys; from src.utils.schedule.job_executor import _subprocess_main; _subprocess_main(sys.argv[1])"
+
+
+def _subprocess_main(spec_json: str):
+    """subprocess 方式的子进程入口：执行任务并把结果写入结果文件"""
+    spec = json.loads(spec_json)
+    try:
+        outcome = _outcome(resolve_target(spec["target"])(**spec["kwargs"]))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        outcome = {"status": "error", "message": str(e)}
+
+    with open(spec["result_path"], 'w', encoding='utf-8') as f:
+        json.dump(outcome, f, ensure_ascii=False, default=str)
@@ -0,0 +1,350 @@
+"""
+定时任务持久化
+
+使用本地 SQLite（backend/data/scheduler.db）保存：
+- SQLiteJobStore: APScheduler 任务存储，容器重启后任务及补跑任务不丢失
+- RunHistory: 任务运行记录（开始、结束、耗时、状态、错误、参数），用于展示上次运行和启动时补跑错过的任务
+"""
+
+import json
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+import pytz
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, JobLookupError, ConflictingIdError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+from src.utils.feishu.approval_cache import DEFAULT_DATA_DIR
+
+
+DEFAULT_SCHEDULER_DB = DEFAULT_DATA_DIR / "scheduler.db"
+
+# 本进程的启动标识：容器重启后 PID（通常为 1）和主机名可能与上一个进程相同，用启动标识区分
+BOOT_ID = uuid.uuid4().hex
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    """打开数据库连接（多个线程共用，调用方加锁）"""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class SQLiteJobStore(BaseJobStore):
+    """APScheduler 任务存储（SQLite 持久化，任务状态以 pickle 保存）"""
+
+    def __init__(self, db_path: str = None, pickle_protocol: int = pickle.HIGHEST_PROTOCOL):
+        """
+        初始化任务存储
+
+        Args:
+            db_path: SQLite 文件路径，默认为 backend/data/scheduler.db
+            pickle_protocol: 任务状态序列化使用的 pickle 协议
+        """
+        super().__init__()
+        self.db_path = Path(db_path) if db_path else DEFAULT_SCHEDULER_DB
+        self.pickle_protocol = pickle_protocol
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        with self._lock:
+            self._get_conn()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """获取数据库连接（首次调用或关闭后重新打开，调用方持有锁）"""
+        if self._conn is None:
+            conn = _connect(self.db_path)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS apscheduler_jobs (
+                    id TEXT PRIMARY KEY,
+                    next_run_time REAL,
+                    job_state BLOB NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_apscheduler_jobs_next_run_time ON apscheduler_jobs(next_run_time)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _reconstitute_job(self, job_state: bytes) -> Job:
+        """从保存的状态恢复任务"""
+        state = pickle.loads(job_state)
+        state['jobstore'] = self
+        job = Job.__new__(Job)
+        job.__setstate__(state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, where: str = "", params: tuple = ()) -> List[Job]:
+        """读取任务（按下次运行时间排序），无法恢复的任务直接删除"""
+        with self._lock:
+            rows = self._get_conn().execute(
+                f"SELECT id, job_state FROM apscheduler_jobs {where} ORDER BY next_run_time", params
+            ).fetchall()
+
+        jobs, failed_ids = [], []
+        for row in rows:
+            try:
+                jobs.append(self._reconstitute_job(row['job_state']))
+            except BaseException:
+                self._logger.exception('Unable to restore job "%s" -- removing it', row['id'])
+                failed_ids.append(row['id'])
+
+        if failed_ids:
+            with self._lock:
+                conn = self._get_conn()
+                conn.executemany("DELETE FROM apscheduler_jobs WHERE id = ?", [(i,) for i in failed_ids])
+                conn.commit()
+        return jobs
+
+    def lookup_job(self, job_id):
+        with self._lock:
+            row = self._get_conn().execute(
+                "SELECT job_state FROM apscheduler_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._reconstitute_job(row['job_state']) if row else None
+
+    def get_due_jobs(self, now):
+        return self._get_jobs("WHERE next_run_time <= ?", (datetime_to_utc_timestamp(now),))
+
+    def get_next_run_time(self):
+        with self._lock:
+            row = self._get_conn().execute(
+                "SELECT next_run_time FROM apscheduler_jobs WHERE next_run_time IS NOT NULL "
+                "ORDER BY next_run_time LIMIT 1"
+            ).fetchone()
+        return utc_timestamp_to_datetime(row['next_run_time']) if row else None
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job):
+        with self._lock:
+            conn = self._get_conn()
+            try:
+                conn.execute(
+                    "INSERT INTO apscheduler_jobs (id, next_run_time, job_state) VALUES (?, ?, ?)",
+                    (job.id, datetime_to_utc_timestamp(job.next_run_time),
+                     pickle.dumps(job.__getstate__(), self.pickle_protocol))
+                )
+                conn.commit()
+            except sqlite3.IntegrityError:
+                raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.execute(
+                "UPDATE apscheduler_jobs SET next_run_time = ?, job_state = ? WHERE id = ?",
+                (datetime_to_utc_timestamp(job.next_run_time),
+                 pickle.dumps(job.__getstate__(), self.pickle_protocol), job.id)
+            )
+            conn.commit()
+        if cursor.rowcount == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.execute("DELETE FROM apscheduler_jobs WHERE id = ?", (job_id,))
+            conn.commit()
+        if cursor.rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("DELETE FROM apscheduler_jobs")
+            conn.commit()
+
+    def shutdown(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RunHistory:
+    """定时任务运行记录"""
+
+    def __init__(self, db_path: str = None, timezone: str = "Asia/Shanghai"):
+        """
+        初始化运行记录
+
+        Args:
+            db_path: SQLite 文件路径，默认为 backend/data/scheduler.db
+            timezone: 展示时间使用的时区
+        """
+        self.db_path = Path(db_path) if db_path else DEFAULT_SCHEDULER_DB
+        self.tz = pytz.timezone(timezone)
+
+        # 运行记录所属的主机、进程和进程启动标识（多副本共享数据库时区分）
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+        self.boot_id = BOOT_ID
+        
+        # 延迟建立连接，避免导入模块时就创建文件
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """获取数据库连接（首次调用时建表）"""
+        if self._conn is None:
+            conn = _connect(self.db_path)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_runs (
+                    run_id TEXT PRIMARY KEY,
+                    job_id TEXT,
+                    job_name TEXT,
+                    trigger TEXT,
+                    args TEXT,
+                    started_at REAL,
+                    finished_at REAL,
+                    duration REAL,
+                    status TEXT,
+                    error TEXT,
+                    outcome TEXT,
+                    host TEXT,
+                    pid INTEGER,
+                    boot_id TEXT
+                )
+            """)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(job_runs)")}
+            for column, column_type in (("host", "TEXT"), ("pid", "INTEGER"), ("boot_id", "TEXT")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE job_runs ADD COLUMN {column} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_runs_job ON job_runs(job_id, started_at)")
+            # 本机（容器）之前的进程异常退出时未结束的运行（按启动标识判断，重启后 PID 相同也能识别）；
+            # 多副本共享数据库时不影响其他副本的运行
+            conn.execute(
+                "UPDATE job_runs SET status = 'interrupted' "
+                "WHERE status = 'running' AND host = ? AND (boot_id IS NULL OR boot_id != ?)",
+                (self.host, self.boot_id)
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def start(self, job_id: str, job_name: str = None, trigger: str = "scheduled",
+              args: Dict[str, Any] = None) -> str:
+        """
+        记录一次运行开始
+
+        Args:
+            job_id: 任务ID
+            job_name: 任务名称
+            trigger: 触发方式 scheduled / catch_up / manual
+            args: 任务参数
+
+        Returns:
+            run_id
+        """
+        run_id = uuid.uuid4().hex[:16]
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "INSERT INTO job_runs (run_id, job_id, job_name, trigger, args, started_at, status, host, pid, boot_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'running', ?, ?, ?)",
+                (run_id, job_id, job_name, trigger,
+                 json.dumps(args or {}, ensure_ascii=False, default=str), time.time(), self.host, self.pid,
+                 self.boot_id)
+            )
+            conn.commit()
+        return run_id
+
+    def finish(self, run_id: str, status: str, error: str = None, outcome: Dict[str, Any] = None):
+        """
+        记录一次运行结束
+
+        Args:
+            run_id: start() 返回的 run_id
+            status: 运行状态（success / error / timeout / memory_exceeded / crashed ...）
+            error: 错误信息
+            outcome: 执行器返回的完整结果
+        """
+        finished_at = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "UPDATE job_runs SET finished_at = ?, duration = ? - started_at, status = ?, error = ?, outcome = ? "
+                "WHERE run_id = ?",
+                (finished_at, finished_at, status, error,
+                 json.dumps(outcome or {}, ensure_ascii=False, default=str), run_id)
+            )
+            conn.commit()
+
+    def _format(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """运行记录转换为可序列化的字典"""
+        def to_iso(ts):
+            return datetime.fromtimestamp(ts, self.tz).isoformat() if ts else None
+
+        return {
+            'run_id': row['run_id'],
+            'job_id': row['job_id'],
+            'job_name': row['job_name'],
+            'trigger': row['trigger'],
+            'args': json.loads(row['args'] or '{}'),
+            'started_at': to_iso(row['started_at']),
+            'finished_at': to_iso(row['finished_at']),
+            'duration': round(row['duration'], 3) if row['duration'] is not None else None,
+            'status': row['status'],
+            'error': row['error'],
+            'host': row['host']
+        }
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """按 run_id 查询运行记录（附带执行结果）"""
+        with self._lock:
+            row = self._get_conn().execute("SELECT * FROM job_runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        record = self._format(row)
+        record['outcome'] = json.loads(row['outcome']) if row['outcome'] else None
+        return record
+
+    def list_runs(self, job_id: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """最近的运行记录（按开始时间倒序）"""
+        sql = "SELECT * FROM job_runs"
+        params: tuple = ()
+        if job_id:
+            sql += " WHERE job_id = ?"
+            params = (job_id,)
+        sql += " ORDER BY started_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._get_conn().execute(sql, params + (limit,)).fetchall()
+        return [self._format(row) for row in rows]
+
+    def last_runs(self) -> Dict[str, Dict[str, Any]]:
+        """每个任务最近一次运行 {job_id: 运行记录}"""
+        with self._lock:
+            rows = self._get_conn().execute("""
+                SELECT r.* FROM job_runs r
+                JOIN (SELECT job_id, MAX(started_at) AS started_at FROM job_runs GROUP BY job_id) latest
+                  ON r.job_id = latest.job_id AND r.started_at = latest.started_at
+            """).fetchall()
+        return {row['job_id']: self._format(row) for row in rows}
+
+    def ran_since(self, job_id: str, since: float) -> bool:
+        """任务在 since（时间戳）之后是否启动过"""
+        with self._lock:
+            row = self._get_conn().execute(
+                "SELECT 1 FROM job_runs WHERE job_id = ? AND started_at >= ? LIMIT 1", (job_id, since)
+            ).fetchone()
+        return row is not None
@@ -0,0 +1,359 @@
+"""
+定时任务调度器选主
+
+多个副本（如扩容后的多个 app 容器）同时运行时，只有持有租约的副本触发定时任务，避免重复发送提醒和新闻：
+- FileLease: 文件锁（flock），适用于单机多副本（共享 data 目录）；进程退出时立即释放
+- RedisLease: Redis 键（SET NX PX），租约到期未续约自动释放
+- PostgresLease: Postgres 会话级 advisory lock，连接断开时释放
+
+LeaderElector 在后台线程中按租约周期的 1/3 续约或抢占，主副本失联后，
+其他副本在一个租约周期内接管；续约失败的主副本立即降级，不再触发任务。
+"""
+
+import fcntl
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Optional, Callable, Dict, Any
+
+from src.utils.feishu.approval_cache import DEFAULT_DATA_DIR
+
+
+DEFAULT_LOCK_FILE = DEFAULT_DATA_DIR / "scheduler.lock"
+DEFAULT_LEASE_KEY = "agent2im:scheduler:leader"
+
+
+def make_holder_id() -> str:
+    """当前副本的标识：主机名:进程号:随机后缀"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class LeaseBackend:
+    """租约后端"""
+
+    name = "base"
+
+    def acquire(self, holder: str, ttl: float) -> bool:
+        """
+        获取或续约租约
+
+        Args:
+            holder: 副本标识
+            ttl: 租约时长（秒）
+
+        Returns:
+            当前副本是否持有租约
+        """
+        raise NotImplementedError
+
+    def release(self, holder: str):
+        """释放租约（仅当由 holder 持有时）"""
+        raise NotImplementedError
+
+    def current_holder(self) -> Optional[str]:
+        """当前持有租约的副本标识（未知时返回 None）"""
+        return None
+
+
+class FileLease(LeaseBackend):
+    """文件锁租约（同一主机上的多个进程/容器共享锁文件）"""
+
+    name = "file"
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: 锁文件路径，默认为 backend/data/scheduler.lock
+        """
+        self.path = Path(path) if path else DEFAULT_LOCK_FILE
+        self._fd: Optional[int] = None
+
+    def acquire(self, holder: str, ttl: float) -> bool:
+        if self._fd is not None:
+            # flock 由内核持有到进程退出，无需续约
+            return True
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, holder.encode('utf-8'))
+        self._fd = fd
+        return True
+
+    def release(self, holder: str):
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            os.ftruncate(fd, 0)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def current_holder(self) -> Optional[str]:
+        try:
+            return self.path.read_text(encoding='utf-8').strip() or None
+        except OSError:
+            return None
+
+
+class RedisLease(LeaseBackend):
+    """Redis 租约（SET NX PX 抢占，Lua 脚本比对持有者后续约/释放）"""
+
+    name = "redis"
+
+    RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+    RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+    def __init__(self, url: str = None, key: str = DEFAULT_LEASE_KEY, client=None):
+        """
+        Args:
+            url: Redis 地址，如 redis://redis:6379/0
+            key: 租约键名
+            client: 已创建的客户端（redis.Redis 或兼容的替身，传入时忽略 url）
+        """
+        if client is None:
+            import redis  # 仅使用 Redis 选主时需要安装
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0", decode_responses=True)
+        self.client = client
+        self.key = key
+
+    def acquire(self, holder: str, ttl: float) -> bool:
+        ttl_ms = int(ttl * 1000)
+        if self.client.eval(self.RENEW_SCRIPT, 1, self.key, holder, ttl_ms):
+            return True
+        return bool(self.client.set(self.key, holder, nx=True, px=ttl_ms))
+
+    def release(self, holder: str):
+        self.client.eval(self.RELEASE_SCRIPT, 1, self.key, holder)
+
+    def current_holder(self) -> Optional[str]:
+        value = self.client.get(self.key)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+
+
+class PostgresLease(LeaseBackend):
+    """Postgres advisory lock 租约（锁绑定在专用连接上，连接断开即释放）"""
+
+    name = "postgres"
+
+    def __init__(self, dsn: str = None, key: str = DEFAULT_LEASE_KEY, connect: Callable = None):
+        """
+        Args:
+            dsn: 连接串，如 postgresql://user:pass@db:5432/agent2im
+            key: 租约名称（转换为 advisory lock 的整数键）
+            connect: 创建连接的函数（psycopg2.connect 或兼容的替身，传入时忽略 dsn 的驱动选择）
+        """
+        if connect is None:
+            import psycopg2  # 仅使用 Postgres 选主时需要安装
+            connect = psycopg2.connect
+        self.dsn = dsn
+        self.key = key
+        self.lock_id = zlib.crc32(key.encode('utf-8'))
+        self._connect = connect
+        self._conn = None
+        self._held = False
+
+    def _query(self, sql: str, params: tuple = ()):
+        """在专用连接上执行查询，返回第一行"""
+        if self._conn is None:
+            self._conn = self._connect(self.dsn)
+            self._conn.autocommit = True
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+    def _drop_connection(self):
+        """丢弃连接（锁随连接释放）"""
+        conn, self._conn = self._conn, None
+        self._held = False
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def acquire(self, holder: str, ttl: float) -> bool:
+        try:
+            if self._held:
+                # 会话锁无需续约，只确认连接仍然可用
+                self._query("SELECT 1")
+                return True
+            row = self._query("SELECT pg_try_advisory_lock(%s)", (self.lock_id,))
+            self._held = bool(row and row[0])
+            return self._held
+        except Exception:
+            # 连接断开时锁已由数据库释放
+            self._drop_connection()
+            raise
+
+    def release(self, holder: str):
+        if not self._held:
+            return
+        try:
+            self._query("SELECT pg_advisory_unlock(%s)", (self.lock_id,))
+        finally:
+            self._drop_connection()
+
+
+def create_lease_backend(config: Dict[str, Any]) -> Optional[LeaseBackend]:
+    """
+    根据配置创建租约后端
+
+    Args:
+        config: schedules.leader 配置，backend 为 file / redis / postgres / none
+
+    Returns:
+        LeaseBackend 实例，backend 为 none 时返回 None（不选主，直接运行）
+    """
+    backend = (config.get("backend") or "file").lower()
+    key = config.get("key", DEFAULT_LEASE_KEY)
+    if backend == "none":
+        return None
+    if backend == "file":
+        return FileLease(config.get("path"))
+    if backend == "redis":
+        return RedisLease(url=config.get("url"), key=key)
+    if backend == "postgres":
+        return PostgresLease(dsn=config.get("url"), key=key)
+    raise ValueError(f"未知的选主后端: {backend}")
+
+
+class LeaderElector:
+    """基于租约的选主"""
+
+    def __init__(self, backend: LeaseBackend, ttl: float = 30, on_elected: Callable = None,
+                 on_demoted: Callable = None, holder: str = None):
+        """
+        初始化选主
+
+        Args:
+            backend: 租约后端
+            ttl: 租约时长（秒），默认30；每 ttl/3 续约或尝试抢占一次
+            on_elected: 成为主副本时的回调
+            on_demoted: 失去主副本身份时的回调
+            holder: 副本标识，默认为 主机名:进程号:随机后缀
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.interval = max(ttl / 3, 0.1)
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.holder = holder or make_holder_id()
+
+        self.is_leader = False
+        self.leader_since: Optional[float] = None
+        self.last_renewed: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台选主线程（立即尝试一次）"""
+        self._stop.clear()
+        self.tick()
+        self._thread = threading.Thread(target=self._loop, name="scheduler-leader", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.tick()
+
+    def tick(self):
+        """续约或抢占一次，并根据结果切换主/从身份"""
+        try:
+            acquired = self.backend.acquire(self.holder, self.ttl)
+            self.last_error = None
+        except Exception as e:
+            acquired = False
+            self.last_error = str(e)
+            print(f"⚠️ 调度器选主失败（{self.backend.name}）: {e}")
+
+        if acquired:
+            self.last_renewed = time.time()
+            if not self.is_leader:
+                self._promote()
+        elif self.is_leader:
+            self._demote()
+
+    def _promote(self):
+        self.is_leader = True
+        self.leader_since = time.time()
+        print(f"👑 当前副本成为调度器主副本: {self.holder}（{self.backend.name}）")
+        if self.on_elected:
+            try:
+                self.on_elected()
+            except Exception as e:
+                print(f"❌ 成为主副本后启动任务失败: {e}，释放租约")
+                self._demote()
+                self._release()
+
+    def _demote(self):
+        self.is_leader = False
+        self.leader_since = None
+        print(f"⏸️ 当前副本失去调度器主副本身份: {self.holder}")
+        if self.on_demoted:
+            try:
+                self.on_demoted()
+            except Exception as e:
+                print(f"❌ 降级时暂停任务失败: {e}")
+
+    def _release(self):
+        try:
+            self.backend.release(self.holder)
+        except Exception as e:
+            print(f"⚠️ 释放调度器租约失败: {e}")
+
+    def stop(self):
+        """停止选主并释放租约（主副本退出后其他副本立即接管）"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        if self.is_leader:
+            self._demote()
+        self._release()
+
+    def status(self) -> Dict[str, Any]:
+        """选主状态"""
+        try:
+            current = self.backend.current_holder()
+        except Exception:
+            current = None
+        return {
+            "backend": self.backend.name,
+            "holder": self.holder,
+            "is_leader": self.is_leader,
+            "leader": current,
+            "ttl": self.ttl,
+            "leader_since": self.leader_since,
+            "last_renewed": self.last_renewed,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,44 @@
+"""
+定时任务触发器
+
+OffsetTrigger: 在另一个触发器的每次触发时间之前（或之后）固定时长触发，
+如主任务前10分钟的预热任务、按租户哈希错峰延后的任务
+"""
+
+from datetime import timedelta
+
+from apscheduler.triggers.base import BaseTrigger
+
+
+class OffsetTrigger(BaseTrigger):
+    """基准触发器的每次触发时间减去 offset（offset 为负时延后触发；可序列化，随任务持久化）"""
+
+    __slots__ = 'base', 'offset'
+
+    def __init__(self, base: BaseTrigger, offset: timedelta):
+        """
+        Args:
+            base: 基准触发器（主任务的触发器）
+            offset: 提前的时长（为负时表示延后）
+        """
+        self.base = base
+        self.offset = offset
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        # 基准触发器在 now + offset 之后的下一次触发，提前 offset 即为不早于 now 的下一次触发
+        base_previous = previous_fire_time + self.offset if previous_fire_time else None
+        base_next = self.base.get_next_fire_time(base_previous, now + self.offset)
+        return base_next - self.offset if base_next else None
+
+    def __getstate__(self):
+        return {'version': 1, 'base': self.base, 'offset': self.offset}
+
+    def __setstate__(self, state):
+        self.base = state['base']
+        self.offset = state['offset']
+
+    def __str__(self):
+        return f"offset[{self.base}, {-self.offset.total_seconds():+g}s]"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (base={self.base!r}, offset={self.offset!r})>"
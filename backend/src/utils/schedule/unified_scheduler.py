@@ -1,32 +1,77 @@
 """
 统一定时任务调度器
 
-支持新闻推送和工时检查任务
+支持新闻推送和工时检查任务，每个任务按声明的执行方式（thread / process / subprocess）运行。
+同一时刻配置的任务可按租户键哈希错峰（jitter），每类任务可限制同时运行的数量（type_concurrency）。
+任务和运行记录持久化到 SQLite，启动时补跑停机期间错过的任务。
+多副本部署时通过租约选主，只有主副本触发定时任务。
 """
 
 import yaml
 from pathlib import Path
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import threading
+import time
+import zlib
 import pytz
 
 import sys
 import os
 
-from src.service.feishu.news import run_news_and_publish
+from src.service.feishu.news import run_news_pipeline
 from src.service.feishu import LaborHourManager
+from src.utils.feishu.api_metrics import api_metrics
+from src.utils.schedule.job_executor import JobExecutor, DEFAULT_EXECUTORS, EXECUTOR_MODES
+from src.utils.schedule.job_store import SQLiteJobStore, RunHistory
+from src.utils.schedule.leader import LeaderElector, create_lease_backend
+from src.utils.schedule.triggers import OffsetTrigger
+
+
+# 任务函数所在模块（进程池和子进程按模块路径导入任务函数）
+TASK_MODULE = "src.utils.schedule.unified_scheduler"
+
+# 定时任务配置文件（修改后热加载）
+CONFIG_FILES = ("labor_hour.yaml", "news.yaml")
+
+# 补跑任务的 ID 后缀
+CATCH_UP_SUFFIX = "__catch_up"
+
+# 预热任务的 ID 后缀（在主任务之前 warm_up 分钟预热缓存）
+WARM_UP_SUFFIX = "__warm_up"
+
+# 按阶段依赖图执行的任务类型（支持 stage_deadlines）
+STAGED_TASK_TYPES = ("news", "labor_hour")
+
+# 当前运行的调度器（持久化的任务只保存函数引用和任务ID，执行时通过它找到任务配置）
+_current_scheduler = None
+
+
+def run_scheduled_task(task_id: str, trigger: str = "scheduled"):
+    """调度器触发的任务入口（可序列化的函数引用，参数只有任务ID）"""
+    if _current_scheduler is None:
+        print(f"⚠️ 调度器未启动，跳过任务 {task_id}")
+        return {"status": "error", "message": "调度器未启动"}
+    if not _current_scheduler.is_leader:
+        print(f"⏭️ 当前副本不是主副本，跳过任务 {task_id}")
+        return {"status": "skipped", "message": "当前副本不是主副本"}
+    return _current_scheduler.run_task(task_id, trigger=trigger)
 
 
 class UnifiedScheduler:
     """统一定时任务调度器"""
     
-    def __init__(self, config_dir: str = None):
+    def __init__(self, config_dir: str = None, db_path: str = None):
         """
         初始化统一调度器
         
         Args:
             config_dir: 配置文件目录路径
+            db_path: 任务和运行记录的 SQLite 文件路径，默认为 backend/data/scheduler.db
         """
         # 配置文件目录
         if config_dir is None:
@@ -41,8 +86,51 @@ class UnifiedScheduler:
         # 加载配置
         self.load_config()
         
-        # 创建调度器
-        self.scheduler = BackgroundScheduler(timezone=self.timezone)
+        # 创建调度器（任务持久化到 SQLite）
+        self.scheduler = BackgroundScheduler(
+            jobstores={"default": SQLiteJobStore(db_path)},
+            timezone=self.timezone
+        )
+        
+        # 任务执行器（进程池 / 子进程）
+        self.executor = JobExecutor(process_workers=self.config.get("process_workers", 2))
+        
+        # 运行记录
+        self.history = RunHistory(db_path, timezone=self.timezone)
+        
+        # 已启用任务的执行配置 {task_id: {...}}（待命副本同样需要，用于手动触发）
+        self.task_specs = self.build_task_specs(self.config.get("tasks", []))
+        
+        # 正在进行的运行 {task_id: {run_id, spec, api_run, queued_at}}，同一任务同时只运行一次
+        self._active_runs = {}
+        self._runs_lock = threading.Lock()
+        
+        # 每类任务同时运行的数量上限 {任务类型: 信号量}（修改后需要重启）
+        self._type_slots = {
+            task_type: threading.BoundedSemaphore(limit)
+            for task_type, limit in (self.config.get("type_concurrency") or {}).items()
+        }
+        
+        # 手动触发的任务在后台线程中执行，接口立即返回 run_id
+        self._trigger_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="schedule-trigger")
+        
+        # 配置热加载（reload_interval <= 0 时不监听配置文件）
+        self.reload_events = deque(maxlen=20)
+        self._reload_lock = threading.RLock()
+        self._watch_stop = threading.Event()
+        self._watch_thread = None
+        
+        # 多副本选主（backend: none 时不选主，直接作为主副本运行）
+        leader_config = self.config.get("leader", {})
+        lease_backend = create_lease_backend(leader_config)
+        self.elector = None
+        if lease_backend is not None:
+            self.elector = LeaderElector(
+                lease_backend,
+                ttl=leader_config.get("ttl", 30),
+                on_elected=self._on_elected,
+                on_demoted=self._on_demoted
+            )
         
         print(f"📅 统一定时任务调度器初始化完成")
         print(f"   配置目录: {self.config_dir}")
@@ -50,25 +138,52 @@ class UnifiedScheduler:
     
     def load_config(self):
         """加载配置文件 - 从 labor_hour.yaml 和 news.yaml 合并任务配置"""
+        self.config = self.read_config()
+        self.timezone = self.config["timezone"]
+        self._config_mtimes = self._read_config_mtimes()
+    
+    def read_config(self, strict: bool = False) -> dict:
+        """
+        读取并合并 labor_hour.yaml 和 news.yaml 中的定时任务配置
+        
+        Args:
+            strict: 严格模式（热加载时使用），文件解析失败时抛出异常而不是跳过
+        
+        Returns:
+            {timezone, process_workers, catch_up_window, reload_interval, leader, type_concurrency, tasks}
+        """
         all_tasks = []
         timezone = "Asia/Shanghai"
+        process_workers = 2
+        catch_up_window = 3600
+        reload_interval = 30
+        leader = {}
+        type_concurrency = {}
         
         # 1. 加载 labor_hour.yaml
         labor_config_file = self.config_dir / "labor_hour.yaml"
         if labor_config_file.exists():
             try:
                 with open(labor_config_file, 'r', encoding='utf-8') as f:
-                    labor_config = yaml.safe_load(f)
+                    labor_config = yaml.safe_load(f) or {}
+                schedules = labor_config.get('schedules') or {}
                 
-                # 获取时区
-                timezone = labor_config.get('schedules', {}).get('timezone', timezone)
+                # 获取时区、进程池大小、补跑窗口和热加载间隔
+                timezone = schedules.get('timezone', timezone)
+                process_workers = schedules.get('process_workers', process_workers)
+                catch_up_window = schedules.get('catch_up_window', catch_up_window)
+                reload_interval = schedules.get('reload_interval', reload_interval)
+                leader = schedules.get('leader', leader) or {}
+                type_concurrency = schedules.get('type_concurrency', type_concurrency) or {}
                 
                 # 获取任务
-                labor_tasks = labor_config.get('schedules', {}).get('tasks', [])
+                labor_tasks = schedules.get('tasks') or []
                 all_tasks.extend(labor_tasks)
                 
                 print(f"✅ 成功加载 labor_hour.yaml，{len(labor_tasks)} 个任务")
             except Exception as e:
+                if strict:
+                    raise ValueError(f"labor_hour.yaml: {e}")
                 print(f"⚠️ 加载 labor_hour.yaml 失败: {e}")
         else:
             print(f"⚠️ 未找到 labor_hour.yaml")
@@ -78,95 +193,342 @@ class UnifiedScheduler:
         if news_config_file.exists():
             try:
                 with open(news_config_file, 'r', encoding='utf-8') as f:
-                    news_config = yaml.safe_load(f)
+                    news_config = yaml.safe_load(f) or {}
                 
                 # 获取任务
-                news_tasks = news_config.get('schedules', {}).get('tasks', [])
+                news_tasks = (news_config.get('schedules') or {}).get('tasks') or []
                 all_tasks.extend(news_tasks)
                 
                 print(f"✅ 成功加载 news.yaml，{len(news_tasks)} 个任务")
             except Exception as e:
+                if strict:
+                    raise ValueError(f"news.yaml: {e}")
                 print(f"⚠️ 加载 news.yaml 失败: {e}")
         else:
             print(f"⚠️ 未找到 news.yaml")
         
+        if not isinstance(type_concurrency, dict) or not all(
+                isinstance(limit, int) and limit > 0 for limit in type_concurrency.values()):
+            if strict:
+                raise ValueError(f"type_concurrency 无效: {type_concurrency}（应为 任务类型: 正整数）")
+            print(f"⚠️ type_concurrency 无效，不限制并发: {type_concurrency}")
+            type_concurrency = {}
+        
+        if strict:
+            pytz.timezone(timezone)  # 无效时区抛出 UnknownTimeZoneError
+        
+        print(f"✅ 配置加载完成，共 {len(all_tasks)} 个任务")
+        
         # 合并配置
-        self.config = {
+        return {
             "timezone": timezone,
+            "process_workers": process_workers,
+            "catch_up_window": catch_up_window,
+            "reload_interval": reload_interval,
+            "leader": leader,
+            "type_concurrency": type_concurrency,
             "tasks": all_tasks
         }
-        self.timezone = timezone
-        
-        print(f"✅ 配置加载完成，共 {len(all_tasks)} 个任务")
     
-    def setup_tasks(self):
-        """设置所有定时任务"""
-        try:
-            tasks = self.config.get("tasks", [])
+    def build_task_specs(self, tasks: list, strict: bool = False, timezone: str = None) -> dict:
+        """
+        解析任务配置，生成已启用任务的执行配置
+        
+        Args:
+            tasks: 配置文件中的任务列表
+            strict: 严格模式（热加载时使用），任务配置无效时抛出 ValueError 而不是跳过该任务
+            timezone: 任务使用的时区，默认为当前时区
+        
+        Returns:
+            {task_id: {name, target, kwargs, mode, timeout, memory_limit_mb, catch_up, trigger, schedule_desc, config}}，
+            配置了 warm_up 的任务额外生成 {task_id}__warm_up 预热任务
+        """
+        timezone = timezone or self.timezone
+        
+        def invalid(message):
+            if strict:
+                raise ValueError(message)
+            print(f"⚠️ {message}")
+        
+        specs = {}
+        for task in tasks:
+            if not task.get("enabled", False):
+                print(f"⏭️ 跳过禁用的任务: {task.get('name')}")
+                continue
             
-            for task in tasks:
-                if not task.get("enabled", False):
-                    print(f"⏭️ 跳过禁用的任务: {task.get('name')}")
-                    continue
-                
-                task_id = task.get("id")
-                task_name = task.get("name")
-                task_type = task.get("type")
-                schedule_config = task.get("schedule", "00:00")
-                
-                # 根据任务类型选择执行函数
-                if task_type == "news":
-                    job_func = self.run_news_task
-                elif task_type == "labor_hour":
-                    offset = task.get("offset", 0)  # 默认为0（今天）
-                    job_func = lambda o=offset: self.run_labor_hour_task(o)
-                elif task_type == "labor_month_summary":
-                    mention_users = task.get("mention_users", [])
-                    job_func = lambda mu=mention_users: self.run_month_summary_task(mu)
-                else:
-                    print(f"⚠️ 未知的任务类型: {task_type}")
+            task_id = task.get("id")
+            task_name = task.get("name")
+            task_type = task.get("type")
+            schedule_config = task.get("schedule", "00:00")
+            
+            if not task_id:
+                invalid(f"任务缺少 id: {task_name}")
+                continue
+            if task_id in specs:
+                invalid(f"重复的任务 id: {task_id}")
+                continue
+            
+            # 根据任务类型选择执行函数
+            if task_type == "news":
+                target, kwargs = f"{TASK_MODULE}:news_task", {}
+            elif task_type == "labor_hour":
+                offset = task.get("offset", 0)  # 默认为0（今天）
+                target, kwargs = f"{TASK_MODULE}:labor_hour_task", {"offset": offset}
+            elif task_type == "labor_month_summary":
+                mention_users = task.get("mention_users", [])
+                target, kwargs = f"{TASK_MODULE}:month_summary_task", {"mention_users": mention_users}
+            elif task_type == "leave_audit":
+                target, kwargs = f"{TASK_MODULE}:leave_audit_task", {}
+            else:
+                invalid(f"未知的任务类型: {task_type}")
+                continue
+            kwargs["timezone"] = timezone
+            
+            # 分阶段执行的任务：timeout 同时作为阶段依赖图的截止时间（thread 方式下也能放弃超时的阶段）
+            if task_type in STAGED_TASK_TYPES:
+                stage_deadlines = task.get("stage_deadlines")
+                if stage_deadlines is not None and (
+                        not isinstance(stage_deadlines, dict)
+                        or not all(isinstance(v, (int, float)) and v > 0 for v in stage_deadlines.values())):
+                    invalid(f"任务 {task_id} 的 stage_deadlines 无效: {stage_deadlines}（应为 阶段: 正数秒）")
                     continue
-                
-                # 添加定时任务
-                # 处理 cron 表达式和普通时间
+                if task.get("timeout"):
+                    kwargs["deadline"] = task["timeout"]
+                if stage_deadlines:
+                    kwargs["stage_deadlines"] = stage_deadlines
+            
+            # 执行方式：任务配置优先，否则使用该类型的默认方式
+            executor_mode = task.get("executor", DEFAULT_EXECUTORS.get(task_type, "thread"))
+            if executor_mode not in EXECUTOR_MODES:
+                invalid(f"任务 {task_id} 的执行方式无效: {executor_mode}")
+                continue
+            
+            # 处理 cron 表达式和普通时间
+            try:
                 if schedule_config == "cron":
                     # 使用cron表达式
                     cron_expr = task.get("cron", "0 0 * * *")
                     cron_parts = cron_expr.split()
-                    if len(cron_parts) == 5:
-                        trigger = CronTrigger(
-                            minute=cron_parts[0],
-                            hour=cron_parts[1],
-                            day=cron_parts[2],
-                            month=cron_parts[3],
-                            day_of_week=cron_parts[4],
-                            timezone=self.timezone
-                        )
-                        schedule_desc = f"cron({cron_expr})"
-                    else:
-                        print(f"⚠️ 无效的 cron 表达式: {cron_expr}")
-                        continue
+                    if len(cron_parts) != 5:
+                        raise ValueError(f"无效的 cron 表达式: {cron_expr}")
+                    trigger = CronTrigger(
+                        minute=cron_parts[0],
+                        hour=cron_parts[1],
+                        day=cron_parts[2],
+                        month=cron_parts[3],
+                        day_of_week=cron_parts[4],
+                        timezone=timezone
+                    )
+                    schedule_desc = f"cron({cron_expr})"
                 else:
                     # 普通时间格式 HH:MM
                     hour, minute = map(int, schedule_config.split(":"))
                     trigger = CronTrigger(
                         hour=hour,
                         minute=minute,
-                        timezone=self.timezone
+                        timezone=timezone
                     )
                     schedule_desc = f"每天 {schedule_config}"
-                
+            except ValueError as e:
+                invalid(f"任务 {task_id} 的执行时间无效: {e}")
+                continue
+            
+            # 错峰：按租户键（默认任务ID）哈希，在 [0, jitter) 秒内固定延后，同一时刻的任务分散执行
+            jitter = task.get("jitter")
+            if jitter:
+                if not isinstance(jitter, (int, float)) or isinstance(jitter, bool) or jitter < 1:
+                    invalid(f"任务 {task_id} 的 jitter 无效: {jitter}（应为正数秒）")
+                    continue
+                tenant_key = str(task.get("tenant_key") or task_id)
+                delay = zlib.crc32(tenant_key.encode('utf-8')) % int(jitter)
+                trigger = OffsetTrigger(trigger, timedelta(seconds=-delay))
+                schedule_desc = f"{schedule_desc} 错峰 +{delay}s"
+            
+            specs[task_id] = {
+                "name": task_name,
+                "type": task_type,
+                "target": target,
+                "kwargs": kwargs,
+                "mode": executor_mode,
+                "timeout": task.get("timeout"),
+                "memory_limit_mb": task.get("memory_limit_mb"),
+                "catch_up": task.get("catch_up", True),
+                "trigger": trigger,
+                "schedule_desc": schedule_desc,
+                "config": dict(task, timezone=timezone)  # 热加载时比较任务是否变化
+            }
+            
+            warm_up = task.get("warm_up")
+            if warm_up:
+                warm_up_spec = self._build_warm_up_spec(specs[task_id], task_type, warm_up, invalid)
+                if warm_up_spec:
+                    specs[f"{task_id}{WARM_UP_SUFFIX}"] = warm_up_spec
+        return specs
+    
+    def _build_warm_up_spec(self, spec: dict, task_type: str, warm_up, invalid):
+        """
+        生成主任务的预热任务：在主任务每次触发前 warm_up 分钟预热同一进程内的缓存
+        
+        只支持在线程中执行的工时检查（缓存在调度器进程内，进程池 / 子进程中的检查无法复用）
+        """
+        if task_type != "labor_hour":
+            invalid(f"任务 {spec['config']['id']} 的类型 {task_type} 不支持 warm_up")
+            return None
+        if spec["mode"] != "thread":
+            invalid(f"任务 {spec['config']['id']} 的执行方式为 {spec['mode']}，缓存无法复用，不支持 warm_up")
+            return None
+        if not isinstance(warm_up, (int, float)) or isinstance(warm_up, bool) or warm_up <= 0:
+            invalid(f"任务 {spec['config']['id']} 的 warm_up 无效: {warm_up}（应为正数分钟）")
+            return None
+        
+        return {
+            "name": f"{spec['name']}（预热）",
+            "type": "labor_warm_up",
+            "target": f"{TASK_MODULE}:labor_warm_up_task",
+            "kwargs": {"offset": spec["kwargs"]["offset"], "timezone": spec["kwargs"]["timezone"]},
+            "mode": "thread",
+            "timeout": None,
+            "memory_limit_mb": None,
+            "catch_up": False,  # 错过的预热没有意义
+            "trigger": OffsetTrigger(spec["trigger"], timedelta(minutes=warm_up)),
+            "schedule_desc": f"{spec['schedule_desc']} 前 {warm_up} 分钟",
+            "config": spec["config"]
+        }
+    
+    def _read_config_mtimes(self) -> dict:
+        """配置文件的修改时间 {文件名: mtime}（文件不存在时为 None）"""
+        mtimes = {}
+        for name in CONFIG_FILES:
+            path = self.config_dir / name
+            mtimes[name] = path.stat().st_mtime if path.exists() else None
+        return mtimes
+    
+    def _record_reload(self, status: str, **details):
+        """记录一次热加载事件（通过状态接口查询）"""
+        event = {
+            "time": datetime.now(pytz.timezone(self.timezone)).isoformat(),
+            "status": status,
+            **details
+        }
+        self.reload_events.append(event)
+        return event
+    
+    def reload_config(self, force: bool = False) -> dict:
+        """
+        热加载定时任务配置：只新增、删除或重新调度发生变化的任务
+        
+        新配置无效时拒绝加载，继续使用上一次有效的配置。
+        
+        Args:
+            force: 配置文件未修改时也重新加载
+        
+        Returns:
+            热加载事件 {time, status: applied/unchanged/rejected, added, removed, changed, ...}
+        """
+        with self._reload_lock:
+            mtimes = self._read_config_mtimes()
+            if not force and mtimes == self._config_mtimes:
+                return {"status": "unchanged"}
+            # 无论成功与否都记录本次修改时间，无效的配置不会被反复尝试
+            self._config_mtimes = mtimes
+            
+            try:
+                config = self.read_config(strict=True)
+                specs = self.build_task_specs(config["tasks"], strict=True, timezone=config["timezone"])
+            except Exception as e:
+                print(f"❌ 定时任务配置无效，继续使用上一次有效的配置: {e}")
+                return self._record_reload("rejected", error=str(e))
+            
+            old_specs = self.task_specs
+            added = [task_id for task_id in specs if task_id not in old_specs]
+            removed = [task_id for task_id in old_specs if task_id not in specs]
+            changed = [
+                task_id for task_id in specs
+                if task_id in old_specs and specs[task_id]["config"] != old_specs[task_id]["config"]
+            ]
+            
+            # 需要重启才能生效的配置
+            restart_required = [
+                key for key in ("process_workers", "leader", "type_concurrency")
+                if config.get(key) != self.config.get(key)
+            ]
+            if config["timezone"] != self.timezone:
+                restart_required.append("timezone")
+            
+            try:
+                self._apply_task_changes(specs, added + changed, removed)
+            except Exception as e:
+                # 恢复变化前的任务
+                print(f"❌ 应用定时任务配置失败，已恢复原配置: {e}")
+                self._apply_task_changes(old_specs, removed + changed, added)
+                return self._record_reload("rejected", error=f"应用失败: {e}")
+            
+            # 时区只影响任务触发时间（已在任务中生效），调度器本身的时区需要重启后生效
+            self.config = dict(config, timezone=self.timezone, process_workers=self.config.get("process_workers"),
+                               leader=self.config.get("leader"), type_concurrency=self.config.get("type_concurrency"))
+            if not (added or removed or changed):
+                return self._record_reload("unchanged", restart_required=restart_required)
+            
+            print(f"🔄 定时任务配置已热加载: 新增 {added}，删除 {removed}，变更 {changed}")
+            return self._record_reload("applied", added=added, removed=removed, changed=changed,
+                                       restart_required=restart_required)
+    
+    def _apply_task_changes(self, specs: dict, upsert: list, remove: list):
+        """
+        替换任务执行配置，主副本同步新增/重新调度/删除对应的定时任务
+        
+        Args:
+            specs: 新的任务执行配置
+            upsert: 需要新增或重新调度的任务ID
+            remove: 需要删除的任务ID
+        """
+        self.task_specs = specs
+        if not (self.is_leader and self.scheduler.running):
+            # 待命副本成为主副本时按最新配置添加任务
+            return
+        
+        for task_id in remove:
+            if self.scheduler.get_job(task_id):
+                self.scheduler.remove_job(task_id)
+                print(f"🗑️ 已删除定时任务: {task_id}")
+        for task_id in upsert:
+            spec = specs[task_id]
+            self.scheduler.add_job(
+                run_scheduled_task,
+                trigger=spec["trigger"],
+                args=[task_id],
+                id=task_id,
+                name=spec["name"],
+                replace_existing=True,
+                misfire_grace_time=3600,
+                coalesce=True
+            )
+            print(f"✅ 已更新定时任务: {spec['name']} ({spec['schedule_desc']}, {spec['mode']})")
+    
+    def _watch_config(self):
+        """后台线程：按间隔检查配置文件修改时间，变化时热加载"""
+        while not self._watch_stop.wait(self.config.get("reload_interval", 30)):
+            try:
+                self.reload_config()
+            except Exception as e:
+                print(f"❌ 检查定时任务配置失败: {e}")
+    
+    def setup_tasks(self):
+        """按任务执行配置添加所有定时任务"""
+        try:
+            for task_id, spec in self.task_specs.items():
                 self.scheduler.add_job(
-                    job_func,
-                    trigger=trigger,
+                    run_scheduled_task,
+                    trigger=spec["trigger"],
+                    args=[task_id],
                     id=task_id,
-                    name=task_name,
+                    name=spec["name"],
                     replace_existing=True,
                     misfire_grace_time=3600,  # 错过后1小时内仍可执行
                     coalesce=True  # 合并错过的多次执行为一次
                 )
                 
-                print(f"✅ 已添加定时任务: {task_name} ({schedule_desc})")
+                print(f"✅ 已添加定时任务: {spec['name']} ({spec['schedule_desc']}, {spec['mode']})")
             
             print(f"\n📅 共添加 {len(self.scheduler.get_jobs())} 个定时任务")
             
@@ -174,108 +536,292 @@ class UnifiedScheduler:
             print(f"❌ 设置定时任务失败: {e}")
             raise e
     
-    def run_news_task(self):
-        """执行新闻推送任务"""
-        try:
-            print(f"\n{'='*80}")
-            print(f"⏰ 执行定时任务: 新闻推送")
-            print(f"   时间: {datetime.now(pytz.timezone(self.timezone)).strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"{'='*80}\n")
-            
-            results = run_news_and_publish()
+    def remove_stale_jobs(self):
+        """删除持久化的、已不在配置中（或已禁用）的任务，以及上次遗留的补跑任务"""
+        for job in self.scheduler.get_jobs():
+            if job.id not in self.task_specs:
+                self.scheduler.remove_job(job.id)
+                print(f"🗑️ 已删除过期的定时任务: {job.name} ({job.id})")
+    
+    def _last_fire_time(self, trigger, start: datetime, now: datetime):
+        """trigger 在 [start, now] 内最后一次应触发的时间，没有则返回 None"""
+        last = None
+        fire_time = trigger.get_next_fire_time(None, start)
+        while fire_time is not None and fire_time <= now:
+            last = fire_time
+            fire_time = trigger.get_next_fire_time(fire_time, fire_time + timedelta(microseconds=1))
+        return last
+    
+    def catch_up_missed(self, stored_next_runs: dict):
+        """
+        补跑停机期间错过的任务
+        
+        持久化的下次运行时间早于当前时间说明停机期间错过了触发；
+        若补跑窗口内最后一次应触发的时间之后没有运行记录，立即补跑一次。
+        
+        Args:
+            stored_next_runs: 启动前持久化的 {task_id: next_run_time}
+        """
+        tz = pytz.timezone(self.timezone)
+        now = datetime.now(tz)
+        window_start = now - timedelta(seconds=self.config.get("catch_up_window", 3600))
+        
+        for task_id, spec in self.task_specs.items():
+            stored = stored_next_runs.get(task_id)
+            if not spec["catch_up"] or stored is None or stored > now:
+                continue
             
-            if results:
-                success_count = sum(1 for r in results.values() if hasattr(r, 'status_code') and r.status_code == 200)
-                print(f"\n✅ 新闻推送任务完成：{success_count}/{len(results)} 个群组发送成功")
-            else:
-                print(f"\n⚠️ 新闻推送任务完成，但未发送任何消息")
+            missed = self._last_fire_time(spec["trigger"], max(stored, window_start), now)
+            if missed is None:
+                print(f"⏭️ {spec['name']} 错过的执行 ({stored}) 超出补跑窗口，跳过")
+                continue
+            if self.history.ran_since(task_id, missed.timestamp()):
+                continue
             
-            print(f"{'='*80}\n")
+            self.scheduler.add_job(
+                run_scheduled_task,
+                trigger=DateTrigger(run_date=now, timezone=tz),
+                args=[task_id, "catch_up"],
+                id=f"{task_id}{CATCH_UP_SUFFIX}",
+                name=f"{spec['name']}（补跑）",
+                replace_existing=True,
+                misfire_grace_time=None
+            )
+            print(f"🔁 补跑错过的任务: {spec['name']}（应于 {missed} 执行）")
+    
+    def _claim_run(self, task_id: str, trigger: str):
+        """
+        登记一次运行（同一任务同时只允许一次运行）
+        
+        Returns:
+            (run_id, 是否新登记)；任务正在运行时返回正在进行的 run_id 和 False
+        """
+        spec = self.task_specs.get(task_id)
+        if spec is None:
+            raise KeyError(task_id)
+        
+        with self._runs_lock:
+            active = self._active_runs.get(task_id)
+            if active is not None:
+                return active["run_id"], False
             
-        except Exception as e:
-            print(f"\n❌ 新闻推送任务失败: {e}")
-            import traceback
-            traceback.print_exc()
-            print(f"{'='*80}\n")
+            run_id = self.history.start(
+                task_id,
+                job_name=spec["name"],
+                trigger=trigger,
+                args={"target": spec["target"], "kwargs": spec["kwargs"], "mode": spec["mode"]}
+            )
+            self._active_runs[task_id] = {"run_id": run_id, "spec": spec, "api_run": None, "queued_at": None}
+            return run_id, True
+    
+    def _execute_run(self, task_id: str, run_id: str):
+        """执行已登记的运行，结束后写入运行记录"""
+        active = self._active_runs[task_id]
+        spec = active["spec"]
+        outcome = {"status": "error", "message": "执行器异常退出"}
+        slot = self._type_slots.get(spec["type"])
+        queued = 0.0
+        try:
+            # 同类任务达到并发上限时排队等待
+            if slot is not None and not slot.acquire(blocking=False):
+                print(f"⏳ {spec['type']} 类任务已达并发上限，{spec['name']} 排队等待")
+                active["queued_at"] = time.time()
+                slot.acquire()
+                queued = round(time.time() - active["queued_at"], 3)
+                active["queued_at"] = None
+            try:
+                # thread 方式下任务的飞书接口调用计入该运行，用于查询进度
+                with api_metrics.track("scheduled_task", task_id=task_id, run_id=run_id) as api_run:
+                    active["api_run"] = api_run
+                    outcome = self.executor.run(
+                        spec["target"],
+                        spec["kwargs"],
+                        mode=spec["mode"],
+                        timeout=spec["timeout"],
+                        memory_limit_mb=spec["memory_limit_mb"],
+                        name=spec["name"]
+                    )
+            finally:
+                if slot is not None:
+                    slot.release()
+            if queued:
+                outcome["queued"] = queued
+        finally:
+            self.history.finish(run_id, outcome["status"], error=outcome.get("message"), outcome=outcome)
+            with self._runs_lock:
+                self._active_runs.pop(task_id, None)
+        outcome["run_id"] = run_id
+        return outcome
+    
+    def run_task(self, task_id: str, trigger: str = "scheduled"):
+        """
+        按任务声明的执行方式运行任务（阻塞），并记录运行记录
+        
+        Args:
+            task_id: 任务ID
+            trigger: 触发方式 scheduled / catch_up / manual
+        
+        Returns:
+            执行结果（JobExecutor.run 的返回值，附带 run_id）；任务正在运行时返回 skipped
+        """
+        try:
+            run_id, created = self._claim_run(task_id, trigger)
+        except KeyError:
+            print(f"⚠️ 未找到任务配置: {task_id}")
+            return {"status": "error", "message": f"未找到任务: {task_id}"}
+        
+        if not created:
+            print(f"⏭️ 任务 {task_id} 正在运行（{run_id}），跳过本次触发")
+            return {"status": "skipped", "message": "任务正在运行", "run_id": run_id}
+        return self._execute_run(task_id, run_id)
+    
+    def submit_task(self, task_id: str, trigger: str = "manual"):
+        """
+        提交任务到后台执行，立即返回
+        
+        Args:
+            task_id: 任务ID
+            trigger: 触发方式，默认 manual
+        
+        Returns:
+            (run_id, 是否新提交)；任务正在运行时返回正在进行的 run_id 和 False
+        
+        Raises:
+            KeyError: 任务不存在
+        """
+        run_id, created = self._claim_run(task_id, trigger)
+        if created:
+            try:
+                self._trigger_pool.submit(self._execute_run, task_id, run_id)
+            except RuntimeError as e:
+                # 线程池已关闭（正在停止）
+                self.history.finish(run_id, "error", error=str(e))
+                with self._runs_lock:
+                    self._active_runs.pop(task_id, None)
+                raise
+            print(f"📨 已提交任务 {task_id}（{trigger}），run_id={run_id}")
+        return run_id, created
+    
+    def get_run(self, run_id: str):
+        """
+        查询一次运行的状态和结果
+        
+        Returns:
+            运行记录；正在运行时附带 progress（已运行时长、飞书接口调用次数），不存在时返回 None
+        """
+        record = self.history.get(run_id)
+        if record is None:
+            return None
+        
+        with self._runs_lock:
+            active = next((a for a in self._active_runs.values() if a["run_id"] == run_id), None)
+        record["finished"] = record["status"] != "running"
+        if active is not None:
+            api_run = active["api_run"]
+            progress = {"mode": active["spec"]["mode"]}
+            if active["queued_at"] is not None:
+                # 同类任务达到并发上限，排队中
+                progress["queued"] = round(time.time() - active["queued_at"], 3)
+            elif api_run is not None:
+                progress["elapsed"] = round(time.time() - api_run.started_at, 3)
+                progress["api_calls"] = api_run.calls
+                progress["api_errors"] = api_run.errors
+            record["progress"] = progress
+        return record
+    
+    def run_news_task(self):
+        """执行新闻推送任务（当前线程）"""
+        return news_task(timezone=self.timezone)
     
     def run_labor_hour_task(self, offset: int = 0):
         """
-        执行工时检查任务
+        执行工时检查任务（当前线程）
         
         Args:
             offset: 日期偏移量，-1=昨天，0=今天，1=明天
         """
-        try:
-            print(f"\n{'='*80}")
-            print(f"⏰ 执行定时任务: 工时检查")
-            print(f"   时间: {datetime.now(pytz.timezone(self.timezone)).strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"   日期偏移: {offset} ({'昨天' if offset == -1 else '今天' if offset == 0 else '明天' if offset == 1 else f'{offset}天'})")
-            print(f"{'='*80}\n")
-            
-            # 使用 LaborHourManager 的统一接口
-            result = LaborHourManager.check(offset=offset)
-            
-            if result and result.get('status') == 'success':
-                print(f"\n✅ 工时检查任务完成")
-            else:
-                print(f"\n⚠️ 工时检查任务完成，但可能存在问题")
-            
-            print(f"{'='*80}\n")
-            
-        except Exception as e:
-            print(f"\n❌ 工时检查任务失败: {e}")
-            import traceback
-            traceback.print_exc()
-            print(f"{'='*80}\n")
+        return labor_hour_task(offset=offset, timezone=self.timezone)
     
     def run_month_summary_task(self, mention_users: list = None):
-        """执行月度总结任务"""
-        try:
-            print(f"\n{'='*80}")
-            print(f"⏰ 执行定时任务: 工时月报")
-            print(f"   时间: {datetime.now(pytz.timezone(self.timezone)).strftime('%Y-%m-%d %H:%M:%S')}")
-            if mention_users:
-                print(f"   @人员: {', '.join(mention_users)}")
-            print(f"{'='*80}\n")
-            
-            # 运行月度总结
-            result = LaborHourManager.monthly_summary(mention_users=mention_users)
-            
-            if result and result.get('status') == 'success':
-                print(f"\n✅ 工时月报任务完成")
-            else:
-                print(f"\n⚠️ 工时月报任务完成，但可能存在问题")
-            
-            print(f"{'='*80}\n")
+        """执行月度总结任务（当前线程）"""
+        return month_summary_task(mention_users=mention_users, timezone=self.timezone)
+    
+    @property
+    def is_leader(self) -> bool:
+        """当前副本是否为主副本（未启用选主时始终为主副本）"""
+        return self.elector is None or self.elector.is_leader
+    
+    def _on_elected(self):
+        """成为主副本：恢复持久化的任务，补跑错过的任务后开始调度"""
+        # 与配置热加载互斥，保证按同一份配置添加任务
+        with self._reload_lock:
+            # 暂停状态启动，先读取持久化的下次运行时间，再用当前配置替换任务
+            if not self.scheduler.running:
+                self.scheduler.start(paused=True)
+            stored_next_runs = {job.id: job.next_run_time for job in self.scheduler.get_jobs()}
             
-        except Exception as e:
-            print(f"\n❌ 工时月报任务失败: {e}")
-            import traceback
-            traceback.print_exc()
-            print(f"{'='*80}\n")
+            self.setup_tasks()
+            self.remove_stale_jobs()
+            self.catch_up_missed(stored_next_runs)
+            self.scheduler.resume()
+        
+        print(f"\n🚀 统一定时任务调度器开始调度")
+        print(f"   任务数量: {len(self.scheduler.get_jobs())}")
+        
+        # 打印所有任务的下次执行时间
+        for job in self.scheduler.get_jobs():
+            print(f"   📌 {job.name} - 下次执行: {job.next_run_time}")
+    
+    def _on_demoted(self):
+        """失去主副本身份：暂停调度（正在执行的任务会执行完）"""
+        with self._reload_lock:
+            if self.scheduler.running:
+                self.scheduler.pause()
+        print(f"⏸️ 统一定时任务调度器已暂停，等待重新成为主副本")
     
     def start(self):
-        """启动调度器"""
+        """启动调度器（启用选主时，成为主副本后才开始调度）"""
+        global _current_scheduler
         try:
-            self.setup_tasks()
-            self.scheduler.start()
+            _current_scheduler = self
             
             print(f"\n🚀 统一定时任务调度器已启动")
             print(f"   时区: {self.timezone}")
-            print(f"   任务数量: {len(self.scheduler.get_jobs())}")
             
-            # 打印所有任务的下次执行时间
-            for job in self.scheduler.get_jobs():
-                print(f"   📌 {job.name} - 下次执行: {job.next_run_time}")
+            if self.elector is None:
+                self._on_elected()
+            else:
+                print(f"   选主: {self.elector.backend.name}（租约 {self.elector.ttl}s，副本 {self.elector.holder}）")
+                self.elector.start()
+                if not self.elector.is_leader:
+                    print(f"   ⏳ 其他副本正在调度，当前副本待命")
+            
+            # 监听配置文件，修改后热加载
+            reload_interval = self.config.get("reload_interval", 30)
+            if reload_interval and reload_interval > 0:
+                self._watch_stop.clear()
+                self._watch_thread = threading.Thread(target=self._watch_config, name="schedule-config-watcher",
+                                                      daemon=True)
+                self._watch_thread.start()
+                print(f"   配置热加载: 每 {reload_interval}s 检查一次")
             
         except Exception as e:
             print(f"❌ 启动调度器失败: {e}")
             raise e
     
     def stop(self):
-        """停止调度器"""
+        """停止调度器（主副本释放租约，其他副本立即接管）"""
+        global _current_scheduler
         try:
-            self.scheduler.shutdown()
+            self._watch_stop.set()
+            if self.elector is not None:
+                self.elector.stop()
+            if self.scheduler.running:
+                self.scheduler.shutdown()
+            self._trigger_pool.shutdown(wait=False)
+            self.executor.shutdown()
+            if _current_scheduler is self:
+                _current_scheduler = None
             print(f"🛑 统一定时任务调度器已停止")
         except Exception as e:
             print(f"❌ 停止调度器失败: {e}")
@@ -292,9 +838,157 @@ class UnifiedScheduler:
         return jobs
 
 
+
+# ========== 任务函数（按 "模块路径:函数名" 提交给 JobExecutor） ==========
+
+def news_task(timezone: str = "Asia/Shanghai", deadline: float = None, stage_deadlines: dict = None):
+    """
+    执行新闻推送任务（可在线程、进程池或子进程中执行）
+
+    Args:
+        deadline: 整个任务的截止时间（秒）
+        stage_deadlines: 各阶段的截止时间（秒）
+    """
+    try:
+        print(f"\n{'='*80}")
+        print(f"⏰ 执行定时任务: 新闻推送")
+        print(f"   时间: {datetime.now(pytz.timezone(timezone)).strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"{'='*80}\n")
+
+        pipeline = run_news_pipeline(deadline=deadline, stage_deadlines=stage_deadlines)
+        results = pipeline["results"].get("publish")
+
+        if results:
+            success_count = sum(1 for r in results.values() if hasattr(r, 'status_code') and r.status_code == 200)
+            print(f"\n✅ 新闻推送任务完成：{success_count}/{len(results)} 个群组发送成功")
+        else:
+            print(f"\n⚠️ 新闻推送任务完成，但未发送任何消息")
+
+        print(f"{'='*80}\n")
+        return {
+            "status": "success" if "publish" in pipeline["results"] else "error",
+            "message": None if "publish" in pipeline["results"] else "新闻发布阶段未完成",
+            "sent": success_count if results else 0,
+            "stages": pipeline["stages"],
+            "sources": pipeline["sources"]
+        }
+
+    except Exception as e:
+        print(f"\n❌ 新闻推送任务失败: {e}")
+        import traceback
+        traceback.print_exc()
+        print(f"{'='*80}\n")
+        return {"status": "error", "message": str(e)}
+
+
+def labor_hour_task(offset: int = 0, timezone: str = "Asia/Shanghai", deadline: float = None,
+                    stage_deadlines: dict = None):
+    """
+    执行工时检查任务（可在线程、进程池或子进程中执行）
+
+    Args:
+        offset: 日期偏移量，-1=昨天，0=今天，1=明天
+        deadline: 整个任务的截止时间（秒）
+        stage_deadlines: 各阶段的截止时间（秒）
+    """
+    try:
+        print(f"\n{'='*80}")
+        print(f"⏰ 执行定时任务: 工时检查")
+        print(f"   时间: {datetime.now(pytz.timezone(timezone)).strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"   日期偏移: {offset} ({'昨天' if offset == -1 else '今天' if offset == 0 else '明天' if offset == 1 else f'{offset}天'})")
+        print(f"{'='*80}\n")
+
+        # 使用 LaborHourManager 的统一接口
+        result = LaborHourManager.check(offset=offset, deadline=deadline, stage_deadlines=stage_deadlines)
+
+        if result and result.get('status') == 'success':
+            print(f"\n✅ 工时检查任务完成")
+        else:
+            print(f"\n⚠️ 工时检查任务完成，但可能存在问题")
+
+        print(f"{'='*80}\n")
+        return {"status": (result or {}).get('status', 'error'), "stages": (result or {}).get('stages')}
+
+    except Exception as e:
+        print(f"\n❌ 工时检查任务失败: {e}")
+        import traceback
+        traceback.print_exc()
+        print(f"{'='*80}\n")
+        return {"status": "error", "message": str(e)}
+
+
+def labor_warm_up_task(offset: int = 0, timezone: str = "Asia/Shanghai"):
+    """
+    预热工时检查使用的缓存（与随后的工时检查在同一进程的线程中执行）
+
+    Args:
+        offset: 日期偏移量，与对应的工时检查相同
+    """
+    try:
+        print(f"🔥 预热工时检查缓存（日期偏移: {offset}）")
+        result = LaborHourManager.warm_up(offset=offset)
+
+        if result and result.get('status') == 'success':
+            print(f"✅ 工时检查缓存预热完成，耗时 {result.get('elapsed', 0):.2f}s")
+        else:
+            print(f"⚠️ 工时检查缓存预热完成，但可能存在问题")
+        return {"status": (result or {}).get('status', 'error'), "elapsed": (result or {}).get('elapsed')}
+
+    except Exception as e:
+        print(f"❌ 工时检查缓存预热失败: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+def month_summary_task(mention_users: list = None, timezone: str = "Asia/Shanghai"):
+    """执行月度总结任务（可在线程、进程池或子进程中执行）"""
+    try:
+        print(f"\n{'='*80}")
+        print(f"⏰ 执行定时任务: 工时月报")
+        print(f"   时间: {datetime.now(pytz.timezone(timezone)).strftime('%Y-%m-%d %H:%M:%S')}")
+        if mention_users:
+            print(f"   @人员: {', '.join(mention_users)}")
+        print(f"{'='*80}\n")
+
+        # 运行月度总结
+        result = LaborHourManager.monthly_summary(mention_users=mention_users)
+
+        if result and result.get('status') == 'success':
+            print(f"\n✅ 工时月报任务完成")
+        else:
+            print(f"\n⚠️ 工时月报任务完成，但可能存在问题")
+
+        print(f"{'='*80}\n")
+        return {"status": (result or {}).get('status', 'error')}
+
+    except Exception as e:
+        print(f"\n❌ 工时月报任务失败: {e}")
+        import traceback
+        traceback.print_exc()
+        print(f"{'='*80}\n")
+        return {"status": "error", "message": str(e)}
+
+
+def leave_audit_task(timezone: str = "Asia/Shanghai"):
+    """请假审批全量一致性校验（重新检查回调可能遗漏的撤销、撤回）"""
+    try:
+        print(f"🔍 执行定时任务: 请假审批一致性校验 ({datetime.now(pytz.timezone(timezone)).strftime('%Y-%m-%d %H:%M:%S')})")
+        result = LaborHourManager.leave_audit()
+
+        status = (result or {}).get('status', 'error')
+        if status == 'success':
+            print(f"✅ 请假审批一致性校验完成，{len(result.get('changed', []))} 个实例有变化")
+        elif status == 'skipped':
+            print(f"⏭️ 跳过请假审批一致性校验: {result.get('message')}")
+        else:
+            print(f"⚠️ 请假审批一致性校验完成，但可能存在问题: {result.get('message') or result.get('failed_codes')}")
+        return result or {"status": "error", "message": "无结果"}
+
+    except Exception as e:
+        print(f"❌ 请假审批一致性校验失败: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 if __name__ == '__main__':
-    import time
-    
     # 创建调度器
     scheduler = UnifiedScheduler()
     
@@ -310,4 +1004,3 @@ if __name__ == '__main__':
         print("\n\n🛑 收到停止信号，正在关闭调度器...")
         scheduler.stop()
         print("👋 再见！")
-
@@ -4,11 +4,13 @@ a16z news scraper
 This module provides the A16zScraper class for scraping AI and tech insights from a16z.
 """
 
-import requests
-from tqdm import tqdm
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
+
+from .base import RankFunc, check_cancelled, select_news
+from .fetcher import FetchResponse, http_fetcher
 
 
 class A16zScraper:
@@ -48,7 +50,7 @@ class A16zScraper:
         print(f"🔍 a16z: 查找日期 {target_dates}")
         
         try:
-            response = requests.get(self.NEWS_URL, headers=self.headers, timeout=30)
+            response = http_fetcher.get(self.NEWS_URL, headers=self.headers)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'lxml')
@@ -135,10 +137,11 @@ class A16zScraper:
         print(f"🎯 总共找到 {len(news_list)} 篇 a16z 文章")
         return news_list
     
-    def get_news_content(self, news_link: str) -> str:
-        """Extract content from an a16z article"""
+    def get_news_content(self, news_link: str, response: Optional[FetchResponse] = None) -> str:
+        """Extract content from an a16z article (response: page already fetched by get_news_list, fetched here if None)"""
         try:
-            response = requests.get(news_link, headers=self.headers, timeout=30)
+            if response is None:
+                response = http_fetcher.get(news_link, headers=self.headers)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'lxml')
             
@@ -171,17 +174,26 @@ class A16zScraper:
             print(f"❌ 获取文章内容失败: {news_link}, 错误: {e}")
             return "无法获取文章内容"
     
-    def get_news_list(self) -> List[Dict[str, Any]]:
-        """Get complete news list with content"""
-        news_list = self.get_title_and_link_list()
-        news_content_list = []
+    def get_news_list(self, limit: Optional[int] = None, rank: Optional[RankFunc] = None,
+                      cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Get news list with content
+
+        Args:
+            limit: maximum number of items, content is fetched only for these
+            rank: optional ranking key applied before limiting (higher first)
+            cancel: optional cancel event, checked before fetching bodies (source deadline passed)
+        """
+        news_list = select_news(self.get_title_and_link_list(), limit, rank)
         
-        for news in tqdm(news_list, desc="💡 Getting a16z content"):
-            news_content = self.get_news_content(news['link'])
-            news['content'] = news_content
-            news_content_list.append(news)
+        check_cancelled(cancel)
+        # Fetch all article pages concurrently through the shared fetcher, then parse them
+        print(f"💡 a16z: 并发获取 {len(news_list)} 篇文章正文")
+        responses = http_fetcher.get_many([news['link'] for news in news_list], headers=self.headers)
+        for news, response in zip(news_list, responses):
+            news['content'] = self.get_news_content(news['link'], response)
         
-        return news_content_list
+        return news_list
 
 
 def get_news_list():
@@ -0,0 +1,48 @@
+"""
+Shared helpers for news scrapers
+
+Scrapers list titles and links first (cheap: one or a few list pages), then fetch
+article bodies. select_news picks the items that will actually be published before
+any body is fetched, so unused articles are never downloaded.
+
+get_news_list accepts an optional cancel event (set by JobDAG when the source passes
+its deadline); scrapers check it between steps so an abandoned source stops working
+instead of running on in the background.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Ranking key for a listed item: higher values come first
+RankFunc = Callable[[Dict[str, Any]], Any]
+
+
+def select_news(news_list: List[Dict[str, Any]], limit: Optional[int] = None,
+                rank: Optional[RankFunc] = None) -> List[Dict[str, Any]]:
+    """
+    Pick the items to fetch content for
+
+    Args:
+        news_list: listed items in source order (usually newest / top ranked first)
+        limit: maximum number of items to keep, None keeps all
+        rank: optional ranking key, items are sorted by it (descending, stable) before limiting
+
+    Returns:
+        the selected items
+    """
+    if rank is not None:
+        news_list = sorted(news_list, key=rank, reverse=True)
+    if limit is not None:
+        news_list = news_list[:max(limit, 0)]
+    return news_list
+
+
+class ScrapeCancelled(Exception):
+    """Raised inside a scraper when its fetch stage was abandoned (deadline passed)"""
+
+
+def check_cancelled(cancel: Optional[threading.Event]):
+    """Raise ScrapeCancelled if the cancel event is set"""
+    if cancel is not None and cancel.is_set():
+        raise ScrapeCancelled("source deadline passed, scraping cancelled")
@@ -0,0 +1,342 @@
+"""
+爬虫共享的 HTTP 抓取层
+
+所有爬虫通过全局实例 http_fetcher 发出请求：
+- 基于 httpx.AsyncClient，在独立的后台事件循环中执行；同步代码（各爬虫、JobDAG 阶段线程）调用 get/get_many
+  阻塞等待结果，所有爬虫共享同一个连接池，同一主机的连接保持复用（keep-alive）
+- 按域名限制并发数和请求间隔（同一域名两次请求开始的最小间隔），可按域名单独配置
+- 连接失败、超时和 429/5xx 响应按指数退避重试，429/503 优先使用 Retry-After
+- 响应体超过大小上限时中止读取并报错
+- get_many 并发抓取多个页面（如文章正文），失败的页面以带 error 的响应返回，不影响其他页面
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+# 可重试的响应状态码
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 可重试的请求异常（连接、读写超时、连接被重置等）
+RETRY_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+# 默认选项，可按域名覆盖 concurrency、min_interval、retries、backoff、max_bytes、timeout
+DEFAULT_OPTIONS = {
+    'concurrency': 4,            # 同一域名的并发请求数
+    'min_interval': 0.5,         # 同一域名两次请求开始的最小间隔（秒）
+    'retries': 2,                # 失败后的重试次数
+    'backoff': 1.0,              # 首次重试的等待时间（秒），之后每次翻倍
+    'max_backoff': 30.0,         # 单次重试等待时间上限（秒）
+    'max_bytes': 5 * 1024 * 1024,  # 响应体大小上限（字节）
+    'timeout': 30.0,             # 单次请求超时（秒）
+    'max_connections': 32,       # 连接池总连接数上限（首次请求时生效）
+    'max_keepalive': 16,         # 连接池保持的空闲连接数（首次请求时生效）
+    'keepalive_expiry': 30.0,    # 空闲连接保持时间（秒，首次请求时生效）
+}
+
+# 可按域名覆盖的选项
+HOST_OPTIONS = ('concurrency', 'min_interval', 'retries', 'backoff', 'max_backoff', 'max_bytes', 'timeout')
+
+# 默认的域名选项（Product Hunt 通过浏览器逐个打开页面，保持原来的 1~3 秒间隔）
+DEFAULT_DOMAINS = {
+    'www.producthunt.com': {'concurrency': 1, 'min_interval': 2.0},
+}
+
+
+class FetchError(Exception):
+    """请求失败（重试后仍失败、响应过大或 HTTP 错误状态）"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ResponseTooLarge(FetchError):
+    """响应体超过大小上限"""
+
+
+class FetchResponse:
+    """抓取结果（接口与 requests.Response 的常用部分一致）"""
+
+    def __init__(self, url: str, status_code: Optional[int] = None, headers: Optional[httpx.Headers] = None,
+                 content: bytes = b'', encoding: Optional[str] = None, attempts: int = 0,
+                 error: Optional[Exception] = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers if headers is not None else httpx.Headers()
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.attempts = attempts
+        self.error = error
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status_code is not None and self.status_code < 400
+
+    def raise_for_status(self):
+        """请求失败或状态码 >= 400 时抛出异常"""
+        if self.error is not None:
+            raise self.error
+        if self.status_code >= 400:
+            raise FetchError(f"HTTP {self.status_code}: {self.url}", status_code=self.status_code)
+
+
+class _HostLimiter:
+    """单个域名的并发数和请求间隔限制（只在事件循环线程中使用）"""
+
+    def __init__(self, options: Dict[str, Any]):
+        self.options = options
+        self.semaphore = asyncio.Semaphore(options['concurrency'])
+        self._next_start = 0.0
+
+    async def wait_turn(self):
+        """等待到本域名下一个可用的请求开始时间"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self._next_start)
+        self._next_start = start + self.options['min_interval']
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class HttpFetcher:
+    """爬虫共享的异步 HTTP 抓取器"""
+
+    def __init__(self, **options):
+        """
+        Args:
+            **options: 覆盖 DEFAULT_OPTIONS；domains={域名: {选项}} 按域名覆盖
+        """
+        self._options = dict(DEFAULT_OPTIONS)
+        self._domains: Dict[str, Dict[str, Any]] = {host: dict(opts) for host, opts in DEFAULT_DOMAINS.items()}
+        self._hosts: Dict[str, _HostLimiter] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        if options:
+            self.configure(**options)
+
+    def configure(self, domains: Optional[Dict[str, Dict[str, Any]]] = None, **options):
+        """
+        更新选项（连接池选项在首次请求创建客户端时生效，其余选项对之后的请求生效）
+
+        Args:
+            domains: 按域名覆盖的选项（合并到 DEFAULT_DOMAINS 之上），如 {"techcrunch.com": {"concurrency": 2}}
+            **options: DEFAULT_OPTIONS 中的选项
+        """
+        unknown = [key for key in options if key not in DEFAULT_OPTIONS]
+        for host, host_options in (domains or {}).items():
+            unknown.extend(f"{host}.{key}" for key in host_options if key not in HOST_OPTIONS)
+        if unknown:
+            raise ValueError(f"未知的抓取选项: {', '.join(unknown)}")
+        with self._lock:
+            self._options.update(options)
+            if domains is not None:
+                self._domains = {host: dict(opts) for host, opts in DEFAULT_DOMAINS.items()}
+                for host, host_options in domains.items():
+                    self._domains.setdefault(host.lower(), {}).update(host_options)
+            # 限制器按新选项重建（进行中的请求继续使用旧的限制器）
+            self._hosts = {}
+
+    def host_options(self, host: str) -> Dict[str, Any]:
+        """域名的生效选项"""
+        with self._lock:
+            options = {key: self._options[key] for key in HOST_OPTIONS}
+            options.update(self._domains.get(host, {}))
+        return options
+
+    # ---------- 同步接口 ----------
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResponse:
+        """
+        抓取单个页面（阻塞）
+
+        Returns:
+            FetchResponse（HTTP 错误状态不抛出异常，由调用方 raise_for_status）
+
+        Raises:
+            FetchError: 重试后仍无法得到响应，或响应过大
+        """
+        response = self._run(self._fetch(url, headers))
+        if response.error is not None:
+            raise response.error
+        return response
+
+    def get_many(self, urls: Iterable[str], headers: Optional[Dict[str, str]] = None) -> List[FetchResponse]:
+        """
+        并发抓取多个页面（阻塞到全部完成，受各域名的并发数和请求间隔限制）
+
+        Returns:
+            与 urls 顺序一致的 FetchResponse 列表；失败的页面 error 不为空，raise_for_status 时抛出
+        """
+        urls = list(urls)
+        if not urls:
+            return []
+
+        async def fetch_all():
+            return await asyncio.gather(*(self._fetch(url, headers) for url in urls))
+        return self._run(fetch_all())
+
+    def throttle(self, url: str):
+        """
+        等待该域名的下一个请求时机（阻塞），用于不经过本抓取器的请求（如浏览器打开页面）遵守同样的请求间隔
+        """
+        host = self._host(url)
+
+        async def wait():
+            await self._limiter(host).wait_turn()
+        self._run(wait())
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """按域名汇总的请求次数、重试次数、失败次数、字节数和总耗时"""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+    def close(self):
+        """关闭连接池和事件循环"""
+        with self._lock:
+            loop, client = self._loop, self._client
+            self._loop, self._client = None, None
+        if loop is None:
+            return
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    # ---------- 事件循环 ----------
+
+    def _run(self, coro):
+        """在后台事件循环中执行协程并等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="scraper-http", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """连接池客户端（在事件循环线程中首次使用时创建）"""
+        if self._client is None:
+            options = self._options
+            self._client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=options['max_connections'],
+                    max_keepalive_connections=options['max_keepalive'],
+                    keepalive_expiry=options['keepalive_expiry']
+                )
+            )
+        return self._client
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).hostname or '').lower()
+
+    def _limiter(self, host: str) -> _HostLimiter:
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = _HostLimiter(self.host_options(host))
+            with self._lock:
+                limiter = self._hosts.setdefault(host, limiter)
+        return limiter
+
+    def _record(self, host: str, elapsed: float, size: int = 0, retried: bool = False, failed: bool = False):
+        with self._lock:
+            stats = self._stats.setdefault(host, {'requests': 0, 'retries': 0, 'errors': 0, 'bytes': 0, 'latency': 0.0})
+            stats['requests'] += 1
+            stats['retries'] += 1 if retried else 0
+            stats['errors'] += 1 if failed else 0
+            stats['bytes'] += size
+            stats['latency'] = round(stats['latency'] + elapsed, 3)
+
+    # ---------- 抓取 ----------
+
+    async def _fetch(self, url: str, headers: Optional[Dict[str, str]]) -> FetchResponse:
+        """抓取一个页面（含限流和重试），失败时返回带 error 的响应"""
+        host = self._host(url)
+        limiter = self._limiter(host)
+        options = limiter.options
+        attempt = 0
+        while True:
+            attempt += 1
+            async with limiter.semaphore:
+                await limiter.wait_turn()
+                start = time.monotonic()
+                try:
+                    response = await self._request(url, headers, options)
+                    error = None
+                except ResponseTooLarge as e:
+                    self._record(host, time.monotonic() - start, retried=attempt > 1, failed=True)
+                    return FetchResponse(url, attempts=attempt, error=e)
+                except RETRY_ERRORS as e:
+                    response, error = None, e
+                except httpx.HTTPError as e:
+                    self._record(host, time.monotonic() - start, retried=attempt > 1, failed=True)
+                    return FetchResponse(url, attempts=attempt, error=FetchError(f"请求失败: {url}: {e!r}"))
+            failed = error is not None or response.status_code >= 400
+            self._record(host, time.monotonic() - start, len(response.content) if response else 0,
+                         retried=attempt > 1, failed=failed)
+
+            retryable = error is not None or response.status_code in RETRY_STATUSES
+            if not retryable or attempt > options['retries']:
+                if error is not None:
+                    return FetchResponse(url, attempts=attempt,
+                                         error=FetchError(f"请求失败（已尝试 {attempt} 次）: {url}: {error!r}"))
+                response.attempts = attempt
+                return response
+
+            delay = self._retry_delay(attempt, response, options)
+            reason = f"HTTP {response.status_code}" if response else type(error).__name__
+            print(f"🔄 {host} 请求失败（{reason}），{delay:.1f}s 后重试 ({attempt}/{options['retries']}): {url}")
+            await asyncio.sleep(delay)
+
+    async def _request(self, url: str, headers: Optional[Dict[str, str]], options: Dict[str, Any]) -> FetchResponse:
+        """发出一次请求，流式读取响应体，超过大小上限时中止"""
+        max_bytes = options['max_bytes']
+        async with self._get_client().stream('GET', url, headers=headers, timeout=options['timeout']) as response:
+            length = response.headers.get('content-length')
+            if length and length.isdigit() and int(length) > max_bytes:
+                raise ResponseTooLarge(f"响应过大（{length} 字节，上限 {max_bytes}）: {url}")
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResponseTooLarge(f"响应过大（超过 {max_bytes} 字节）: {url}")
+                chunks.append(chunk)
+            return FetchResponse(str(response.url), response.status_code, response.headers,
+                                 b''.join(chunks), response.charset_encoding)
+
+    @staticmethod
+    def _retry_delay(attempt: int, response: Optional[FetchResponse], options: Dict[str, Any]) -> float:
+        """指数退避（带随机抖动）；429/503 响应带 Retry-After 秒数时取两者较大值"""
+        delay = options['backoff'] * (2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+        if response is not None and response.status_code in (429, 503):
+            retry_after = response.headers.get('retry-after', '')
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+        return min(delay, options['max_backoff'])
+
+
+# 全局爬虫抓取器实例
+http_fetcher = HttpFetcher()
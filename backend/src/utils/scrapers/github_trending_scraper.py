@@ -4,13 +4,16 @@ GitHub Trending scraper
 This module provides the GitHubTrendingScraper class for scraping trending repositories from GitHub.
 """
 
-import requests
 from tqdm import tqdm
 from bs4 import BeautifulSoup
 from datetime import datetime
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
 import re
 
+from .base import RankFunc, check_cancelled, select_news
+from .fetcher import http_fetcher
+
 
 class GitHubTrendingScraper:
     """GitHub Trending scraper for popular repositories"""
@@ -34,13 +37,13 @@ class GitHubTrendingScraper:
         """Get today's date in YYYY-MM-DD format"""
         return datetime.now().strftime("%Y-%m-%d")
     
-    def get_trending_repositories(self, time_range: str = "daily", limit: int = 10) -> List[Dict[str, Any]]:
+    def get_trending_repositories(self, time_range: str = "daily", limit: Optional[int] = 10) -> List[Dict[str, Any]]:
         """
         Scrape trending repositories from GitHub
         
         Args:
             time_range: "daily", "weekly", or "monthly"
-            limit: Maximum number of repositories to fetch
+            limit: Maximum number of repositories to fetch, None for all listed
         """
         repos_list = []
         
@@ -50,7 +53,7 @@ class GitHubTrendingScraper:
         print(f"📄 正在抓取页面: {url}")
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = http_fetcher.get(url, headers=self.headers)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -176,9 +179,22 @@ class GitHubTrendingScraper:
             print(f"❌ 获取仓库详情失败: {repo_link}, 错误: {e}")
             return "无法获取仓库详情"
     
-    def get_news_list(self) -> List[Dict[str, Any]]:
-        """Get complete repository list with content (compatible with news handler)"""
-        repos_list = self.get_trending_repositories(time_range="daily", limit=5)
+    def get_news_list(self, limit: Optional[int] = None, rank: Optional[RankFunc] = None,
+                      cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Get repository list with content (compatible with news handler)
+
+        Args:
+            limit: maximum number of repositories, default 5
+            rank: optional ranking key applied before limiting (higher first); all listed repositories are parsed
+            cancel: optional cancel event, checked after listing (source deadline passed)
+        """
+        if limit is None:
+            limit = 5
+        # Content is built from the trending page itself, so only parsing is limited here
+        repos_list = self.get_trending_repositories(time_range="daily", limit=None if rank else limit)
+        repos_list = select_news(repos_list, limit, rank)
+        check_cancelled(cancel)
         
         # Process repositories to match expected format
         processed_repos = []
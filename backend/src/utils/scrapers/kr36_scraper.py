@@ -4,11 +4,13 @@
 This module provides the Kr36Scraper class for scraping tech news from 36kr.
 """
 
-import requests
-from tqdm import tqdm
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
+
+from .base import RankFunc, check_cancelled, select_news
+from .fetcher import FetchResponse, http_fetcher
 
 
 class Kr36Scraper:
@@ -59,7 +61,7 @@ class Kr36Scraper:
         for url in urls_to_try:
             try:
                 print(f"📄 正在抓取页面: {url}")
-                response = requests.get(url, headers=self.headers, timeout=30)
+                response = http_fetcher.get(url, headers=self.headers)
                 
                 if response.status_code == 403:
                     print(f"⚠️  36kr 访问被限制: {url}")
@@ -147,10 +149,11 @@ class Kr36Scraper:
         print(f"🎯 总共找到 {len(unique_news)} 篇 36kr 文章")
         return unique_news
     
-    def get_news_content(self, news_link: str) -> str:
-        """Extract content from a 36kr article"""
+    def get_news_content(self, news_link: str, response: Optional[FetchResponse] = None) -> str:
+        """Extract content from a 36kr article (response: page already fetched by get_news_list, fetched here if None)"""
         try:
-            response = requests.get(news_link, headers=self.headers, timeout=30)
+            if response is None:
+                response = http_fetcher.get(news_link, headers=self.headers)
             
             if response.status_code == 403:
                 return "36kr内容访问受限"
@@ -189,17 +192,26 @@ class Kr36Scraper:
             print(f"❌ 获取文章内容失败: {news_link}, 错误: {e}")
             return "无法获取文章内容"
     
-    def get_news_list(self) -> List[Dict[str, Any]]:
-        """Get complete news list with content"""
-        news_list = self.get_title_and_link_list()
-        news_content_list = []
+    def get_news_list(self, limit: Optional[int] = None, rank: Optional[RankFunc] = None,
+                      cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Get news list with content
+
+        Args:
+            limit: maximum number of items, content is fetched only for these
+            rank: optional ranking key applied before limiting (higher first)
+            cancel: optional cancel event, checked before fetching bodies (source deadline passed)
+        """
+        news_list = select_news(self.get_title_and_link_list(), limit, rank)
         
-        for news in tqdm(news_list, desc="🏢 Getting 36kr content"):
-            news_content = self.get_news_content(news['link'])
-            news['content'] = news_content
-            news_content_list.append(news)
+        check_cancelled(cancel)
+        # Fetch all article pages concurrently through the shared fetcher, then parse them
+        print(f"🏢 36kr: 并发获取 {len(news_list)} 篇文章正文")
+        responses = http_fetcher.get_many([news['link'] for news in news_list], headers=self.headers)
+        for news, response in zip(news_list, responses):
+            news['content'] = self.get_news_content(news['link'], response)
         
-        return news_content_list
+        return news_list
 
 
 def get_news_list():
@@ -3,12 +3,14 @@
 Product Hunt 爬虫
 
 使用 Playwright 绕过 Cloudflare，并支持 domloaded 等待策略
+来源被放弃（超过截止时间）后，等待和重试之间检查取消事件，提前退出并关闭浏览器
 """
 
 import os
 import sys
 import time
 import random
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from urllib.parse import urljoin, urlparse
@@ -16,7 +18,9 @@ from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright, Page
 from tqdm import tqdm
-import requests
+
+from .base import RankFunc, ScrapeCancelled, check_cancelled, select_news
+from .fetcher import http_fetcher
 
 
 class ProductHuntScraper:
@@ -25,10 +29,31 @@ class ProductHuntScraper:
     BASE_URL = "https://www.producthunt.com"
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        # 页面通过 Playwright 打开（Cloudflare），请求间隔由共享抓取器按域名控制
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        }
+        # 当前采集的取消事件（get_news_list 传入）
+        self._cancel: Optional[threading.Event] = None
+    
+    # 可取消的等待单次最长时间（毫秒）
+    WAIT_SLICE_MS = 500
+    
+    def _sleep(self, seconds: float):
+        """可取消的等待，取消后抛出 ScrapeCancelled"""
+        if self._cancel is not None:
+            self._cancel.wait(seconds)
+        else:
+            time.sleep(seconds)
+        check_cancelled(self._cancel)
+    
+    def _wait(self, page: Page, ms: int):
+        """页面内可取消的等待（分段等待，每段之间检查取消事件），取消后抛出 ScrapeCancelled 并随之关闭浏览器"""
+        while ms > 0:
+            check_cancelled(self._cancel)
+            page.wait_for_timeout(min(ms, self.WAIT_SLICE_MS))
+            ms -= self.WAIT_SLICE_MS
+        check_cancelled(self._cancel)
         
     def get_current_week_number(self) -> int:
         """获取当前周数"""
@@ -77,11 +102,13 @@ class ProductHuntScraper:
                     return products
                 else:
                     print(f"⚠️ 第{attempt + 1}次尝试未获取到产品数据")
+            except ScrapeCancelled:
+                raise
             except Exception as e:
                 print(f"❌ 第{attempt + 1}次访问失败: {e}")
                 if attempt == 0:  # 第一次失败后等待一下再重试
                     print("⏳ 等待 3 秒后重试...")
-                    time.sleep(3)
+                    self._sleep(3)
         
         # 如果第一个 URL 两次都失败，尝试第二个 URL
         if len(urls_to_try) > 1:
@@ -94,6 +121,8 @@ class ProductHuntScraper:
                     return products
                 else:
                     print(f"⚠️ 备选URL未获取到产品数据")
+            except ScrapeCancelled:
+                raise
             except Exception as e:
                 print(f"❌ 备选URL访问失败: {e}")
         
@@ -180,7 +209,7 @@ class ProductHuntScraper:
                 print("⏳ 等待页面加载和 Cloudflare 验证...")
                 
                 # 等待初始加载
-                page.wait_for_timeout(random.randint(3000, 6000))
+                self._wait(page, random.randint(3000, 6000))
                 
                 # 检查是否遇到 Cloudflare
                 initial_content = page.content()
@@ -191,12 +220,12 @@ class ProductHuntScraper:
                     print("🔄 检测到 Cloudflare，等待验证完成...")
                     
                     # 更长时间的等待
-                    page.wait_for_timeout(random.randint(10000, 15000))
+                    self._wait(page, random.randint(10000, 15000))
                     
                     # 尝试重新加载页面
                     try:
                         page.reload(wait_until='domcontentloaded', timeout=30000)
-                        page.wait_for_timeout(random.randint(3000, 5000))
+                        self._wait(page, random.randint(3000, 5000))
                     except Exception as e:
                         print(f"⚠️ 重新加载失败，继续尝试: {e}")
                 
@@ -204,10 +233,10 @@ class ProductHuntScraper:
                 print("📜 滚动页面加载更多内容...")
                 for i in range(3):
                     page.evaluate(f"window.scrollTo(0, document.body.scrollHeight/3 * {i + 1});")
-                    page.wait_for_timeout(random.randint(1000, 2000))
+                    self._wait(page, random.randint(1000, 2000))
                 
                 # 等待页面稳定
-                page.wait_for_timeout(3000)
+                self._wait(page, 3000)
                 
                 # 获取最终页面内容，处理导航问题
                 max_content_attempts = 3
@@ -221,7 +250,7 @@ class ProductHuntScraper:
                     except Exception as content_error:
                         if "navigating" in str(content_error).lower():
                             print(f"⚠️ 页面正在导航中，坚持当前URL，等待后重试 ({content_attempt + 1}/{max_content_attempts})")
-                            page.wait_for_timeout(random.randint(3000, 5000))
+                            self._wait(page, random.randint(3000, 5000))
                             continue
                         else:
                             raise content_error
@@ -235,6 +264,9 @@ class ProductHuntScraper:
                 # 解析页面内容
                 return self._parse_product_hunt_content(content, url)
                 
+        except ScrapeCancelled:
+            print("⏹️ 采集已取消，关闭浏览器")
+            raise
         except Exception as e:
             print(f"❌ Playwright 爬取失败: {e}")
             raise e
@@ -509,6 +541,8 @@ class ProductHuntScraper:
         try:
             # 优先使用 Playwright 方法
             return self.get_title_and_link_list_with_playwright()
+        except ScrapeCancelled:
+            raise
         except Exception as e:
             print(f"❌ Playwright 方法失败: {e}")
             return []
@@ -544,13 +578,15 @@ class ProductHuntScraper:
                     print(f"⚠️ 第{attempt + 1}次尝试获取到的可能是Cloudflare页面")
                     if attempt < max_attempts - 1:
                         print("⏳ 等待3秒后重试...")
-                        time.sleep(3)
+                        self._sleep(3)
                         
+            except ScrapeCancelled:
+                raise
             except Exception as e:
                 print(f"❌ 第{attempt + 1}次尝试失败: {e}")
                 if attempt < max_attempts - 1:
                     print("⏳ 等待3秒后重试...")
-                    time.sleep(3)
+                    self._sleep(3)
         
         # 如果所有尝试都失败，返回从URL提取的产品名
         product_slug = url.split('/')[-1].replace('-', ' ').title()
@@ -628,7 +664,7 @@ class ProductHuntScraper:
                 
                 # 访问产品页面
                 page.goto(url, wait_until='domcontentloaded', timeout=60000)
-                page.wait_for_timeout(random.randint(3000, 6000))
+                self._wait(page, random.randint(3000, 6000))
                 
                 print("✅ 访问产品页面")
                 
@@ -642,12 +678,12 @@ class ProductHuntScraper:
                                 window.scrollTo(0, window.innerHeight * {i + 1});
                             }}
                         """)
-                        page.wait_for_timeout(random.randint(1000, 2000))
+                        self._wait(page, random.randint(1000, 2000))
                     except Exception as scroll_error:
                         print(f"⚠️ 滚动失败，跳过: {scroll_error}")
                         break
                 
-                page.wait_for_timeout(3000)
+                self._wait(page, 3000)
                 
                 # 获取页面内容，处理导航问题
                 max_content_attempts = 3
@@ -660,7 +696,7 @@ class ProductHuntScraper:
                     except Exception as content_error:
                         if "navigating" in str(content_error).lower():
                             print(f"⚠️ 产品页面正在导航中，坚持当前URL，等待后重试 ({content_attempt + 1}/{max_content_attempts})")
-                            page.wait_for_timeout(random.randint(3000, 5000))
+                            self._wait(page, random.randint(3000, 5000))
                             continue
                         else:
                             raise content_error
@@ -781,47 +817,62 @@ class ProductHuntScraper:
                 print(f"⚠️ 使用URL中的产品名: {product_slug}")
                 return f"{product_slug} - Product Hunt 产品"
                 
+        except ScrapeCancelled:
+            print("⏹️ 采集已取消，关闭浏览器")
+            raise
         except Exception as e:
             print(f"❌ 获取产品详细信息失败: {e}")
             # 返回从URL提取的产品名作为备选
             product_slug = url.split('/')[-1].replace('-', ' ').title()
             return f"{product_slug} - Product Hunt 产品"
     
-    def get_news_list(self) -> List[Dict[str, str]]:
+    def get_news_list(self, limit: Optional[int] = None, rank: Optional[RankFunc] = None,
+                      cancel: Optional[threading.Event] = None) -> List[Dict[str, str]]:
         """
-        获取完整的新闻列表（包含内容）
+        获取新闻列表（包含内容）
+        
+        Args:
+            limit: 产品数量上限，只为选中的产品打开详情页
+            rank: 可选的排序键（值越大越靠前），在限制数量之前应用
+            cancel: 取消事件（可选），置位后在下一次等待或重试前抛出 ScrapeCancelled 并关闭浏览器
         
         Returns:
             List[Dict[str, str]]: 包含完整信息的产品列表
         """
         print("📰 获取完整的 Product Hunt 产品列表...")
+        self._cancel = cancel
         
-        # 先获取标题和链接列表
-        products = self.get_title_and_link_list()
+        # 先获取标题和链接列表（排行榜页面）
+        listed = self.get_title_and_link_list()
         
-        if not products:
+        if not listed:
             print("❌ 没有获取到任何产品")
             return []
         
+        products = select_news(listed, limit, rank)
+        if len(products) < len(listed):
+            print(f"📋 排行榜共 {len(listed)} 个产品，选取 {len(products)} 个")
+        
         print(f"📝 为 {len(products)} 个产品获取详细内容...")
         
         # 为每个产品获取详细内容，添加 tqdm 进度条
         complete_products = []
         for i, product in enumerate(tqdm(products, desc="🏆 Getting Product Hunt content")):
+            check_cancelled(cancel)
             try:
                 print(f"📖 ({i+1}/{len(products)}) 获取: {product['title']}")
                 
+                # 等待 Product Hunt 域名的请求间隔，避免请求过快
+                http_fetcher.throttle(product['link'])
+                
                 # 获取内容
                 content = self.get_news_content(product['link'])
                 product['content'] = content
                 
                 complete_products.append(product)
                 
-                # 添加随机延迟，避免请求过快
-                if i < len(products) - 1:  # 最后一个不需要延迟
-                    delay = random.randint(1, 3)
-                    time.sleep(delay)
-                    
+            except ScrapeCancelled:
+                raise
             except Exception as e:
                 print(f"❌ 获取产品 {product['title']} 的内容失败: {e}")
                 # 即使获取内容失败，也保留基本信息
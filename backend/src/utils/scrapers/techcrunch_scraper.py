@@ -4,11 +4,13 @@ TechCrunch news scraper
 This module provides the TechCrunchScraper class for scraping AI news from TechCrunch.
 """
 
-import requests
-from tqdm import tqdm
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
+
+from .base import RankFunc, check_cancelled, select_news
+from .fetcher import FetchResponse, http_fetcher
 
 
 class TechCrunchScraper:
@@ -38,18 +40,26 @@ class TechCrunchScraper:
             for i in range(days)
         ]
     
-    def get_title_and_link_list(self) -> List[Dict[str, Any]]:
-        """Scrape news titles and links from TechCrunch"""
+    def get_title_and_link_list(self, max_items: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Scrape news titles and links from TechCrunch
+
+        Args:
+            max_items: stop scanning list pages once this many articles are found (pages are newest first)
+        """
         news_list = []
         target_dates = self.get_recent_dates()
         print(f"🔍 TechCrunch: 查找日期 {target_dates}")
         
         for page in range(1, 5):  # Limit to 4 pages
+            if max_items is not None and len(news_list) >= max_items:
+                print(f"⏭️  已找到 {len(news_list)} 篇文章，跳过剩余页面")
+                break
             url = f'{self.BASE_URL}/latest/page/{page}'
             print(f"📄 正在抓取页面: {url}")
             
             try:
-                response = requests.get(url, headers=self.headers)
+                response = http_fetcher.get(url, headers=self.headers)
                 response.raise_for_status()
                 
                 soup = BeautifulSoup(response.text, 'lxml')
@@ -98,10 +108,11 @@ class TechCrunchScraper:
         print(f"🎯 总共找到 {len(news_list)} 篇 TechCrunch 文章")
         return news_list
     
-    def get_news_content(self, news_link: str) -> str:
-        """Extract content from a news article"""
+    def get_news_content(self, news_link: str, response: Optional[FetchResponse] = None) -> str:
+        """Extract content from a news article (response: page already fetched by get_news_list, fetched here if None)"""
         try:
-            response = requests.get(news_link, headers=self.headers, timeout=30)
+            if response is None:
+                response = http_fetcher.get(news_link, headers=self.headers)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'lxml')
             
@@ -125,17 +136,27 @@ class TechCrunchScraper:
             print(f"❌ 获取文章内容失败: {news_link}, 错误: {e}")
             return "无法获取文章内容"
     
-    def get_news_list(self) -> List[Dict[str, Any]]:
-        """Get complete news list with content"""
-        news_list = self.get_title_and_link_list()
-        news_content_list = []
+    def get_news_list(self, limit: Optional[int] = None, rank: Optional[RankFunc] = None,
+                      cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Get news list with content
+
+        Args:
+            limit: maximum number of items, content is fetched only for these
+            rank: optional ranking key applied before limiting (higher first)
+            cancel: optional cancel event, checked before fetching bodies (source deadline passed)
+        """
+        news_list = self.get_title_and_link_list(max_items=None if rank else limit)
+        news_list = select_news(news_list, limit, rank)
         
-        for news in tqdm(news_list, desc="🚀 Getting TechCrunch news content"):
-            news_content = self.get_news_content(news['link'])
-            news['content'] = news_content
-            news_content_list.append(news)
+        check_cancelled(cancel)
+        # Fetch all article pages concurrently through the shared fetcher, then parse them
+        print(f"🚀 TechCrunch: 并发获取 {len(news_list)} 篇文章正文")
+        responses = http_fetcher.get_many([news['link'] for news in news_list], headers=self.headers)
+        for news, response in zip(news_list, responses):
+            news['content'] = self.get_news_content(news['link'], response)
         
-        return news_content_list
+        return news_list
 
 
 def get_news_list():
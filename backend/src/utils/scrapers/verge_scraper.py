@@ -5,11 +5,13 @@ This module provides the VergeScraper class for scraping AI news from The Verge.
 """
 
 import re
-import requests
-from tqdm import tqdm
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
+
+from .base import RankFunc, check_cancelled, select_news
+from .fetcher import FetchResponse, http_fetcher
 
 
 class VergeScraper:
@@ -58,7 +60,7 @@ class VergeScraper:
             print(f"📄 正在抓取页面 {page_num}: {url}")
             
             try:
-                response = requests.get(url, headers=self.headers, timeout=30)
+                response = http_fetcher.get(url, headers=self.headers)
                 print(f"📡 响应状态码: {response.status_code}")
                 
                 if response.status_code == 403:
@@ -218,12 +220,13 @@ class VergeScraper:
         print(f"🎯 总共找到 {len(news_list)} 篇 The Verge 文章")
         return news_list
     
-    def get_news_content(self, news_href: str) -> str:
-        """Extract content from a news article"""
+    def get_news_content(self, news_href: str, response: Optional[FetchResponse] = None) -> str:
+        """Extract content from a news article (response: page already fetched by get_news_list, fetched here if None)"""
         total_url = f'{self.BASE_URL}{news_href}'
         
         try:
-            response = requests.get(total_url, headers=self.headers, timeout=30)
+            if response is None:
+                response = http_fetcher.get(total_url, headers=self.headers)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'lxml')
             
@@ -244,18 +247,28 @@ class VergeScraper:
             print(f"❌ 获取文章内容失败: {total_url}, 错误: {e}")
             return "无法获取文章内容"
     
-    def get_news_list(self) -> List[Dict[str, Any]]:
-        """Get complete news list with content"""
-        news_list = self.get_title_and_link_list()
-        news_content_list = []
-        
-        for news in tqdm(news_list, desc="⚡ Getting Verge news content"):
-            news_content = self.get_news_content(news['href'])
+    def get_news_list(self, limit: Optional[int] = None, rank: Optional[RankFunc] = None,
+                      cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Get news list with content
+
+        Args:
+            limit: maximum number of items, content is fetched only for these
+            rank: optional ranking key applied before limiting (higher first)
+            cancel: optional cancel event, checked before fetching bodies (source deadline passed)
+        """
+        news_list = select_news(self.get_title_and_link_list(), limit, rank)
+        for news in news_list:
             news['link'] = f'{self.BASE_URL}{news["href"]}'
-            news['content'] = news_content
-            news_content_list.append(news)
         
-        return news_content_list
+        check_cancelled(cancel)
+        # Fetch all article pages concurrently through the shared fetcher, then parse them
+        print(f"⚡ The Verge: 并发获取 {len(news_list)} 篇文章正文")
+        responses = http_fetcher.get_many([news['link'] for news in news_list], headers=self.headers)
+        for news, response in zip(news_list, responses):
+            news['content'] = self.get_news_content(news['href'], response)
+        
+        return news_list
 
 
 def get_news_list():
@@ -0,0 +1,217 @@
+"""
+工作日日历
+
+按年预计算每天的日期类型（工作日、周末、法定节假日、调休上班、公司放假、公司加班），
+提供 O(1) 的工作日判断和基于前缀和的区间工作日统计：
+- 法定节假日与调休来自 chinesecalendar
+- 支持本地覆盖文件（src/config/workday_override.yaml）配置公司额外的放假日和工作日
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+import yaml
+import chinese_calendar
+
+
+DateLike = Union[str, date, datetime]
+
+# 日期类型
+WORKDAY = 0            # 正常工作日
+WEEKEND = 1            # 周末
+HOLIDAY = 2            # 法定节假日
+ADJUSTED_WORKDAY = 3   # 调休上班（周末补班）
+COMPANY_HOLIDAY = 4    # 公司额外放假（覆盖文件）
+COMPANY_WORKDAY = 5    # 公司额外工作日（覆盖文件）
+
+WORKING_KINDS = {WORKDAY, ADJUSTED_WORKDAY, COMPANY_WORKDAY}
+
+# chinesecalendar 节假日英文名称到中文的映射
+HOLIDAY_NAMES = {
+    "New Year's Day": '元旦',
+    'Spring Festival': '春节',
+    'Tomb-sweeping Day': '清明节',
+    'Labour Day': '劳动节',
+    'Dragon Boat Festival': '端午节',
+    'Mid-autumn Festival': '中秋节',
+    'National Day': '国庆节'
+}
+
+# 默认覆盖文件: backend/src/config/workday_override.yaml
+DEFAULT_OVERRIDE_PATH = Path(__file__).parent.parent / "config" / "workday_override.yaml"
+
+
+def to_date(value: DateLike) -> date:
+    """将日期（YYYY-MM-DD 字符串、date 或 datetime）转换为 date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+
+class _YearTable:
+    """单个年份的预计算结果"""
+
+    def __init__(self, year: int, kinds: bytearray, names: Dict[int, str]):
+        self.year = year
+        self.first_ordinal = date(year, 1, 1).toordinal()
+        self.kinds = kinds
+        self.names = names
+
+        # 工作日位图与前缀和：prefix[i] 为当年前 i 天的工作日数
+        self.workday = bytearray(1 if kind in WORKING_KINDS else 0 for kind in kinds)
+        self.prefix = [0] * (len(kinds) + 1)
+        for i, flag in enumerate(self.workday):
+            self.prefix[i + 1] = self.prefix[i] + flag
+
+
+class WorkdayCalendar:
+    """工作日日历（按年懒加载预计算）"""
+
+    def __init__(self, override_path: str = None):
+        """
+        初始化工作日日历
+
+        Args:
+            override_path: 覆盖文件路径，默认为 src/config/workday_override.yaml（文件不存在时忽略）
+        """
+        self.override_path = Path(override_path) if override_path else DEFAULT_OVERRIDE_PATH
+        self._overrides = self._load_overrides()
+        self._years: Dict[int, _YearTable] = {}
+        self._lock = threading.Lock()
+
+    def _load_overrides(self) -> Dict[date, tuple]:
+        """读取覆盖文件，返回 {日期: (日期类型, 名称)}"""
+        if not self.override_path.exists():
+            return {}
+
+        with open(self.override_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+
+        overrides = {}
+        for day, name in (config.get('holidays') or {}).items():
+            overrides[to_date(str(day))] = (COMPANY_HOLIDAY, name or '公司放假')
+        for day, name in (config.get('workdays') or {}).items():
+            overrides[to_date(str(day))] = (COMPANY_WORKDAY, name or '公司工作日')
+        return overrides
+
+    def reload(self):
+        """重新读取覆盖文件并清空预计算结果"""
+        with self._lock:
+            self._overrides = self._load_overrides()
+            self._years = {}
+
+    def _build_year(self, year: int) -> _YearTable:
+        """预计算一年的日期类型"""
+        kinds = bytearray()
+        names: Dict[int, str] = {}
+
+        day = date(year, 1, 1)
+        index = 0
+        while day.year == year:
+            is_weekend = day.weekday() >= 5
+            try:
+                on_holiday, holiday_name = chinese_calendar.get_holiday_detail(day)
+                is_work = chinese_calendar.is_workday(day)
+            except NotImplementedError:
+                # chinesecalendar 未收录的年份，按周末判断
+                on_holiday, holiday_name, is_work = is_weekend, None, not is_weekend
+
+            if is_work:
+                kind = ADJUSTED_WORKDAY if is_weekend else WORKDAY
+            elif holiday_name:
+                kind = HOLIDAY
+                names[index] = HOLIDAY_NAMES.get(holiday_name, holiday_name)
+            else:
+                kind = WEEKEND
+
+            if day in self._overrides:
+                kind, names[index] = self._overrides[day]
+
+            kinds.append(kind)
+            day += timedelta(days=1)
+            index += 1
+
+        return _YearTable(year, kinds, names)
+
+    def _year(self, year: int) -> _YearTable:
+        """获取年份的预计算结果（首次使用时构建）"""
+        table = self._years.get(year)
+        if table is None:
+            with self._lock:
+                table = self._years.get(year)
+                if table is None:
+                    table = self._build_year(year)
+                    self._years[year] = table
+        return table
+
+    def _locate(self, value: DateLike) -> tuple:
+        """定位日期所在年份表和当年序号"""
+        day = to_date(value)
+        table = self._year(day.year)
+        return table, day.toordinal() - table.first_ordinal
+
+    def is_workday(self, value: DateLike) -> bool:
+        """判断是否为工作日（含调休上班和公司额外工作日）"""
+        table, index = self._locate(value)
+        return bool(table.workday[index])
+
+    def is_holiday(self, value: DateLike) -> bool:
+        """判断是否为非工作日（周末、法定节假日、公司放假）"""
+        return not self.is_workday(value)
+
+    def day_kind(self, value: DateLike) -> int:
+        """获取日期类型（WORKDAY / WEEKEND / HOLIDAY / ADJUSTED_WORKDAY / COMPANY_HOLIDAY / COMPANY_WORKDAY）"""
+        table, index = self._locate(value)
+        return table.kinds[index]
+
+    def holiday_name(self, value: DateLike) -> Optional[str]:
+        """获取节假日或覆盖日期的名称，普通工作日和周末返回 None"""
+        table, index = self._locate(value)
+        return table.names.get(index)
+
+    def _workdays_until(self, day: date) -> int:
+        """当年 1 月 1 日至 day（含）的工作日数"""
+        table = self._year(day.year)
+        return table.prefix[day.toordinal() - table.first_ordinal + 1]
+
+    def count_workdays(self, start: DateLike, end: DateLike) -> int:
+        """
+        统计 [start, end] 内的工作日数
+
+        Args:
+            start: 开始日期
+            end: 结束日期
+
+        Returns:
+            工作日数（start 晚于 end 时为 0）
+        """
+        start_day, end_day = to_date(start), to_date(end)
+        if end_day < start_day:
+            return 0
+
+        # 跨年时累加中间年份的全年工作日数
+        total = self._workdays_until(end_day)
+        for year in range(start_day.year, end_day.year):
+            total += self._year(year).prefix[-1]
+        return total - self._workdays_until(start_day) + (1 if self.is_workday(start_day) else 0)
+
+    def workdays(self, start: DateLike, end: DateLike) -> Iterator[date]:
+        """按顺序迭代 [start, end] 内的工作日"""
+        day, end_day = to_date(start), to_date(end)
+        while day <= end_day:
+            table = self._year(day.year)
+            index = day.toordinal() - table.first_ordinal
+            year_end = min(end_day, date(day.year, 12, 31))
+            last = year_end.toordinal() - table.first_ordinal
+            for i in range(index, last + 1):
+                if table.workday[i]:
+                    yield date.fromordinal(table.first_ordinal + i)
+            day = year_end + timedelta(days=1)
+
+
+# 全局工作日日历实例
+workday_calendar = WorkdayCalendar()